@@ -70,6 +70,13 @@ class Customer(AbstractUser):
         verbose_name = _('客户')
         verbose_name_plural = _('客户')
         ordering = ['-created_at']
+        indexes = [
+            # 客户列表游标分页的排序，也用于仪表盘按注册时间统计新增客户
+            models.Index(
+                fields=['-created_at', 'id'],
+                name='customer_keyset_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.username
\ No newline at end of file
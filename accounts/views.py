@@ -4,6 +4,7 @@ from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from core.pagination import KeysetPagination
 from django.contrib.auth import get_user_model
 from .serializers import (
     CustomerSerializer, 
@@ -20,6 +21,7 @@ class CustomerViewSet(viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_permissions(self):
         if self.action == 'create':
@@ -2,8 +2,15 @@
 
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Appointment, AppointmentNote
+from .models import (
+    Appointment,
+    AppointmentNote,
+    AppointmentSeries,
+    SlotHold,
+    WaitlistEntry,
+)
 from .utils import AppointmentStatus
+from .transitions import transition_appointments
 
 class AppointmentNoteInline(admin.TabularInline):
     """预约备注内联管理"""
@@ -35,6 +42,7 @@ class AppointmentAdmin(admin.ModelAdmin):
         'status', 
         'date', 
         'service', 
+        'resource',
         'created_at'
     )
     search_fields = (
@@ -49,6 +57,7 @@ class AppointmentAdmin(admin.ModelAdmin):
     )
     inlines = [AppointmentNoteInline]
     date_hierarchy = 'date'
+    actions = ['confirm_selected', 'complete_selected', 'cancel_selected']
     
     fieldsets = (
         ('预约信息', {
@@ -56,6 +65,7 @@ class AppointmentAdmin(admin.ModelAdmin):
                 'customer', 
                 'pet', 
                 'service', 
+                'resource',
                 'total_price'
             )
         }),
@@ -124,7 +134,8 @@ class AppointmentAdmin(admin.ModelAdmin):
             AppointmentStatus.PENDING: '#FFA500',    # 橙色
             AppointmentStatus.CONFIRMED: '#007BFF',   # 蓝色
             AppointmentStatus.COMPLETED: '#28A745',   # 绿色
-            AppointmentStatus.CANCELLED: '#DC3545'    # 红色
+            AppointmentStatus.CANCELLED: '#DC3545',   # 红色
+            AppointmentStatus.NO_SHOW: '#6C757D'      # 灰色
         }
         return format_html(
             '<span style="color: {};">{}</span>',
@@ -133,11 +144,34 @@ class AppointmentAdmin(admin.ModelAdmin):
         )
     status_colored.short_description = '状态'
 
+    def _transition_selected(self, request, queryset, transition):
+        """批量修改选中预约的状态，并提示修改和跳过的数量"""
+        moved, rejected = transition_appointments(queryset, transition)
+        self.message_user(
+            request,
+            f'已更新 {len(moved)} 个预约，{len(rejected)} 个预约因状态不符被跳过'
+        )
+
+    @admin.action(description='确认选中的预约')
+    def confirm_selected(self, request, queryset):
+        self._transition_selected(request, queryset, 'confirm')
+
+    @admin.action(description='完成选中的预约')
+    def complete_selected(self, request, queryset):
+        self._transition_selected(request, queryset, 'complete')
+
+    @admin.action(description='取消选中的预约')
+    def cancel_selected(self, request, queryset):
+        self._transition_selected(request, queryset, 'cancel')
+
     def save_model(self, request, obj, form, change):
         """保存模型时的额外操作"""
         if not change:  # 如果是新建预约
             if not obj.customer:
                 obj.customer = request.user
+        if 'pet' in form.changed_data:
+            # 表单中已有宠物对象，按当前体型记录
+            obj.dog_size = obj.pet.size
         super().save_model(request, obj, form, change)
 
     def save_formset(self, request, form, formset, change):
@@ -181,4 +215,80 @@ class AppointmentNoteAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         if obj is None:
             return True
-        return request.user.is_superuser or obj.staff == request.user
\ No newline at end of file
+        return request.user.is_superuser or obj.staff == request.user
+
+@admin.register(AppointmentSeries)
+class AppointmentSeriesAdmin(admin.ModelAdmin):
+    """周期预约管理"""
+    list_display = (
+        'customer',
+        'pet',
+        'service',
+        'start_date',
+        'start_time',
+        'interval_days',
+        'count',
+        'until',
+        'is_active',
+        'materialized_until'
+    )
+    list_filter = (
+        'is_active',
+        'service'
+    )
+    search_fields = (
+        'customer__username',
+        'pet__name',
+        'service__name'
+    )
+    readonly_fields = (
+        'materialized_until',
+        'created_at',
+        'updated_at'
+    )
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    """候补登记管理"""
+    list_display = (
+        'customer',
+        'pet',
+        'service',
+        'date_from',
+        'date_to',
+        'earliest_start',
+        'latest_start',
+        'status',
+        'created_at'
+    )
+    list_filter = (
+        'status',
+        'service'
+    )
+    search_fields = (
+        'customer__username',
+        'pet__name',
+        'service__name'
+    )
+    readonly_fields = (
+        'duration',
+        'hold',
+        'appointment',
+        'created_at',
+        'updated_at'
+    )
+
+@admin.register(SlotHold)
+class SlotHoldAdmin(admin.ModelAdmin):
+    """时间段保留管理"""
+    list_display = (
+        'date',
+        'start_time',
+        'end_time',
+        'customer',
+        'service',
+        'resource',
+        'expires_at'
+    )
+    list_filter = ('date',)
+    search_fields = ('customer__username',)
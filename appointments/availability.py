@@ -0,0 +1,261 @@
+# appointments/availability.py
+
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from django.utils import timezone
+from resources.models import Resource
+from .models import Appointment, SlotHold
+from .schedule import get_schedule
+from .utils import AppointmentStatus, generate_time_slots
+
+
+def time_to_seconds(value):
+    """将 time 对象转换为当天零点起的秒数"""
+    return value.hour * 3600 + value.minute * 60 + value.second
+
+
+class BusyTimeline:
+    """
+    某一天已被占用的时间区间集合
+
+    构造时对区间排序并合并重叠部分，得到互不相交的有序区间，
+    之后判断任意时间段是否空闲只需要一次二分查找。
+    """
+
+    def __init__(self, intervals=()):
+        starts = []
+        ends = []
+        for start, end in sorted(intervals):
+            if ends and start <= ends[-1]:
+                # 与上一个区间重叠或相接，直接合并
+                ends[-1] = max(ends[-1], end)
+            else:
+                starts.append(start)
+                ends.append(end)
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def from_times(cls, rows):
+        """由 (start_time, end_time) 序列构建，例如 values_list 的查询结果"""
+        return cls(
+            (time_to_seconds(start), time_to_seconds(end))
+            for start, end in rows
+        )
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def busy_seconds(self):
+        """已占用的总秒数"""
+        return sum(end - start for start, end in zip(self.starts, self.ends))
+
+    def add(self, start, end):
+        """加入一个 [start, end) 秒区间，并与相邻区间合并"""
+        index = bisect_left(self.starts, start)
+        if index > 0 and self.ends[index - 1] >= start:
+            index -= 1
+            start = self.starts[index]
+        last = index
+        while last < len(self.starts) and self.starts[last] <= end:
+            end = max(end, self.ends[last])
+            last += 1
+        self.starts[index:last] = [start]
+        self.ends[index:last] = [end]
+
+    def is_free(self, start, end):
+        """判断 [start, end) 秒区间是否与已占用时间没有重叠"""
+        # 合并后的区间按开始和结束时间同时有序，
+        # 只需检查最后一个开始早于 end 的区间是否在 start 之前结束
+        index = bisect_left(self.starts, end)
+        return index == 0 or self.ends[index - 1] <= start
+
+    def is_free_time(self, start_time, end_time):
+        """以 time 对象判断时间段是否空闲"""
+        return self.is_free(
+            time_to_seconds(start_time),
+            time_to_seconds(end_time)
+        )
+
+
+class NoResourceAvailable(Exception):
+    """没有可以承接该时间段的资源"""
+
+
+class ResourcePool:
+    """
+    某一天各资源的占用情况
+
+    每个资源维护独立的 BusyTimeline，判断时间段是否可预约时
+    只需对有该服务技能的资源各做一次二分查找，资源较多时也很快。
+
+    未配置任何启用中的资源时退化为单一容量：所有预约共用一条时间线，
+    分配结果为 None。资源为空或已停用的有效预约（启用资源前的历史预约等）
+    无法确定占用了哪个资源，按占用全部资源处理，保证不会超订。
+    """
+
+    def __init__(self, skills, busy_rows=()):
+        # skills: {resource_id: {service_id, ...}}
+        # busy_rows: [(resource_id, start_time, end_time), ...]
+        self.skills = skills
+        if not skills:
+            self.timelines = {None: BusyTimeline.from_times(
+                (start, end) for _, start, end in busy_rows
+            )}
+            return
+
+        assigned = defaultdict(list)
+        unassigned = []
+        for resource_id, start, end in busy_rows:
+            if resource_id in skills:
+                assigned[resource_id].append((start, end))
+            else:
+                unassigned.append((start, end))
+        self.timelines = {
+            resource_id: BusyTimeline.from_times(
+                assigned[resource_id] + unassigned
+            )
+            for resource_id in skills
+        }
+
+    def qualified(self, service_id):
+        """可以提供该服务的资源"""
+        if not self.skills:
+            return [None]
+        return [
+            resource_id for resource_id, services in self.skills.items()
+            if service_id in services
+        ]
+
+    def free_resources(self, service_id, start_time, end_time):
+        """有该服务技能且在该时间段空闲的资源"""
+        start = time_to_seconds(start_time)
+        end = time_to_seconds(end_time)
+        return [
+            resource_id for resource_id in self.qualified(service_id)
+            if self.timelines[resource_id].is_free(start, end)
+        ]
+
+    def is_available(self, service_id, start_time, end_time):
+        """至少有一个合格资源空闲时，该时间段可以预约"""
+        start = time_to_seconds(start_time)
+        end = time_to_seconds(end_time)
+        return any(
+            self.timelines[resource_id].is_free(start, end)
+            for resource_id in self.qualified(service_id)
+        )
+
+    def allocate(self, service_id, start_time, end_time, preferred=None):
+        """
+        为时间段分配资源并记为占用，返回资源 id
+
+        preferred 仍空闲时保留原资源（修改预约时不随意更换美容师），
+        否则选择当天占用时间最少的资源，使工作量均衡。
+        没有可用资源时抛出 NoResourceAvailable。
+        """
+        free = self.free_resources(service_id, start_time, end_time)
+        if not free:
+            raise NoResourceAvailable
+        if preferred in free:
+            resource_id = preferred
+        else:
+            resource_id = min(
+                free,
+                key=lambda rid: self.timelines[rid].busy_seconds
+            )
+        self.timelines[resource_id].add(
+            time_to_seconds(start_time),
+            time_to_seconds(end_time)
+        )
+        return resource_id
+
+
+def load_resource_skills():
+    """查询启用中的资源及其服务技能，返回 {resource_id: {service_id, ...}}"""
+    skills = {}
+    for resource_id, service_id in Resource.objects.filter(
+        is_active=True
+    ).values_list('id', 'services'):
+        services = skills.setdefault(resource_id, set())
+        if service_id is not None:
+            services.add(service_id)
+    return skills
+
+
+def load_busy_rows(date_filter, exclude_id=None):
+    """
+    查询占用时间的有效预约和未过期的保留，按日期分组
+
+    date_filter 为日期条件，例如 {'date__in': dates}；
+    返回 {date: [(resource_id, start_time, end_time), ...]}。
+    """
+    appointments = Appointment.objects.filter(
+        status__in=AppointmentStatus.ACTIVE,
+        **date_filter
+    )
+    if exclude_id is not None:
+        appointments = appointments.exclude(id=exclude_id)
+    holds = SlotHold.objects.filter(
+        expires_at__gt=timezone.now(),
+        **date_filter
+    )
+
+    busy_by_date = defaultdict(list)
+    for queryset in (appointments, holds):
+        for day, resource_id, start_time, end_time in queryset.values_list(
+            'date', 'resource_id', 'start_time', 'end_time'
+        ):
+            busy_by_date[day].append((resource_id, start_time, end_time))
+    return busy_by_date
+
+
+def load_resource_pools(dates, exclude_id=None):
+    """
+    构建指定日期的资源占用情况，返回 {date: ResourcePool}
+
+    资源、预约和保留各查询一次；exclude_id 用于修改预约时排除预约本身。
+    """
+    dates = set(dates)
+    skills = load_resource_skills()
+    busy_by_date = load_busy_rows({'date__in': dates}, exclude_id=exclude_id)
+    return {
+        day: ResourcePool(skills, busy_by_date[day]) for day in dates
+    }
+
+
+def filter_available_slots(slots, timeline):
+    """从候选时间段中过滤出不与已占用时间重叠的时间段"""
+    return [
+        slot for slot in slots
+        if timeline.is_free_time(slot['start_time'], slot['end_time'])
+    ]
+
+
+def get_available_slots_by_date(start_date, end_date, service):
+    """
+    获取日期范围内每天可以预约该服务的时间段
+
+    营业时间和假期来自进程内缓存的日程，资源、预约和保留各只做一次查询，
+    在内存中按天、按资源分组；某个时间段至少有一个有该服务技能的资源空闲即可预约。
+    返回 {date: [slot, ...]}，不营业的日期对应空列表。
+    """
+    schedule = get_schedule()
+    skills = load_resource_skills()
+    busy_by_date = load_busy_rows({'date__range': (start_date, end_date)})
+
+    result = {}
+    day = start_date
+    while day <= end_date:
+        hours = schedule.get_open_hours(day)
+        if hours is None:
+            result[day] = []
+        else:
+            pool = ResourcePool(skills, busy_by_date.get(day, ()))
+            result[day] = [
+                slot for slot in generate_time_slots(day, hours, service.duration)
+                if pool.is_available(service.id, slot['start_time'], slot['end_time'])
+            ]
+        day += timedelta(days=1)
+    return result
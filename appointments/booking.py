@@ -0,0 +1,176 @@
+# appointments/booking.py
+
+import random
+import time
+from django.db import transaction, IntegrityError, OperationalError
+from django.dispatch import Signal
+from django.utils import timezone
+from .models import Appointment, BookingDayLock, SlotHold, WaitlistEntry
+from .utils import AppointmentStatus, WaitlistStatus
+from .availability import NoResourceAvailable, load_resource_pools
+from .versions import appointment_dates_changed
+
+# 数据库繁忙（锁等待超时）时的最大尝试次数
+MAX_BOOKING_ATTEMPTS = 3
+# 重试前的基础等待时间（秒），每次重试翻倍并加随机抖动
+BOOKING_RETRY_DELAY = 0.05
+
+# bulk_create 写入新预约后发送一次，代替逐条的 post_save：
+# appointments_created.send(sender=Appointment, appointments=[Appointment, ...])
+# 与 post_save 一样在事务内发送
+appointments_created = Signal()
+
+
+class BookingConflict(Exception):
+    """预约时间冲突，或在限定次数内无法完成预约"""
+
+    def __init__(self, message, conflicts=None):
+        super().__init__(message)
+        # 批量预约时发生冲突的条目下标
+        self.conflicts = conflicts or []
+
+
+def lock_booking_dates(dates):
+    """
+    锁定指定日期，必须在事务内调用
+
+    先补齐缺失的日期锁行，再用一条 UPDATE 锁定全部日期：PostgreSQL 等数据库
+    持有行锁直到事务结束，SQLite 则获得数据库写锁。无论日期多少都只需两条语句，
+    死锁等数据库错误由 run_locked 重试。
+    """
+    now = timezone.now()
+    dates = sorted(set(dates))
+    BookingDayLock.objects.bulk_create(
+        [BookingDayLock(date=day, locked_at=now) for day in dates],
+        ignore_conflicts=True
+    )
+    BookingDayLock.objects.filter(date__in=dates).update(locked_at=now)
+
+
+def run_locked(dates, func):
+    """
+    在锁定指定日期的事务中执行 func
+
+    数据库繁忙时有限次重试；唯一约束冲突说明时间段已被占用，转换为 BookingConflict。
+    """
+    for attempt in range(MAX_BOOKING_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                lock_booking_dates(dates)
+                return func()
+        except IntegrityError:
+            raise BookingConflict("该时间段已被预约")
+        except OperationalError:
+            if attempt == MAX_BOOKING_ATTEMPTS - 1:
+                raise BookingConflict("预约繁忙，请稍后重试")
+            time.sleep(
+                BOOKING_RETRY_DELAY * (2 ** attempt) * (1 + random.random())
+            )
+
+
+def consume_hold(hold):
+    """
+    在事务内删除仍然有效的保留，返回是否删除成功
+
+    删除带有过期时间条件，与回收过期保留的操作之间只有一方能成功。
+    """
+    deleted, _ = SlotHold.objects.filter(
+        id=hold.id,
+        expires_at__gt=timezone.now()
+    ).delete()
+    return bool(deleted)
+
+
+def book_appointment(appointment, hold=None):
+    """
+    保存新预约或修改后的预约
+
+    资源分配和写入在同一个锁定当天的事务中完成，
+    并发请求不会把同一资源预约到重叠的时间段。
+    传入 hold 时在同一事务中消费该保留，并优先使用保留的资源；
+    保留已过期时按普通预约处理，时间段仍然空闲即可预约成功。
+    保留属于候补登记时（客户直接预约了为其候补保留的时间段），登记同时改为已预约。
+    """
+    def save():
+        entry_id = None
+        if hold is not None:
+            # 保留删除后登记的 hold 会被置空，需要先取得对应的候补登记
+            entry_id = WaitlistEntry.objects.filter(
+                hold_id=hold.id
+            ).values_list('id', flat=True).first()
+            if consume_hold(hold):
+                appointment.resource_id = hold.resource_id
+            else:
+                entry_id = None
+        if appointment.status in AppointmentStatus.ACTIVE:
+            pool = load_resource_pools(
+                [appointment.date],
+                exclude_id=None if appointment._state.adding else appointment.id
+            )[appointment.date]
+            try:
+                appointment.resource_id = pool.allocate(
+                    appointment.service_id,
+                    appointment.start_time,
+                    appointment.end_time,
+                    preferred=appointment.resource_id
+                )
+            except NoResourceAvailable:
+                raise BookingConflict("该时间段已被预约")
+        appointment.save()
+        if entry_id is not None:
+            WaitlistEntry.objects.filter(
+                id=entry_id,
+                status=WaitlistStatus.OFFERED
+            ).update(
+                status=WaitlistStatus.BOOKED,
+                appointment=appointment,
+                updated_at=timezone.now()
+            )
+        return appointment
+
+    return run_locked([appointment.date], save)
+
+
+def allocate_resources(appointments):
+    """
+    依次为每个预约分配资源，返回无法分配的条目下标列表
+
+    涉及的所有日期只查询一次，应在 lock_booking_dates 之后调用。
+    已分配的条目计入占用，同一批次内的预约不会分到重叠的资源。
+    """
+    pools = load_resource_pools(
+        appointment.date for appointment in appointments
+    )
+    conflicts = []
+    for index, appointment in enumerate(appointments):
+        try:
+            appointment.resource_id = pools[appointment.date].allocate(
+                appointment.service_id,
+                appointment.start_time,
+                appointment.end_time
+            )
+        except NoResourceAvailable:
+            conflicts.append(index)
+    return conflicts
+
+
+def book_appointments(appointments):
+    """
+    批量保存新预约（全部成功或全部失败）
+
+    锁定涉及的所有日期后一次性分配资源，再用一次 bulk_create 写入。
+    """
+    def save():
+        conflicts = allocate_resources(appointments)
+        if conflicts:
+            raise BookingConflict("部分时间段已被预约", conflicts=conflicts)
+        created = Appointment.objects.bulk_create(appointments)
+        # bulk_create 不会触发 post_save，需要手动更新日期版本号
+        appointment_dates_changed(appointment.date for appointment in created)
+        appointments_created.send(sender=Appointment, appointments=created)
+        return created
+
+    return run_locked(
+        [appointment.date for appointment in appointments],
+        save
+    )
@@ -0,0 +1,77 @@
+# appointments/holds.py
+
+from datetime import timedelta
+from django.utils import timezone
+from .models import SlotHold
+from .availability import NoResourceAvailable, load_resource_pools
+from .booking import BookingConflict, run_locked
+from .versions import appointment_dates_changed, hold_expiry_recorded
+
+# 结账保留的默认分钟数和最长分钟数
+HOLD_DEFAULT_MINUTES = 10
+HOLD_MAX_MINUTES = 30
+
+
+def create_hold(customer_id, service_id, resource_id, day, start_time,
+                end_time, expires_at):
+    """写入保留并使当天的可用时间段缓存失效，必须在锁定当天的事务中调用"""
+    hold = SlotHold.objects.create(
+        customer_id=customer_id,
+        service_id=service_id,
+        resource_id=resource_id,
+        date=day,
+        start_time=start_time,
+        end_time=end_time,
+        expires_at=expires_at
+    )
+    appointment_dates_changed([day])
+    hold_expiry_recorded(day, expires_at)
+    return hold
+
+
+def place_hold(customer, service, day, start_time, end_time,
+               minutes=HOLD_DEFAULT_MINUTES):
+    """
+    为客户保留时间段，时间段已被占用时抛出 BookingConflict
+
+    过期的保留在查询时已被忽略，由 purge_expired_holds 定期删除。
+    同一客户同时只保留一个结账时间段，新的保留替换之前的保留。
+    """
+    def hold():
+        now = timezone.now()
+        previous = list(SlotHold.objects.filter(
+            customer=customer,
+            waitlist_entry__isnull=True,
+            expires_at__gt=now
+        ).values_list('id', 'date'))
+        if previous:
+            SlotHold.objects.filter(
+                id__in=[hold_id for hold_id, _ in previous]
+            ).delete()
+            appointment_dates_changed(previous_day for _, previous_day in previous)
+
+        pool = load_resource_pools([day])[day]
+        try:
+            resource_id = pool.allocate(service.id, start_time, end_time)
+        except NoResourceAvailable:
+            raise BookingConflict("该时间段已被预约")
+        return create_hold(
+            customer.id, service.id, resource_id, day, start_time, end_time,
+            now + timedelta(minutes=minutes)
+        )
+
+    return run_locked([day], hold)
+
+
+def purge_expired_holds():
+    """
+    删除全部已过期的结账保留，返回删除的数量
+
+    过期的保留在查询可用时间段时已被忽略，删除只是为了不让保留表持续增长，
+    通过 expires_at 索引只读取已过期的行。候补保留过期后需要顺延，由候补任务回收。
+    """
+    deleted, _ = SlotHold.objects.filter(
+        expires_at__lte=timezone.now(),
+        waitlist_entry__isnull=True
+    ).delete()
+    return deleted
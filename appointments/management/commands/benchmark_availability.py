@@ -0,0 +1,98 @@
+# appointments/management/commands/benchmark_availability.py
+
+import random
+import timeit
+from datetime import date, datetime, time, timedelta
+from django.core.management.base import BaseCommand
+from appointments.availability import BusyTimeline, filter_available_slots
+
+
+def _legacy_filter(day, slots, appointments):
+    """原 available_slots 中的逐一比较实现，作为基准"""
+    filtered_slots = []
+    for slot in slots:
+        is_available = True
+        slot_start = datetime.combine(day, slot['start_time'])
+        slot_end = datetime.combine(day, slot['end_time'])
+        for start_time, end_time in appointments:
+            appt_start = datetime.combine(day, start_time)
+            appt_end = datetime.combine(day, end_time)
+            if not (slot_end <= appt_start or slot_start >= appt_end):
+                is_available = False
+                break
+        if is_available:
+            filtered_slots.append(slot)
+    return filtered_slots
+
+
+def _build_slots(day, duration):
+    """按 5 分钟步长生成 08:00-22:00 的候选时间段"""
+    slots = []
+    current = datetime.combine(day, time(8, 0))
+    end = datetime.combine(day, time(22, 0))
+    while current + timedelta(minutes=duration) <= end:
+        slots.append({
+            'start_time': current.time(),
+            'end_time': (current + timedelta(minutes=duration)).time()
+        })
+        current += timedelta(minutes=5)
+    return slots
+
+
+def _build_appointments(day, count, rng):
+    """生成随机分布在营业时间内的预约时间"""
+    appointments = []
+    for _ in range(count):
+        start = datetime.combine(day, time(8, 0)) + timedelta(
+            minutes=rng.randrange(0, 14 * 60 - 30, 5)
+        )
+        end = start + timedelta(minutes=rng.choice([15, 30, 60]))
+        appointments.append((start.time(), end.time()))
+    return appointments
+
+
+class Command(BaseCommand):
+    help = '对比可用时间段计算的区间算法与原逐一比较实现的耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10, 100, 1000],
+            help='每天的预约数量'
+        )
+        parser.add_argument('--duration', type=int, default=30,
+                            help='服务时长（分钟）')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='每组测量的重复次数')
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        day = date.today()
+        slots = _build_slots(day, options['duration'])
+
+        for size in options['sizes']:
+            appointments = _build_appointments(day, size, rng)
+
+            def run_legacy():
+                return _legacy_filter(day, slots, appointments)
+
+            def run_timeline():
+                busy = BusyTimeline.from_times(appointments)
+                return filter_available_slots(slots, busy)
+
+            if run_legacy() != run_timeline():
+                self.stderr.write(f'{size} 个预约时两种实现结果不一致')
+                continue
+
+            legacy = min(timeit.repeat(run_legacy, number=1,
+                                       repeat=options['repeat']))
+            timeline = min(timeit.repeat(run_timeline, number=1,
+                                         repeat=options['repeat']))
+            self.stdout.write(
+                f'{size:>6} 个预约 / {len(slots)} 个时间段: '
+                f'原实现 {legacy * 1000:.2f}ms, '
+                f'区间算法 {timeline * 1000:.2f}ms, '
+                f'提升 {legacy / timeline:.1f}x'
+            )
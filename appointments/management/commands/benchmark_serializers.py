@@ -0,0 +1,156 @@
+# appointments/management/commands/benchmark_serializers.py
+
+import random
+import timeit
+from datetime import time, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from appointments.models import Appointment, AppointmentNote
+from appointments.serializers import (
+    AppointmentListRepresentation,
+    AppointmentSerializer,
+)
+from appointments.utils import AppointmentStatus
+from pets.models import Pet
+from pets.serializers import PetListRepresentation, PetSerializer
+from services.models import DogSize, Service, ServicePrice
+from services.serializers import ServiceListRepresentation, ServiceSerializer
+
+
+class _Rollback(Exception):
+    """基准数据只在事务内使用，结束后回滚"""
+
+
+def _build_data(rows, rng):
+    """生成 rows 个宠物、服务和预约，部分预约带有备注"""
+    User = get_user_model()
+    owner = User.objects.create_user(
+        'benchmark@example.com', 'benchmark', username='benchmark'
+    )
+    staff = User.objects.create_user(
+        'benchmark-staff@example.com', 'benchmark',
+        username='benchmark-staff', is_staff=True
+    )
+    today = timezone.localdate()
+
+    pets = Pet.objects.bulk_create([
+        Pet(
+            owner=owner,
+            name=f'宠物{index}',
+            breed='柯基',
+            weight=Decimal(rng.randrange(100, 3000)) / 100,
+            birthday=today - timedelta(days=rng.randrange(30, 3000)),
+            gender=rng.choice(['M', 'F']),
+            photo=f'pets/{index}.jpg' if index % 2 else '',
+        )
+        for index in range(rows)
+    ])
+    services = Service.objects.bulk_create([
+        Service(
+            name=f'服务{index}',
+            description='基准测试',
+            duration=rng.choice([30, 60, 90]),
+            image=f'services/{index}.jpg' if index % 2 else None,
+        )
+        for index in range(rows)
+    ])
+    ServicePrice.objects.bulk_create([
+        ServicePrice(service=service, dog_size=size, price=Decimal(price))
+        for service in services
+        for size, price in zip(DogSize.values, (100, 150, 200))
+    ])
+    appointments = Appointment.objects.bulk_create([
+        Appointment(
+            customer=owner,
+            pet=pets[index],
+            service=services[index],
+            date=today + timedelta(days=index // 8),
+            start_time=time(9 + index % 8),
+            end_time=time(10 + index % 8),
+            status=rng.choice(AppointmentStatus.ACTIVE),
+            total_price=Decimal('150.00'),
+            dog_size=pets[index].size,
+        )
+        for index in range(rows)
+    ])
+    AppointmentNote.objects.bulk_create([
+        AppointmentNote(appointment=appointment, staff=staff, note='已联系')
+        for appointment in appointments[::3]
+    ])
+    return owner
+
+
+class Command(BaseCommand):
+    help = '对比列表序列化器与 values() 快速表示每 1000 行的耗时，并检查输出一致'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000,
+                            help='每种列表生成的行数')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='每组测量的重复次数')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['repeat'])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, rows, repeat):
+        owner = _build_data(rows, random.Random(42))
+        renderer = JSONRenderer()
+        cases = [
+            (
+                '预约',
+                Appointment.objects.filter(customer=owner).select_related(
+                    'pet', 'service', 'resource'
+                ).prefetch_related(Prefetch(
+                    'staff_notes',
+                    queryset=AppointmentNote.objects.select_related('staff')
+                )).order_by('-date', '-start_time', 'id'),
+                AppointmentSerializer,
+                AppointmentListRepresentation,
+            ),
+            (
+                '宠物',
+                Pet.objects.filter(owner=owner).order_by('-created_at', 'id'),
+                PetSerializer,
+                PetListRepresentation,
+            ),
+            (
+                '服务',
+                Service.objects.filter(description='基准测试'),
+                ServiceSerializer,
+                ServiceListRepresentation,
+            ),
+        ]
+
+        for name, queryset, serializer_class, representation_class in cases:
+            def run_serializer():
+                return serializer_class(queryset.all(), many=True).data
+
+            def run_representation():
+                representation = representation_class()
+                return representation.represent(
+                    queryset.prefetch_related(None).values(
+                        *representation.fields
+                    )
+                )
+
+            if renderer.render(run_serializer()) != renderer.render(run_representation()):
+                raise CommandError(f'{name}列表两种实现的输出不一致')
+
+            serializer = min(timeit.repeat(run_serializer, number=1, repeat=repeat))
+            fast = min(timeit.repeat(run_representation, number=1, repeat=repeat))
+            self.stdout.write(
+                f'{name}列表 {rows} 行: '
+                f'序列化器 {serializer * 1000_000 / rows:.2f}ms/1000行, '
+                f'快速表示 {fast * 1000_000 / rows:.2f}ms/1000行, '
+                f'提升 {serializer / fast:.1f}x'
+            )
@@ -0,0 +1,48 @@
+# appointments/management/commands/materialize_series.py
+
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+from appointments.booking import BookingConflict
+from appointments.models import AppointmentSeries
+from appointments.recurrence import materialize_series, SERIES_HORIZON_DAYS
+
+
+class Command(BaseCommand):
+    help = '为周期预约向后生成滚动窗口内的具体预约（建议每天运行一次）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--horizon-days',
+            type=int,
+            default=SERIES_HORIZON_DAYS,
+            help='提前生成的天数'
+        )
+
+    def handle(self, *args, **options):
+        horizon_end = timezone.localdate() + timedelta(
+            days=options['horizon_days']
+        )
+        pending = AppointmentSeries.objects.filter(
+            Q(materialized_until__isnull=True) |
+            Q(materialized_until__lt=horizon_end),
+            is_active=True
+        ).select_related('pet', 'service')
+
+        total_created = 0
+        for series in pending.iterator():
+            try:
+                created, conflicts = materialize_series(series, horizon_end)
+            except BookingConflict as exc:
+                self.stderr.write(f'{series.id}: {exc}')
+                continue
+            total_created += len(created)
+            for conflict in conflicts:
+                self.stdout.write(
+                    f"{series.id} {conflict['date']}: {conflict['reason']}"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'已生成至 {horizon_end}，新增 {total_created} 个预约'
+        ))
@@ -0,0 +1,15 @@
+# appointments/management/commands/process_waitlist.py
+
+from django.core.management.base import BaseCommand
+from appointments.waitlist import backfill_freed_slots, expire_offers
+
+
+class Command(BaseCommand):
+    help = '回收过期的候补保留，为空出的时间段匹配候补（建议每分钟运行一次）'
+
+    def handle(self, *args, **options):
+        expired = expire_offers()
+        freed = backfill_freed_slots()
+        self.stdout.write(self.style.SUCCESS(
+            f'回收 {expired} 个过期的候补保留，为 {freed} 个空出的时间段匹配候补'
+        ))
@@ -0,0 +1,40 @@
+# appointments/management/commands/sweep_appointments.py
+
+from django.core.management.base import BaseCommand
+from appointments.holds import purge_expired_holds
+from appointments.sweep import SWEEP_CHUNK_SIZE, sweep_past_appointments
+
+
+class Command(BaseCommand):
+    help = '将过去仍然有效的预约标记为已完成或未到店，并删除过期的结账保留（建议每天凌晨运行一次，可重复运行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=SWEEP_CHUNK_SIZE,
+            help='每个事务处理的预约数'
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='每块之间暂停的秒数'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='忽略上次的进度，从头扫描'
+        )
+
+    def handle(self, *args, **options):
+        counts = sweep_past_appointments(
+            chunk_size=options['chunk_size'],
+            pause=options['pause'],
+            reset=options['reset']
+        )
+        purged = purge_expired_holds()
+        self.stdout.write(self.style.SUCCESS(
+            f"已完成 {counts['complete']} 个，未到店 {counts['no_show']} 个，"
+            f"删除过期保留 {purged} 个"
+        ))
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_appointment_appointment_date_status_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDayLock',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False, verbose_name='日期')),
+                ('locked_at', models.DateTimeField(verbose_name='锁定时间')),
+            ],
+            options={
+                'verbose_name': '预约日期锁',
+                'verbose_name_plural': '预约日期锁',
+            },
+        ),
+    ]
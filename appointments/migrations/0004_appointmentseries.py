@@ -0,0 +1,53 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:18
+
+import django.core.validators
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0003_bookingdaylock'),
+        ('pets', '0001_initial'),
+        ('services', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AppointmentSeries',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('start_date', models.DateField(verbose_name='首次日期')),
+                ('start_time', models.TimeField(verbose_name='开始时间')),
+                ('interval_days', models.PositiveIntegerField(default=28, validators=[django.core.validators.MinValueValidator(1)], verbose_name='间隔天数')),
+                ('count', models.PositiveIntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1)], verbose_name='重复次数')),
+                ('until', models.DateField(blank=True, null=True, verbose_name='截止日期')),
+                ('notes', models.TextField(blank=True, verbose_name='备注')),
+                ('is_active', models.BooleanField(default=True, verbose_name='是否有效')),
+                ('materialized_until', models.DateField(blank=True, help_text='该日期及之前的预约记录已经生成', null=True, verbose_name='已生成至')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to=settings.AUTH_USER_MODEL, verbose_name='客户')),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='appointment_series', to='pets.pet', verbose_name='宠物')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='appointment_series', to='services.service', verbose_name='服务项目')),
+            ],
+            options={
+                'verbose_name': '周期预约',
+                'verbose_name_plural': '周期预约',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='series',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='appointments', to='appointments.appointmentseries', verbose_name='周期预约'),
+        ),
+        migrations.AddIndex(
+            model_name='appointmentseries',
+            index=models.Index(fields=['is_active', 'materialized_until'], name='series_active_progress_idx'),
+        ),
+    ]
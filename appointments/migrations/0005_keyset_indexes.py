@@ -0,0 +1,21 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0004_appointmentseries'),
+        ('pets', '0002_keyset_indexes'),
+        ('services', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['-date', '-start_time', 'id'], name='appointment_keyset_idx'),
+        ),
+    ]
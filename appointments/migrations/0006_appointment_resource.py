@@ -0,0 +1,36 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0005_keyset_indexes'),
+        ('pets', '0002_keyset_indexes'),
+        ('resources', '0001_initial'),
+        ('services', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='appointment',
+            name='unique_appointment_time',
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='resource',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='appointments', to='resources.resource', verbose_name='服务资源'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'cancelled'), _negated=True), fields=('resource', 'date', 'start_time', 'end_time'), name='unique_resource_appointment_time'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('resource__isnull', True), models.Q(('status', 'cancelled'), _negated=True)), fields=('date', 'start_time', 'end_time'), name='unique_unassigned_appointment_time'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:29
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0006_appointment_resource'),
+        ('pets', '0002_keyset_indexes'),
+        ('resources', '0001_initial'),
+        ('services', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotHold',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField(verbose_name='日期')),
+                ('start_time', models.TimeField(verbose_name='开始时间')),
+                ('end_time', models.TimeField(verbose_name='结束时间')),
+                ('expires_at', models.DateTimeField(verbose_name='过期时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to=settings.AUTH_USER_MODEL, verbose_name='客户')),
+                ('resource', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to='resources.resource', verbose_name='服务资源')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slot_holds', to='services.service', verbose_name='服务项目')),
+            ],
+            options={
+                'verbose_name': '时间段保留',
+                'verbose_name_plural': '时间段保留',
+                'ordering': ['expires_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('date_from', models.DateField(verbose_name='最早日期')),
+                ('date_to', models.DateField(verbose_name='最晚日期')),
+                ('earliest_start', models.TimeField(blank=True, null=True, verbose_name='最早开始时间')),
+                ('latest_start', models.TimeField(blank=True, null=True, verbose_name='最晚开始时间')),
+                ('duration', models.PositiveIntegerField(verbose_name='服务时长(分钟)')),
+                ('status', models.CharField(choices=[('waiting', '等待中'), ('offered', '待确认'), ('booked', '已预约'), ('expired', '已过期'), ('cancelled', '已取消')], default='waiting', max_length=10, verbose_name='状态')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('appointment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entries', to='appointments.appointment', verbose_name='预约')),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL, verbose_name='客户')),
+                ('hold', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='appointments.slothold', verbose_name='保留的时间段')),
+                ('pet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='pets.pet', verbose_name='宠物')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to='services.service', verbose_name='服务项目')),
+            ],
+            options={
+                'verbose_name': '候补登记',
+                'verbose_name_plural': '候补登记',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='slothold',
+            index=models.Index(fields=['date', 'expires_at'], name='slothold_date_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='slothold',
+            index=models.Index(fields=['expires_at'], name='slothold_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='waitlistentry',
+            index=models.Index(fields=['status', 'date_from', 'date_to', 'duration'], name='waitlist_match_idx'),
+        ),
+    ]
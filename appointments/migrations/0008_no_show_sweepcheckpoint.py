@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0007_slothold_waitlistentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SweepCheckpoint',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='任务名称')),
+                ('position', models.JSONField(blank=True, null=True, verbose_name='处理位置')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '任务进度',
+                'verbose_name_plural': '任务进度',
+            },
+        ),
+        migrations.AlterField(
+            model_name='appointment',
+            name='status',
+            field=models.CharField(choices=[('pending', '待确认'), ('confirmed', '已确认'), ('completed', '已完成'), ('cancelled', '已取消'), ('no_show', '未到店')], default='pending', max_length=10, verbose_name='状态'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:49
+
+from django.db import migrations, models
+
+
+def backfill_dog_size(apps, schema_editor):
+    """已有预约按宠物当前体重推算体型"""
+    Appointment = apps.get_model('appointments', 'Appointment')
+    for size, condition in (
+        ('S', models.Q(pet__weight__lte=8)),
+        ('M', models.Q(pet__weight__gt=8, pet__weight__lte=15)),
+        ('L', models.Q(pet__weight__gt=15)),
+    ):
+        Appointment.objects.filter(condition, dog_size='').update(dog_size=size)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_no_show_sweepcheckpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='dog_size',
+            field=models.CharField(blank=True, choices=[('S', '小型犬 (8kg以下)'), ('M', '中型犬 (8-15kg)'), ('L', '大型犬 (16-25kg)')], max_length=1, verbose_name='体型'),
+        ),
+        migrations.RunPython(backfill_dog_size, migrations.RunPython.noop),
+    ]
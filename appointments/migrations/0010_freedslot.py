@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0009_appointment_dog_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FreedSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('start_time', models.TimeField(verbose_name='开始时间')),
+                ('end_time', models.TimeField(verbose_name='结束时间')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+            ],
+            options={
+                'verbose_name': '空出的时间段',
+                'verbose_name_plural': '空出的时间段',
+                'ordering': ['id'],
+            },
+        ),
+    ]
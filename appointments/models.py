@@ -5,11 +5,111 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from services.models import Service
+from django.core.validators import MinValueValidator
+from services.models import DogSize, Service
 from pets.models import Pet
-from .utils import AppointmentStatus, is_valid_appointment_time
+from resources.models import Resource
+from .utils import AppointmentStatus, WaitlistStatus, is_valid_appointment_time
+from datetime import timedelta
 import uuid
 
+class AppointmentSeries(models.Model):
+    """
+    周期预约模型
+    
+    按固定间隔重复的预约规则，以次数或截止日期结束，两者都不设置表示长期有效。
+    具体的预约记录只提前生成到滚动窗口内，由定时任务逐步向后生成。
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='appointment_series',
+        verbose_name=_('客户')
+    )
+    pet = models.ForeignKey(
+        Pet,
+        on_delete=models.CASCADE,
+        related_name='appointment_series',
+        verbose_name=_('宠物')
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.PROTECT,
+        related_name='appointment_series',
+        verbose_name=_('服务项目')
+    )
+    start_date = models.DateField(_('首次日期'))
+    start_time = models.TimeField(_('开始时间'))
+    interval_days = models.PositiveIntegerField(
+        _('间隔天数'),
+        default=28,
+        validators=[MinValueValidator(1)]
+    )
+    count = models.PositiveIntegerField(
+        _('重复次数'),
+        null=True,
+        blank=True,
+        validators=[MinValueValidator(1)]
+    )
+    until = models.DateField(_('截止日期'), null=True, blank=True)
+    notes = models.TextField(_('备注'), blank=True)
+    is_active = models.BooleanField(_('是否有效'), default=True)
+    materialized_until = models.DateField(
+        _('已生成至'),
+        null=True,
+        blank=True,
+        help_text=_('该日期及之前的预约记录已经生成')
+    )
+    
+    created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('周期预约')
+        verbose_name_plural = _('周期预约')
+        ordering = ['-created_at']
+        indexes = [
+            # 滚动生成任务：查找生成进度落后的有效周期预约
+            models.Index(
+                fields=['is_active', 'materialized_until'],
+                name='series_active_progress_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.customer.username} - {self.pet.name} - {self.service.name} (每{self.interval_days}天)"
+
+    def clean(self):
+        if self.until and self.until < self.start_date:
+            raise ValidationError(_('截止日期不能早于首次日期'))
+
+    def occurrence_dates(self, start, end):
+        """生成 [start, end] 范围内符合规则的日期"""
+        if self.until:
+            end = min(end, self.until)
+        index = max(0, -(-(start - self.start_date).days // self.interval_days))
+        while self.count is None or index < self.count:
+            day = self.start_date + timedelta(days=index * self.interval_days)
+            if day > end:
+                break
+            yield day
+            index += 1
+
+    @property
+    def last_date(self):
+        """规则的最后一次日期，长期有效时返回 None"""
+        if self.count is not None:
+            last = self.start_date + timedelta(
+                days=(self.count - 1) * self.interval_days
+            )
+            return min(last, self.until) if self.until else last
+        return self.until
+
 class Appointment(models.Model):
     """预约模型"""
     id = models.UUIDField(
@@ -49,7 +149,30 @@ class Appointment(models.Model):
         max_digits=10,
         decimal_places=2
     )
+    # 预约时宠物的体型，价格按此计算；之后宠物体重变化不影响已有预约的统计
+    dog_size = models.CharField(
+        _('体型'),
+        max_length=1,
+        choices=DogSize.choices,
+        blank=True
+    )
     notes = models.TextField(_('备注'), blank=True)
+    series = models.ForeignKey(
+        AppointmentSeries,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='appointments',
+        verbose_name=_('周期预约')
+    )
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name='appointments',
+        verbose_name=_('服务资源')
+    )
     
     created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
     updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
@@ -59,16 +182,69 @@ class Appointment(models.Model):
         verbose_name_plural = _('预约')
         ordering = ['-date', '-start_time']
         constraints = [
+            # 同一资源同一时间段只能有一个预约
             models.UniqueConstraint(
-                fields=['date', 'start_time', 'end_time'],
+                fields=['resource', 'date', 'start_time', 'end_time'],
                 condition=~models.Q(status=AppointmentStatus.CANCELLED),
-                name='unique_appointment_time'
-            )
+                name='unique_resource_appointment_time'
+            ),
+            # 未启用资源时 resource 为空，上面的约束不生效（NULL 互不相等）；
+            # 同一时间段只能有一个未分配资源的预约，部分重叠由预约时的日期锁保证
+            models.UniqueConstraint(
+                fields=['date', 'start_time', 'end_time'],
+                condition=(
+                    models.Q(resource__isnull=True) &
+                    ~models.Q(status=AppointmentStatus.CANCELLED)
+                ),
+                name='unique_unassigned_appointment_time'
+            ),
+        ]
+        indexes = [
+            # 可用时间段：按日期和状态筛选当天的有效预约
+            models.Index(
+                fields=['date', 'status'],
+                name='appointment_date_status_idx'
+            ),
+            # 客户预约列表：按客户、日期、状态筛选
+            models.Index(
+                fields=['customer', 'date', 'status'],
+                name='appointment_customer_date_idx'
+            ),
+            # 预约列表游标分页的排序
+            models.Index(
+                fields=['-date', '-start_time', 'id'],
+                name='appointment_keyset_idx'
+            ),
+            # 仪表盘：按创建时间范围统计
+            models.Index(
+                fields=['created_at', 'status'],
+                name='appointment_created_idx'
+            ),
         ]
 
     def __str__(self):
         return f"{self.customer.username} - {self.pet.name} - {self.service.name}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # 记录从数据库加载时的字段值，保存后的信号据此判断日期、状态是否变化
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save 信号处理完成后，以当前值作为新的加载值
+        self._loaded_values = {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def get_loaded_value(self, field_name):
+        """获取从数据库加载时的字段值，新建或未加载该字段时返回 None"""
+        return getattr(self, '_loaded_values', {}).get(field_name)
+
     def clean(self):
         if self.status != AppointmentStatus.CANCELLED:
             is_valid, message = is_valid_appointment_time(
@@ -79,6 +255,200 @@ class Appointment(models.Model):
             if not is_valid:
                 raise ValidationError(message)
 
+class BookingDayLock(models.Model):
+    """
+    预约日期锁
+    
+    每个日期一行。写入或修改某天的预约前先更新该行，
+    使同一天的预约请求在事务内串行执行，不同日期之间互不影响。
+    """
+    date = models.DateField(_('日期'), primary_key=True)
+    locked_at = models.DateTimeField(_('锁定时间'))
+
+    class Meta:
+        verbose_name = _('预约日期锁')
+        verbose_name_plural = _('预约日期锁')
+
+    def __str__(self):
+        return str(self.date)
+
+class SweepCheckpoint(models.Model):
+    """
+    定时任务的进度记录
+    
+    任务按排序键分块处理，每块完成后记录最后处理的位置，
+    中断后再次运行时从该位置继续。
+    """
+    name = models.CharField(_('任务名称'), max_length=50, primary_key=True)
+    position = models.JSONField(_('处理位置'), null=True, blank=True)
+    updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('任务进度')
+        verbose_name_plural = _('任务进度')
+
+    def __str__(self):
+        return self.name
+
+class SlotHold(models.Model):
+    """
+    时间段保留
+    
+    保留期间该时间段对其他客户不可预约，过期后自动失效；
+    被保留的客户预约时在同一事务中消费保留。
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='slot_holds',
+        verbose_name=_('客户')
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name='slot_holds',
+        verbose_name=_('服务项目')
+    )
+    resource = models.ForeignKey(
+        Resource,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='slot_holds',
+        verbose_name=_('服务资源')
+    )
+    date = models.DateField(_('日期'))
+    start_time = models.TimeField(_('开始时间'))
+    end_time = models.TimeField(_('结束时间'))
+    expires_at = models.DateTimeField(_('过期时间'))
+    created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('时间段保留')
+        verbose_name_plural = _('时间段保留')
+        ordering = ['expires_at']
+        indexes = [
+            # 可用时间段：查询某天仍然有效的保留
+            models.Index(
+                fields=['date', 'expires_at'],
+                name='slothold_date_expiry_idx'
+            ),
+            # 回收过期保留
+            models.Index(
+                fields=['expires_at'],
+                name='slothold_expiry_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.start_time}-{self.end_time}"
+
+    @property
+    def is_live(self):
+        return self.expires_at > timezone.now()
+
+class WaitlistEntry(models.Model):
+    """
+    候补登记
+    
+    客户登记希望预约的日期范围和开始时间范围，有时间段空出时
+    按登记顺序为第一个合适的客户保留该时间段。
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    customer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name=_('客户')
+    )
+    pet = models.ForeignKey(
+        Pet,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name=_('宠物')
+    )
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        verbose_name=_('服务项目')
+    )
+    date_from = models.DateField(_('最早日期'))
+    date_to = models.DateField(_('最晚日期'))
+    earliest_start = models.TimeField(_('最早开始时间'), null=True, blank=True)
+    latest_start = models.TimeField(_('最晚开始时间'), null=True, blank=True)
+    # 登记时的服务时长，空出的时间段不够长时无需查看该登记
+    duration = models.PositiveIntegerField(_('服务时长(分钟)'))
+    status = models.CharField(
+        _('状态'),
+        max_length=10,
+        choices=WaitlistStatus.CHOICES,
+        default=WaitlistStatus.WAITING
+    )
+    hold = models.OneToOneField(
+        SlotHold,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entry',
+        verbose_name=_('保留的时间段')
+    )
+    appointment = models.ForeignKey(
+        Appointment,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entries',
+        verbose_name=_('预约')
+    )
+    
+    created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('候补登记')
+        verbose_name_plural = _('候补登记')
+        ordering = ['created_at']
+        indexes = [
+            # 候补匹配：按状态、日期范围和服务时长筛选
+            models.Index(
+                fields=['status', 'date_from', 'date_to', 'duration'],
+                name='waitlist_match_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.customer.username} - {self.pet.name} - {self.service.name}"
+
+class FreedSlot(models.Model):
+    """
+    待匹配候补的空出时间段
+
+    与取消、改期等释放时间段的操作在同一事务中写入，候补匹配完成后删除；
+    后台线程丢失任务时由 process_waitlist 定时补处理。
+    """
+    date = models.DateField(_('日期'))
+    start_time = models.TimeField(_('开始时间'))
+    end_time = models.TimeField(_('结束时间'))
+    created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('空出的时间段')
+        verbose_name_plural = _('空出的时间段')
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.date} {self.start_time}-{self.end_time}"
+
 class AppointmentNote(models.Model):
     """预约备注模型（用于工作人员添加备注）"""
     id = models.UUIDField(
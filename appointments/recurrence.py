@@ -0,0 +1,95 @@
+# appointments/recurrence.py
+
+from datetime import datetime, timedelta
+from django.utils import timezone
+from services.pricing import get_price_matrix
+from .models import Appointment
+from .booking import run_locked, allocate_resources, appointments_created
+from .utils import is_valid_appointment_time
+from .versions import appointment_dates_changed
+
+# 周期预约提前生成具体预约的天数（滚动窗口）
+SERIES_HORIZON_DAYS = 90
+
+
+def materialize_series(series, horizon_end=None):
+    """
+    为周期预约生成滚动窗口内的具体预约
+
+    窗口内的所有日期一次性校验：营业时间和假期来自日程缓存，价格来自价格矩阵，
+    资源和已有预约在锁定日期后各查询一次，最后一次 bulk_create 写入。
+    与规则冲突或时间已被占用的日期跳过，并在返回值中逐条说明原因。
+
+    返回 (created, conflicts)，conflicts 为 [{'date': ..., 'reason': ...}]。
+    """
+    today = timezone.localdate()
+    if horizon_end is None:
+        horizon_end = today + timedelta(days=SERIES_HORIZON_DAYS)
+
+    if series.materialized_until and series.materialized_until >= horizon_end:
+        return [], []
+
+    start = series.start_date
+    if series.materialized_until:
+        start = max(start, series.materialized_until + timedelta(days=1))
+    start = max(start, today)
+    dates = list(series.occurrence_dates(start, horizon_end))
+
+    conflicts = []
+    candidates = []
+    if dates:
+        dog_size = series.pet.size
+        price = get_price_matrix().get_price(series.service_id, dog_size)
+        duration = series.service.duration
+
+        for day in dates:
+            if price is None:
+                conflicts.append({'date': day, 'reason': "该服务未设置对应体型的价格"})
+                continue
+            is_valid, message = is_valid_appointment_time(
+                day, series.start_time, duration
+            )
+            if not is_valid:
+                conflicts.append({'date': day, 'reason': message})
+                continue
+            candidates.append(Appointment(
+                customer_id=series.customer_id,
+                pet=series.pet,
+                service=series.service,
+                series=series,
+                date=day,
+                start_time=series.start_time,
+                end_time=(datetime.combine(day, series.start_time) +
+                          timedelta(minutes=duration)).time(),
+                total_price=price,
+                dog_size=dog_size,
+                notes=series.notes
+            ))
+
+    def save():
+        taken = set(allocate_resources(candidates)) if candidates else set()
+        accepted = [
+            appointment for index, appointment in enumerate(candidates)
+            if index not in taken
+        ]
+        conflicts.extend(
+            {'date': candidates[index].date, 'reason': "该时间段已被预约"}
+            for index in sorted(taken)
+        )
+        created = Appointment.objects.bulk_create(accepted)
+        appointment_dates_changed(appointment.date for appointment in created)
+        appointments_created.send(sender=Appointment, appointments=created)
+
+        series.materialized_until = horizon_end
+        update_fields = ['materialized_until', 'updated_at']
+        last_date = series.last_date
+        if last_date is not None and last_date <= horizon_end:
+            # 所有日期都已生成，滚动任务不再处理该周期预约
+            series.is_active = False
+            update_fields.append('is_active')
+        series.save(update_fields=update_fields)
+        return created
+
+    created = run_locked([appointment.date for appointment in candidates], save)
+    conflicts.sort(key=lambda conflict: conflict['date'])
+    return created, conflicts
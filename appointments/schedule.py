@@ -0,0 +1,87 @@
+# appointments/schedule.py
+
+import threading
+from bisect import bisect_right
+from business_hours.models import BusinessHours
+from holidays.models import Holiday
+from core.versions import get_version, bump_version
+
+SCHEDULE_VERSION = 'schedule'
+
+
+class CompiledSchedule:
+    """
+    编译后的营业日程
+
+    保存 7 天的营业时间和合并排序后的假期区间，
+    判断某天是否营业只需一次字典查找和一次二分查找，不再访问数据库。
+    """
+
+    def __init__(self, business_hours, holidays):
+        self.business_hours = {hours.weekday: hours for hours in business_hours}
+
+        starts = []
+        ends = []
+        for start_date, end_date in sorted(holidays):
+            if ends and start_date <= ends[-1]:
+                ends[-1] = max(ends[-1], end_date)
+            else:
+                starts.append(start_date)
+                ends.append(end_date)
+        self.holiday_starts = starts
+        self.holiday_ends = ends
+
+    @classmethod
+    def load(cls):
+        """从数据库加载营业时间和全部假期"""
+        return cls(
+            BusinessHours.objects.all(),
+            Holiday.objects.values_list('start_date', 'end_date')
+        )
+
+    def is_holiday(self, date):
+        """判断指定日期是否处于假期中"""
+        index = bisect_right(self.holiday_starts, date)
+        return index > 0 and self.holiday_ends[index - 1] >= date
+
+    def get_business_hours(self, date):
+        """获取指定日期的营业时间设置，没有设置时返回 None"""
+        return self.business_hours.get(date.isoweekday())
+
+    def get_open_hours(self, date):
+        """获取指定日期实际可预约的营业时间，假期或不营业时返回 None"""
+        if self.is_holiday(date):
+            return None
+        hours = self.get_business_hours(date)
+        if hours is None or not hours.is_open:
+            return None
+        return hours
+
+
+_lock = threading.Lock()
+_compiled = None
+
+
+def get_schedule():
+    """
+    获取当前进程缓存的营业日程
+
+    每次只读取一次共享缓存中的版本号，版本变化时才重新查询数据库构建。
+    """
+    global _compiled
+    version = get_version(SCHEDULE_VERSION)
+    compiled = _compiled
+    if compiled is not None and compiled[0] == version:
+        return compiled[1]
+
+    with _lock:
+        if _compiled is None or _compiled[0] != version:
+            _compiled = (version, CompiledSchedule.load())
+        return _compiled[1]
+
+
+def invalidate_schedule():
+    """营业时间或假期变化后使所有进程的日程缓存失效"""
+    global _compiled
+    bump_version(SCHEDULE_VERSION)
+    _compiled = None
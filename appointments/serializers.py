@@ -2,10 +2,26 @@
 
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Appointment, AppointmentNote
+from .models import (
+    Appointment,
+    AppointmentNote,
+    AppointmentSeries,
+    SlotHold,
+    WaitlistEntry,
+)
 from .utils import is_valid_appointment_time, AppointmentStatus
-from services.models import ServicePrice
+from .booking import book_appointment, book_appointments
+from .holds import HOLD_DEFAULT_MINUTES, HOLD_MAX_MINUTES, place_hold
+from .transitions import MAX_BULK_TRANSITION
+from services.models import Service
+from services.pricing import get_price_matrix
+from pets.models import Pet
+from core.representation import ValuesRepresentation
 from datetime import datetime, timedelta
+from collections import defaultdict
+
+# 批量预约一次最多提交的条目数
+MAX_BULK_APPOINTMENTS = 20
 
 class AppointmentNoteSerializer(serializers.ModelSerializer):
     staff_name = serializers.CharField(source='staff.username', read_only=True)
@@ -18,6 +34,11 @@ class AppointmentNoteSerializer(serializers.ModelSerializer):
 class AppointmentSerializer(serializers.ModelSerializer):
     service_name = serializers.CharField(source='service.name', read_only=True)
     pet_name = serializers.CharField(source='pet.name', read_only=True)
+    resource_name = serializers.CharField(
+        source='resource.name',
+        read_only=True,
+        default=None
+    )
     status_display = serializers.CharField(
         source='get_status_display', 
         read_only=True
@@ -27,15 +48,22 @@ class AppointmentSerializer(serializers.ModelSerializer):
         many=True, 
         read_only=True
     )
+    hold = serializers.PrimaryKeyRelatedField(
+        queryset=SlotHold.objects.all(),
+        write_only=True,
+        required=False
+    )
     
     class Meta:
         model = Appointment
         fields = [
             'id', 'pet', 'pet_name', 'service', 'service_name',
+            'resource', 'resource_name',
             'date', 'start_time', 'end_time', 'status', 'status_display',
-            'total_price', 'notes', 'created_at'
+            'total_price', 'notes', 'created_at', 'hold'
         ]
-        read_only_fields = ['id', 'end_time', 'total_price', 'created_at']
+        read_only_fields = ['id', 'resource', 'end_time', 'total_price',
+                            'created_at']
 
     def validate(self, data):
         # 验证预约时间
@@ -61,22 +89,291 @@ class AppointmentSerializer(serializers.ModelSerializer):
         if data['pet'].owner != self.context['request'].user:
             raise serializers.ValidationError("只能为自己的宠物预约")
         
-        # 计算价格
-        try:
-            price = ServicePrice.objects.get(
-                service=data['service'],
-                dog_size=data['pet'].size
-            ).price
-            data['total_price'] = price
-        except ServicePrice.DoesNotExist:
+        # 计算价格，预约记录按同一体型统计
+        dog_size = data['pet'].size
+        price = get_price_matrix().get_price(data['service'].id, dog_size)
+        if price is None:
             raise serializers.ValidationError("该服务未设置对应体型的价格")
+        data['total_price'] = price
+        data['dog_size'] = dog_size
+        
+        # 使用保留的时间段，未指定时自动使用该客户在同一时间段的有效保留
+        user = self.context['request'].user
+        hold = data.get('hold')
+        if hold is None:
+            data['hold'] = SlotHold.objects.filter(
+                customer=user,
+                service=data['service'],
+                date=data['date'],
+                start_time=data['start_time'],
+                expires_at__gt=timezone.now()
+            ).first()
+        elif (hold.customer_id != user.id or
+                (hold.service_id, hold.date, hold.start_time) !=
+                (data['service'].id, data['date'], data['start_time'])):
+            raise serializers.ValidationError("保留的时间段与预约不一致")
         
         return data
 
     def create(self, validated_data):
         validated_data['customer'] = self.context['request'].user
-        return super().create(validated_data)
+        hold = validated_data.pop('hold', None)
+        return book_appointment(Appointment(**validated_data), hold=hold)
+
+    def update(self, instance, validated_data):
+        hold = validated_data.pop('hold', None)
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        return book_appointment(instance, hold=hold)
+
+class AppointmentListRepresentation(ValuesRepresentation):
+    """预约列表的快速表示，输出与 AppointmentSerializer 一致"""
+    serializer_class = AppointmentSerializer
+    fields = (
+        'id', 'pet', 'pet__name', 'service', 'service__name',
+        'resource', 'resource__name', 'date', 'start_time', 'end_time',
+        'status', 'total_price', 'created_at'
+    )
+    status_labels = dict(AppointmentStatus.CHOICES)
+
+    def prepare(self, rows):
+        # 整页的备注一次查询，按创建时间倒序分组
+        self.notes = defaultdict(list)
+        if not rows:
+            return
+        note_fields = AppointmentNoteSerializer().fields
+        note_created_at = note_fields['created_at']
+        for note in AppointmentNote.objects.filter(
+            appointment__in=[row['id'] for row in rows]
+        ).values(
+            'id', 'appointment', 'note', 'staff__username', 'created_at'
+        ).order_by('-created_at'):
+            self.notes[note['appointment']].append({
+                'id': str(note['id']),
+                'note': note['note'],
+                'staff_name': note['staff__username'],
+                'created_at': note_created_at.to_representation(note['created_at']),
+            })
+
+    def represent_row(self, row):
+        return {
+            'id': str(row['id']),
+            'pet': row['pet'],
+            'pet_name': row['pet__name'],
+            'service': row['service'],
+            'service_name': row['service__name'],
+            'resource': row['resource'],
+            'resource_name': row['resource__name'],
+            'date': self.format('date', row['date']),
+            'start_time': self.format('start_time', row['start_time']),
+            'end_time': self.format('end_time', row['end_time']),
+            'status': row['status'],
+            'status_display': str(self.status_labels.get(row['status'], row['status'])),
+            'total_price': self.format('total_price', row['total_price']),
+            'notes': self.notes.get(row['id'], []),
+            'created_at': self.format('created_at', row['created_at']),
+        }
 
 class AppointmentDetailSerializer(AppointmentSerializer):
     class Meta(AppointmentSerializer.Meta):
-        fields = AppointmentSerializer.Meta.fields + ['notes']
\ No newline at end of file
+        fields = AppointmentSerializer.Meta.fields + ['notes']
+
+class AppointmentBulkItemSerializer(serializers.Serializer):
+    """批量预约中的单个条目，只做格式校验，关联对象由外层统一查询"""
+    pet = serializers.UUIDField()
+    service = serializers.UUIDField()
+    date = serializers.DateField()
+    start_time = serializers.TimeField()
+    notes = serializers.CharField(required=False, allow_blank=True, default='')
+
+class AppointmentBulkSerializer(serializers.Serializer):
+    """
+    批量预约序列化器
+    
+    所有条目共用一次宠物和服务查询，价格来自价格矩阵，营业时间和假期来自日程缓存；
+    校验失败时按条目返回错误，同一宠物在条目之间的时间重叠也会被检查。
+    """
+    appointments = AppointmentBulkItemSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=MAX_BULK_APPOINTMENTS
+    )
+
+    def validate_appointments(self, items):
+        user = self.context['request'].user
+        pets = {
+            pet.id: pet for pet in Pet.objects.filter(
+                id__in={item['pet'] for item in items},
+                owner=user
+            )
+        }
+        services = Service.objects.in_bulk({item['service'] for item in items})
+        price_matrix = get_price_matrix()
+        
+        appointments = []
+        errors = []
+        taken = defaultdict(list)
+        for item in items:
+            pet = pets.get(item['pet'])
+            service = services.get(item['service'])
+            if pet is None:
+                errors.append({'pet': ["只能为自己的宠物预约"]})
+                continue
+            if service is None:
+                errors.append({'service': ["服务不存在"]})
+                continue
+            
+            is_valid, message = is_valid_appointment_time(
+                item['date'],
+                item['start_time'],
+                service.duration
+            )
+            if not is_valid:
+                errors.append({'non_field_errors': [message]})
+                continue
+            
+            price = price_matrix.get_price(service.id, pet.size)
+            if price is None:
+                errors.append({'non_field_errors': ["该服务未设置对应体型的价格"]})
+                continue
+            
+            start_time = item['start_time']
+            end_time = (datetime.combine(item['date'], start_time) +
+                        timedelta(minutes=service.duration)).time()
+            # 多个资源可以同时服务不同的宠物，但同一宠物不能同时做两项服务
+            if any(start_time < taken_end and taken_start < end_time
+                   for taken_start, taken_end in taken[pet.id, item['date']]):
+                errors.append({'non_field_errors': ["同一宠物在本次提交中的预约时间重叠"]})
+                continue
+            taken[pet.id, item['date']].append((start_time, end_time))
+            
+            errors.append({})
+            appointments.append(Appointment(
+                customer=user,
+                pet=pet,
+                service=service,
+                date=item['date'],
+                start_time=start_time,
+                end_time=end_time,
+                total_price=price,
+                dog_size=pet.size,
+                notes=item['notes']
+            ))
+        
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return appointments
+
+    def create(self, validated_data):
+        return book_appointments(validated_data['appointments'])
+
+class AppointmentIdsSerializer(serializers.Serializer):
+    """批量状态操作的预约ID列表"""
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=MAX_BULK_TRANSITION
+    )
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    """周期预约序列化器"""
+    service_name = serializers.CharField(source='service.name', read_only=True)
+    pet_name = serializers.CharField(source='pet.name', read_only=True)
+    
+    class Meta:
+        model = AppointmentSeries
+        fields = [
+            'id', 'pet', 'pet_name', 'service', 'service_name',
+            'start_date', 'start_time', 'interval_days', 'count', 'until',
+            'notes', 'is_active', 'materialized_until', 'created_at'
+        ]
+        read_only_fields = [
+            'id', 'is_active', 'materialized_until', 'created_at'
+        ]
+
+    def validate(self, data):
+        if data['start_date'] < timezone.localdate():
+            raise serializers.ValidationError("首次日期不能早于今天")
+        if data.get('until') and data['until'] < data['start_date']:
+            raise serializers.ValidationError("截止日期不能早于首次日期")
+        if data['pet'].owner != self.context['request'].user:
+            raise serializers.ValidationError("只能为自己的宠物预约")
+        return data
+
+    def create(self, validated_data):
+        validated_data['customer'] = self.context['request'].user
+        return super().create(validated_data)
+
+class SlotHoldSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SlotHold
+        fields = ['id', 'date', 'start_time', 'end_time', 'expires_at']
+
+class SlotHoldCreateSerializer(serializers.Serializer):
+    """结账保留序列化器"""
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.all())
+    date = serializers.DateField()
+    start_time = serializers.TimeField()
+    minutes = serializers.IntegerField(
+        min_value=1,
+        max_value=HOLD_MAX_MINUTES,
+        default=HOLD_DEFAULT_MINUTES
+    )
+
+    def validate(self, data):
+        is_valid, message = is_valid_appointment_time(
+            data['date'],
+            data['start_time'],
+            data['service'].duration
+        )
+        if not is_valid:
+            raise serializers.ValidationError(message)
+        data['end_time'] = (datetime.combine(data['date'], data['start_time']) +
+                            timedelta(minutes=data['service'].duration)).time()
+        return data
+
+    def create(self, validated_data):
+        return place_hold(
+            self.context['request'].user,
+            validated_data['service'],
+            validated_data['date'],
+            validated_data['start_time'],
+            validated_data['end_time'],
+            minutes=validated_data['minutes']
+        )
+
+class WaitlistEntrySerializer(serializers.ModelSerializer):
+    """候补登记序列化器"""
+    service_name = serializers.CharField(source='service.name', read_only=True)
+    pet_name = serializers.CharField(source='pet.name', read_only=True)
+    status_display = serializers.CharField(
+        source='get_status_display',
+        read_only=True
+    )
+    offer = SlotHoldSerializer(source='hold', read_only=True)
+    
+    class Meta:
+        model = WaitlistEntry
+        fields = [
+            'id', 'pet', 'pet_name', 'service', 'service_name',
+            'date_from', 'date_to', 'earliest_start', 'latest_start',
+            'status', 'status_display', 'offer', 'appointment', 'created_at'
+        ]
+        read_only_fields = ['id', 'status', 'appointment', 'created_at']
+
+    def validate(self, data):
+        if data['date_from'] < timezone.localdate():
+            raise serializers.ValidationError("最早日期不能早于今天")
+        if data['date_to'] < data['date_from']:
+            raise serializers.ValidationError("最晚日期不能早于最早日期")
+        if (data.get('earliest_start') and data.get('latest_start') and
+                data['latest_start'] < data['earliest_start']):
+            raise serializers.ValidationError("最晚开始时间不能早于最早开始时间")
+        if data['pet'].owner != self.context['request'].user:
+            raise serializers.ValidationError("只能为自己的宠物登记候补")
+        return data
+
+    def create(self, validated_data):
+        validated_data['customer'] = self.context['request'].user
+        validated_data['duration'] = validated_data['service'].duration
+        return super().create(validated_data)
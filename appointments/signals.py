@@ -0,0 +1,64 @@
+# appointments/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from business_hours.models import BusinessHours
+from holidays.models import Holiday
+from .models import Appointment
+from .schedule import invalidate_schedule
+from .transitions import appointments_transitioned
+from .utils import AppointmentStatus
+from .versions import appointment_dates_changed
+from .waitlist import slots_freed
+
+
+@receiver(post_save, sender=BusinessHours)
+@receiver(post_delete, sender=BusinessHours)
+@receiver(post_save, sender=Holiday)
+@receiver(post_delete, sender=Holiday)
+def schedule_changed(sender, **kwargs):
+    """营业时间或假期变化时，在事务提交后刷新日程缓存"""
+    transaction.on_commit(invalidate_schedule)
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_delete, sender=Appointment)
+def appointment_changed(sender, instance, **kwargs):
+    """预约变化时更新原日期和新日期的版本号"""
+    appointment_dates_changed(
+        day for day in (instance.date, instance.get_loaded_value('date')) if day
+    )
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_slot_released(sender, instance, created, **kwargs):
+    """有效预约被取消或改期时，原时间段交给候补匹配"""
+    if created or instance.get_loaded_value('status') not in AppointmentStatus.ACTIVE:
+        return
+    loaded = tuple(
+        instance.get_loaded_value(name)
+        for name in ('date', 'start_time', 'end_time')
+    )
+    if (instance.status not in AppointmentStatus.ACTIVE or
+            loaded != (instance.date, instance.start_time, instance.end_time)):
+        slots_freed([loaded])
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_slot_deleted(sender, instance, **kwargs):
+    """删除有效预约时，时间段交给候补匹配"""
+    if instance.status in AppointmentStatus.ACTIVE:
+        slots_freed([(instance.date, instance.start_time, instance.end_time)])
+
+
+@receiver(appointments_transitioned)
+def appointments_bulk_transitioned(sender, status, appointments, **kwargs):
+    """批量状态变化：一次更新相关日期的版本号，取消的时间段交给候补匹配"""
+    appointment_dates_changed({row['date'] for row in appointments})
+    if status not in AppointmentStatus.ACTIVE:
+        slots_freed(
+            (row['date'], row['start_time'], row['end_time'])
+            for row in appointments
+            if row['previous_status'] in AppointmentStatus.ACTIVE
+        )
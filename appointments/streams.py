@@ -0,0 +1,221 @@
+# appointments/streams.py
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from core.pubsub import Subscription, broker
+from services.models import Service
+from .availability import get_available_slots_by_date
+from .versions import anext_hold_expiry, slot_channel
+
+logger = logging.getLogger(__name__)
+
+# 空闲连接发送心跳注释的间隔（秒），防止代理断开连接
+SLOT_STREAM_HEARTBEAT = 15
+
+
+def _slot_key(slot):
+    return (slot['start_time'].isoformat(), slot['end_time'].isoformat())
+
+
+def _slot_data(key):
+    return {'start_time': key[0], 'end_time': key[1]}
+
+
+class SlotWatcher:
+    """
+    同一事件循环中订阅同一天、同一服务的连接共用一个观察者
+
+    观察者订阅该日期的变化频道，收到通知后只计算一次可用时间段，
+    与上次结果比较后把增减的时间段分发给全部连接。连接空闲时不产生查询，
+    新连接直接使用观察者已有的结果。积压的通知合并为一次计算；
+    保留到期时没有写操作，按缓存中记录的最早到期时间定时重新计算。
+    """
+    watchers = {}
+
+    def __init__(self, day, service):
+        self.day = day
+        self.service = service
+        self.loop = asyncio.get_running_loop()
+        self.key = (self.loop, day, service.id)
+        self.listeners = set()
+        self.slots = []
+        self.loaded = asyncio.Event()
+        self.subscription = broker.subscribe(slot_channel(day))
+        self.expiry_timer = None
+        self.task = self.loop.create_task(self.run())
+
+    @classmethod
+    async def join(cls, day, service):
+        """加入观察者，返回 (观察者, 连接的消息订阅)"""
+        key = (asyncio.get_running_loop(), day, service.id)
+        watcher = cls.watchers.get(key)
+        if watcher is None:
+            watcher = cls.watchers[key] = cls(day, service)
+        listener = Subscription(key, watcher.loop)
+        watcher.listeners.add(listener)
+        await watcher.loaded.wait()
+        if watcher.task.done():
+            # 首次计算失败
+            watcher.leave(listener)
+            watcher.task.result()
+        return watcher, listener
+
+    def leave(self, listener):
+        self.listeners.discard(listener)
+        if self.listeners:
+            return
+        # 最后一个连接离开后停止观察
+        self.task.cancel()
+        if self.expiry_timer is not None:
+            self.expiry_timer.cancel()
+        broker.unsubscribe(self.subscription)
+        if self.watchers.get(self.key) is self:
+            del self.watchers[self.key]
+
+    def snapshot(self):
+        return [_slot_data(key) for key in self.slots]
+
+    async def run(self):
+        try:
+            await self.refresh()
+        finally:
+            self.loaded.set()
+        while True:
+            await self.subscription.get()
+            self.subscription.drain()
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception('刷新可用时间段失败: %s', self.day)
+
+    async def refresh(self):
+        slots = await sync_to_async(self.load_slots)()
+        previous = set(self.slots)
+        current = set(slots)
+        added = [key for key in slots if key not in previous]
+        removed = [key for key in self.slots if key not in current]
+        self.slots = slots
+        if self.loaded.is_set() and (added or removed):
+            delta = {
+                'added': [_slot_data(key) for key in added],
+                'removed': [_slot_data(key) for key in removed],
+            }
+            for listener in self.listeners:
+                listener.put(delta)
+        await self.schedule_hold_expiry()
+
+    def load_slots(self):
+        return [
+            _slot_key(slot) for slot in get_available_slots_by_date(
+                self.day, self.day, self.service
+            )[self.day]
+        ]
+
+    async def schedule_hold_expiry(self):
+        if self.expiry_timer is not None:
+            self.expiry_timer.cancel()
+            self.expiry_timer = None
+        expiry = await anext_hold_expiry(self.day)
+        if expiry is not None:
+            self.expiry_timer = self.loop.call_later(
+                (expiry - time.time_ns()) / 1e9,
+                self.subscription.put,
+                {'date': self.day.isoformat()}
+            )
+
+
+def _event(name, data):
+    return f'event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+async def _stream_slots(day, service):
+    watcher, listener = await SlotWatcher.join(day, service)
+    try:
+        yield _event('slots', {
+            'date': day.isoformat(),
+            'service_id': str(service.id),
+            'available_slots': watcher.snapshot(),
+        })
+        while True:
+            try:
+                delta = await asyncio.wait_for(
+                    listener.get(), SLOT_STREAM_HEARTBEAT
+                )
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if listener.overflowed:
+                # 连接跟不上变化，丢弃积压的增量，重新发送全部时间段
+                listener.drain()
+                yield _event('slots', {
+                    'date': day.isoformat(),
+                    'service_id': str(service.id),
+                    'available_slots': watcher.snapshot(),
+                })
+            else:
+                yield _event('delta', delta)
+    finally:
+        watcher.leave(listener)
+
+
+def _authenticate(request):
+    """使用 DRF 的认证方式（JWT 或会话）识别用户"""
+    drf_request = Request(request, authenticators=[
+        authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ])
+    try:
+        return drf_request.user
+    except APIException:
+        return None
+
+
+@require_GET
+async def slot_stream(request):
+    """
+    可用时间段变化的事件流 (Server-Sent Events)
+
+    参数:
+    - date: 日期 (YYYY-MM-DD)
+    - service: 服务ID
+
+    连接后先发送一次 slots 事件（全部可用时间段），之后该日期的预约新增、取消、
+    改期或保留变化时发送 delta 事件 {"added": [...], "removed": [...]}。
+    """
+    user = await sync_to_async(_authenticate)(request)
+    if user is None or not user.is_authenticated:
+        return JsonResponse({"error": "身份认证信息未提供"}, status=401)
+
+    date_str = request.GET.get('date')
+    service_id = request.GET.get('service')
+    if not date_str or not service_id:
+        return JsonResponse({"error": "必须提供日期和服务ID"}, status=400)
+    try:
+        day = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({"error": "无效的日期格式"}, status=400)
+    if day < timezone.now().date():
+        return JsonResponse({"error": "不能选择过去的日期"}, status=400)
+    try:
+        service = await Service.objects.aget(id=service_id)
+    except (Service.DoesNotExist, DjangoValidationError):
+        return JsonResponse({"error": "服务不存在"}, status=400)
+
+    response = StreamingHttpResponse(
+        _stream_slots(day, service),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # 关闭 nginx 等反向代理的响应缓冲
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,79 @@
+# appointments/sweep.py
+
+import time
+from datetime import date
+from uuid import UUID
+from django.db.models import Q
+from django.utils import timezone
+from .models import Appointment, SweepCheckpoint
+from .transitions import transition_appointments
+from .utils import AppointmentStatus
+
+SWEEP_CHECKPOINT = 'sweep_past_appointments'
+# 每块处理的预约数；每块是一个独立的短事务，SQLite 的写锁只在该块内持有
+SWEEP_CHUNK_SIZE = 500
+
+# 过去的预约按原状态处理：已确认视为已完成，仍待确认视为未到店
+SWEEP_TRANSITIONS = {
+    AppointmentStatus.CONFIRMED: 'complete',
+    AppointmentStatus.PENDING: 'no_show',
+}
+
+
+def _load_position(checkpoint):
+    if not checkpoint.position:
+        return None
+    day, appointment_id = checkpoint.position
+    return date.fromisoformat(day), UUID(appointment_id)
+
+
+def sweep_past_appointments(before=None, chunk_size=SWEEP_CHUNK_SIZE,
+                            pause=0, reset=False):
+    """
+    将 before（默认今天）之前仍然有效的预约改为已完成或未到店
+
+    按 (date, id) 顺序分块读取，每块按原状态各执行一条带状态条件的 UPDATE，
+    完成后记录最后处理的位置，中断后再次运行从该位置继续。
+    状态条件保证重复运行不会重复处理；reset 时从头扫描，
+    用于补处理之后才补录的过去预约。
+
+    返回 {操作: 数量}。
+    """
+    before = before or timezone.localdate()
+    checkpoint, _ = SweepCheckpoint.objects.get_or_create(name=SWEEP_CHECKPOINT)
+    position = None if reset else _load_position(checkpoint)
+
+    counts = {transition: 0 for transition in SWEEP_TRANSITIONS.values()}
+    pending = Appointment.objects.filter(
+        date__lt=before,
+        status__in=AppointmentStatus.ACTIVE
+    ).order_by('date', 'id')
+    while True:
+        queryset = pending
+        if position is not None:
+            queryset = queryset.filter(
+                Q(date__gt=position[0]) |
+                Q(date=position[0], id__gt=position[1])
+            )
+        rows = list(queryset.values_list('id', 'date', 'status')[:chunk_size])
+        if not rows:
+            break
+
+        for status, transition in SWEEP_TRANSITIONS.items():
+            ids = [row[0] for row in rows if row[2] == status]
+            if ids:
+                moved, _ = transition_appointments(
+                    Appointment.objects.filter(id__in=ids, status=status),
+                    transition
+                )
+                counts[transition] += len(moved)
+
+        position = (rows[-1][1], rows[-1][0])
+        checkpoint.position = [position[0].isoformat(), str(position[1])]
+        checkpoint.save(update_fields=['position', 'updated_at'])
+        if len(rows) < chunk_size:
+            break
+        if pause:
+            # 让出数据库写锁，避免长时间阻塞在线预约
+            time.sleep(pause)
+    return counts
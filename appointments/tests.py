@@ -0,0 +1,1129 @@
+# appointments/tests.py
+
+import asyncio
+import csv
+import json
+import threading
+from datetime import time, timedelta
+from decimal import Decimal
+from io import StringIO
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from unittest import mock, skipUnless
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from accounts.models import Customer
+from core.pubsub import broker
+from business_hours.models import BusinessHours
+from holidays.models import Holiday
+from pets.models import Pet
+from pets.serializers import PetSerializer
+from services.models import DogSize, Service, ServicePrice
+from services.serializers import ServiceSerializer
+from core.versions import get_version
+from dashboard.models import DailyMetrics, DailyServiceMetrics
+from dashboard.rollups import rebuild_metrics
+from .availability import load_busy_rows
+from .booking import BookingConflict, book_appointment, book_appointments
+from .holds import purge_expired_holds
+from .recurrence import materialize_series
+from .serializers import AppointmentSerializer
+from .models import (
+    Appointment,
+    AppointmentNote,
+    AppointmentSeries,
+    FreedSlot,
+    SlotHold,
+    SweepCheckpoint,
+    WaitlistEntry,
+)
+from .streams import SlotWatcher
+from .sweep import SWEEP_CHECKPOINT, sweep_past_appointments
+from .utils import AppointmentStatus, WaitlistStatus
+from .transitions import transition_appointments
+from .versions import date_version_name, slot_channel
+from .waitlist import (
+    WAITLIST_OFFER_MINUTES,
+    backfill_freed_slots,
+    backfill_slot,
+    expire_offers,
+)
+
+
+class BookingFixtureMixin:
+    """每天 9:00-18:00 营业，一个 60 分钟的服务和一位客户"""
+
+    @classmethod
+    def create_fixtures(cls):
+        cls.staff = Customer.objects.create_user(
+            'staff@example.com', 'password', username='staff', is_staff=True
+        )
+        cls.customer = Customer.objects.create_user(
+            'customer@example.com', 'password', username='customer'
+        )
+        cls.pet = Pet.objects.create(
+            owner=cls.customer, name='旺财', weight=Decimal('5'), gender='M'
+        )
+        cls.service = Service.objects.create(
+            name='洗澡', description='基础洗护', duration=60
+        )
+        ServicePrice.objects.bulk_create([
+            ServicePrice(service=cls.service, dog_size=size, price=Decimal(price))
+            for size, price in zip(DogSize.values, (100, 150, 200))
+        ])
+        BusinessHours.objects.bulk_create([
+            BusinessHours(weekday=weekday, start_time=time(9), end_time=time(18))
+            for weekday in range(1, 8)
+        ])
+        cls.day = timezone.localdate() + timedelta(days=7)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.create_fixtures()
+
+    def setUp(self):
+        # 测试事务不会提交，版本号不会更新，清空缓存避免读到其他测试的营业日程
+        cache.clear()
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def book(self, client, start_time, pet=None, **extra):
+        return client.post('/api/appointments/appointments/', {
+            'pet': str((pet or self.pet).id),
+            'service': str(self.service.id),
+            'date': self.day.isoformat(),
+            'start_time': start_time,
+            **extra,
+        }, format='json')
+
+
+class UnassignedAppointmentConstraintTests(BookingFixtureMixin, TestCase):
+    """未启用资源时，数据库约束阻止同一时间段的两个有效预约"""
+
+    def create(self, status=AppointmentStatus.PENDING):
+        return Appointment.objects.create(
+            customer=self.customer, pet=self.pet, service=self.service,
+            date=self.day, start_time=time(9), end_time=time(10),
+            total_price=Decimal('100'), dog_size=self.pet.size, status=status
+        )
+
+    def test_duplicate_rejected(self):
+        self.create()
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.create(AppointmentStatus.CONFIRMED)
+        # 已取消的预约不占用时间段
+        self.create(AppointmentStatus.CANCELLED)
+        self.assertEqual(Appointment.objects.count(), 2)
+
+
+class WaitlistHoldBookingTests(BookingFixtureMixin, TestCase):
+    """客户通过普通预约接口预约为其候补保留的时间段"""
+
+    def setUp(self):
+        super().setUp()
+        self.entry = WaitlistEntry.objects.create(
+            customer=self.customer,
+            pet=self.pet,
+            service=self.service,
+            date_from=self.day,
+            date_to=self.day,
+            duration=self.service.duration
+        )
+        self.assertEqual(backfill_slot(self.day, time(9), time(10)), self.entry)
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, WaitlistStatus.OFFERED)
+
+    def test_booking_offered_slot_completes_entry(self):
+        client = self.client_for(self.customer)
+        response = self.book(client, '09:00')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, WaitlistStatus.BOOKED)
+        self.assertEqual(str(self.entry.appointment_id), str(response.data['id']))
+        self.assertIsNone(self.entry.hold_id)
+        self.assertFalse(SlotHold.objects.exists())
+
+        # 登记已完成，不能再接受或取消
+        url = f'/api/appointments/waitlist/{self.entry.id}/'
+        self.assertEqual(client.post(url + 'accept/').status_code, 400)
+        self.assertEqual(client.post(url + 'cancel/').status_code, 400)
+
+    def test_booking_with_explicit_hold_completes_entry(self):
+        response = self.book(
+            self.client_for(self.customer), '09:00', hold=str(self.entry.hold_id)
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, WaitlistStatus.BOOKED)
+
+    def test_accept_still_books(self):
+        client = self.client_for(self.customer)
+        response = client.post(f'/api/appointments/waitlist/{self.entry.id}/accept/')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, WaitlistStatus.BOOKED)
+        self.assertEqual(str(self.entry.appointment_id), str(response.data['id']))
+
+    def test_accept_expired_hold_leaves_entry_to_expiry(self):
+        SlotHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.client_for(self.customer).post(
+            f'/api/appointments/waitlist/{self.entry.id}/accept/'
+        )
+        # 时间段仍然空闲时按普通预约处理，保留没有被消费，登记不改为已预约
+        self.assertEqual(response.status_code, 201, response.data)
+        self.entry.refresh_from_db()
+        self.assertEqual(self.entry.status, WaitlistStatus.OFFERED)
+        self.assertIsNone(self.entry.appointment_id)
+
+
+class WaitlistMatchingTests(BookingFixtureMixin, TestCase):
+    """空出的时间段记录在数据库中，按登记顺序保留给合适的候补，过期后顺延"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = Customer.objects.create_user(
+            'other@example.com', 'password', username='other'
+        )
+        cls.other_pet = Pet.objects.create(
+            owner=cls.other, name='小白', weight=Decimal('5'), gender='F'
+        )
+
+    def waitlist(self, **extra):
+        return WaitlistEntry.objects.create(
+            customer=self.other,
+            pet=self.other_pet,
+            service=self.service,
+            date_from=self.day,
+            date_to=self.day,
+            duration=self.service.duration,
+            **extra
+        )
+
+    def assertStatus(self, entry, expected):
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, expected)
+
+    def test_cancel_records_slot_for_first_matching_entry(self):
+        response = self.book(self.client_for(self.customer), '09:00')
+        self.assertEqual(response.status_code, 201)
+        # 开始时间偏好不符的登记虽然最早，也不会获得 9:00 的时间段
+        late = self.waitlist(earliest_start=time(10))
+        first = self.waitlist()
+        second = self.waitlist()
+
+        # 不执行提交后的回调，相当于后台线程的任务丢失
+        self.client_for(self.customer).post(
+            f'/api/appointments/appointments/{response.data["id"]}/cancel/'
+        )
+        self.assertQuerySetEqual(
+            FreedSlot.objects.values_list('date', 'start_time', 'end_time'),
+            [(self.day, time(9), time(10))]
+        )
+        self.assertStatus(first, WaitlistStatus.WAITING)
+
+        before = timezone.now()
+        self.assertEqual(backfill_freed_slots(), 1)
+        self.assertFalse(FreedSlot.objects.exists())
+        self.assertStatus(first, WaitlistStatus.OFFERED)
+        self.assertEqual(
+            (first.hold.date, first.hold.start_time, first.hold.end_time),
+            (self.day, time(9), time(10))
+        )
+        self.assertGreaterEqual(
+            first.hold.expires_at, before + timedelta(minutes=WAITLIST_OFFER_MINUTES)
+        )
+        self.assertStatus(late, WaitlistStatus.WAITING)
+        self.assertStatus(second, WaitlistStatus.WAITING)
+
+        # 重复处理同一时间段不会再保留给其他候补
+        self.assertIsNone(backfill_slot(self.day, time(9), time(10)))
+        self.assertStatus(second, WaitlistStatus.WAITING)
+
+    def test_expired_offer_moves_to_next_entry(self):
+        first = self.waitlist()
+        second = self.waitlist()
+        self.assertEqual(backfill_slot(self.day, time(9), time(10)), first)
+        self.assertEqual(expire_offers(), 0)
+
+        SlotHold.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(expire_offers(), 1)
+        self.assertStatus(first, WaitlistStatus.EXPIRED)
+        self.assertIsNone(first.hold_id)
+        self.assertFalse(SlotHold.objects.exists())
+
+        self.assertEqual(backfill_freed_slots(), 1)
+        self.assertStatus(second, WaitlistStatus.OFFERED)
+        self.assertEqual(second.hold.start_time, time(9))
+
+    def test_cancelled_offer_moves_to_next_entry(self):
+        first = self.waitlist()
+        second = self.waitlist()
+        self.assertEqual(backfill_slot(self.day, time(9), time(10)), first)
+
+        response = self.client_for(self.other).post(
+            f'/api/appointments/waitlist/{first.id}/cancel/'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertStatus(first, WaitlistStatus.CANCELLED)
+
+        self.assertEqual(backfill_freed_slots(), 1)
+        self.assertStatus(second, WaitlistStatus.OFFERED)
+
+
+class TransitionTests(BookingFixtureMixin, TestCase):
+    """批量状态变化：只移动允许的原状态，拒绝的返回原因，并触发版本号、候补和汇总的更新"""
+
+    def setUp(self):
+        super().setUp()
+        self.pending, self.confirmed, self.completed = book_appointments([
+            Appointment(
+                customer=self.customer, pet=self.pet, service=self.service,
+                date=self.day, start_time=time(hour), end_time=time(hour + 1),
+                total_price=Decimal('100'), dog_size=self.pet.size, status=status
+            )
+            for hour, status in (
+                (9, AppointmentStatus.PENDING),
+                (10, AppointmentStatus.CONFIRMED),
+                (11, AppointmentStatus.COMPLETED),
+            )
+        ])
+
+    def status_of(self, appointment):
+        return Appointment.objects.values_list('status', flat=True).get(id=appointment.id)
+
+    def test_moved_and_rejected(self):
+        missing = '00000000-0000-0000-0000-000000000000'
+        ids = [str(self.confirmed.id), missing, str(self.pending.id)]
+        response = self.client_for(self.staff).post(
+            '/api/appointments/appointments/bulk_confirm/', {'ids': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([str(value) for value in response.data['moved']], [ids[2]])
+        self.assertEqual(
+            [(str(row['id']), row['reason']) for row in response.data['rejected']],
+            [
+                (ids[0], '当前状态为已确认，无法执行该操作'),
+                (missing, '预约不存在'),
+            ]
+        )
+        self.assertEqual(self.status_of(self.pending), AppointmentStatus.CONFIRMED)
+
+    def test_illegal_transitions(self):
+        for transition, appointment in (
+            ('complete', self.pending),
+            ('confirm', self.completed),
+            ('cancel', self.completed),
+            ('no_show', self.completed),
+        ):
+            with self.subTest(transition=transition):
+                before = self.status_of(appointment)
+                moved, rejected = transition_appointments(
+                    Appointment.objects.filter(id=appointment.id), transition
+                )
+                self.assertEqual(moved, [])
+                self.assertEqual(rejected, [(appointment.id, before)])
+                self.assertEqual(self.status_of(appointment), before)
+
+        # 普通用户不能批量确认，也看不到其他客户的预约
+        other = Customer.objects.create_user(
+            'other@example.com', 'password', username='other'
+        )
+        url = '/api/appointments/appointments/'
+        response = self.client_for(self.customer).post(
+            f'{url}bulk_confirm/', {'ids': [str(self.pending.id)]}, format='json'
+        )
+        self.assertEqual(response.status_code, 403)
+        response = self.client_for(other).post(
+            f'{url}bulk_cancel/', {'ids': [str(self.pending.id)]}, format='json'
+        )
+        self.assertEqual(response.data['moved'], [])
+        self.assertEqual(response.data['rejected'][0]['reason'], '预约不存在')
+        self.assertEqual(self.status_of(self.pending), AppointmentStatus.PENDING)
+
+    def test_side_effects(self):
+        entry = WaitlistEntry.objects.create(
+            customer=self.customer, pet=self.pet, service=self.service,
+            date_from=self.day, date_to=self.day, duration=self.service.duration,
+            earliest_start=time(10), latest_start=time(10)
+        )
+        version = get_version(date_version_name(self.day))
+        before = DailyMetrics.objects.get(date=timezone.localdate())
+
+        # 后台线程不运行，候补匹配在下面直接处理
+        with mock.patch('appointments.waitlist._executor') as executor, \
+                self.captureOnCommitCallbacks(execute=True):
+            moved, rejected = transition_appointments(
+                Appointment.objects.filter(
+                    id__in=[self.pending.id, self.confirmed.id, self.completed.id]
+                ),
+                'cancel'
+            )
+            # 提交前版本号不变
+            self.assertEqual(get_version(date_version_name(self.day)), version)
+        self.assertEqual(sorted(moved), sorted([self.pending.id, self.confirmed.id]))
+        self.assertEqual(rejected, [(self.completed.id, AppointmentStatus.COMPLETED)])
+        self.assertGreater(get_version(date_version_name(self.day)), version)
+        executor.submit.assert_called_once()
+
+        # 空出的两个时间段记录下来，候补匹配后保留给开始时间符合的登记
+        self.assertQuerySetEqual(
+            FreedSlot.objects.values_list('start_time', flat=True),
+            [time(9), time(10)],
+            ordered=False
+        )
+        backfill_freed_slots()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, WaitlistStatus.OFFERED)
+        self.assertEqual(entry.hold.start_time, time(10))
+
+        # 汇总：两个预约从原状态移到已取消
+        after = DailyMetrics.objects.get(date=timezone.localdate())
+        self.assertEqual(after.appointments, before.appointments)
+        self.assertEqual(after.cancellations, before.cancellations + 2)
+        self.assertEqual(
+            dict(DailyServiceMetrics.objects.filter(
+                date=timezone.localdate(), service=self.service
+            ).values_list('status', 'appointments')),
+            {
+                AppointmentStatus.PENDING: 0,
+                AppointmentStatus.CONFIRMED: 0,
+                AppointmentStatus.COMPLETED: 1,
+                AppointmentStatus.CANCELLED: 2,
+            }
+        )
+
+
+class SweepTests(BookingFixtureMixin, TestCase):
+    """过去的有效预约按原状态改为已完成或未到店，按进度分块继续，reset 时从头扫描"""
+
+    def create(self, days_ago, status, hour=9):
+        return Appointment.objects.bulk_create([Appointment(
+            customer=self.customer, pet=self.pet, service=self.service,
+            date=timezone.localdate() - timedelta(days=days_ago),
+            start_time=time(hour), end_time=time(hour + 1),
+            total_price=Decimal('100'), dog_size=self.pet.size, status=status
+        )])[0]
+
+    def status_of(self, appointment):
+        return Appointment.objects.values_list('status', flat=True).get(id=appointment.id)
+
+    def test_moves_past_appointments(self):
+        confirmed = self.create(2, AppointmentStatus.CONFIRMED)
+        pending = self.create(1, AppointmentStatus.PENDING)
+        cancelled = self.create(1, AppointmentStatus.CANCELLED, hour=10)
+        today = self.create(0, AppointmentStatus.PENDING)
+
+        self.assertEqual(sweep_past_appointments(), {'complete': 1, 'no_show': 1})
+        self.assertEqual(self.status_of(confirmed), AppointmentStatus.COMPLETED)
+        self.assertEqual(self.status_of(pending), AppointmentStatus.NO_SHOW)
+        self.assertEqual(self.status_of(cancelled), AppointmentStatus.CANCELLED)
+        self.assertEqual(self.status_of(today), AppointmentStatus.PENDING)
+
+        # 重复运行不会重复处理
+        self.assertEqual(
+            sweep_past_appointments(reset=True), {'complete': 0, 'no_show': 0}
+        )
+
+    def test_resume_and_reset(self):
+        appointments = [
+            self.create(days_ago, AppointmentStatus.CONFIRMED)
+            for days_ago in range(5, 0, -1)
+        ]
+        calls = []
+
+        def interrupt(queryset, transition):
+            # 第二块处理前中断
+            if calls:
+                raise RuntimeError
+            calls.append(transition)
+            return transition_appointments(queryset, transition)
+
+        with mock.patch('appointments.sweep.transition_appointments', interrupt):
+            with self.assertRaises(RuntimeError):
+                sweep_past_appointments(chunk_size=2)
+        self.assertEqual(
+            [self.status_of(appointment) for appointment in appointments],
+            [AppointmentStatus.COMPLETED] * 2 + [AppointmentStatus.CONFIRMED] * 3
+        )
+        checkpoint = SweepCheckpoint.objects.get(name=SWEEP_CHECKPOINT)
+        self.assertEqual(
+            checkpoint.position,
+            [appointments[1].date.isoformat(), str(appointments[1].id)]
+        )
+
+        # 之后补录的、位于进度之前的预约在继续运行时不处理
+        late = self.create(6, AppointmentStatus.PENDING)
+        self.assertEqual(
+            sweep_past_appointments(chunk_size=2), {'complete': 3, 'no_show': 0}
+        )
+        self.assertEqual(self.status_of(late), AppointmentStatus.PENDING)
+
+        output = StringIO()
+        call_command('sweep_appointments', '--reset', '--chunk-size', '2', stdout=output)
+        self.assertIn('已完成 0 个，未到店 1 个', output.getvalue())
+        self.assertEqual(self.status_of(late), AppointmentStatus.NO_SHOW)
+
+
+class ExpiredHoldPurgeTests(BookingFixtureMixin, TestCase):
+    """过期的结账保留不论日期都会被删除，候补保留和有效保留保留不动"""
+
+    def hold(self, day, minutes):
+        return SlotHold.objects.create(
+            customer=self.customer,
+            service=self.service,
+            date=day,
+            start_time=time(9),
+            end_time=time(10),
+            expires_at=timezone.now() + timedelta(minutes=minutes)
+        )
+
+    def test_purge_expired_holds(self):
+        expired = [self.hold(self.day + timedelta(days=offset), -5) for offset in range(3)]
+        live = self.hold(self.day, 5)
+        waitlist_hold = self.hold(self.day + timedelta(days=1), -5)
+        WaitlistEntry.objects.create(
+            customer=self.customer,
+            pet=self.pet,
+            service=self.service,
+            date_from=self.day,
+            date_to=self.day,
+            duration=self.service.duration,
+            status=WaitlistStatus.OFFERED,
+            hold=waitlist_hold
+        )
+
+        self.assertEqual(purge_expired_holds(), len(expired))
+        self.assertQuerySetEqual(
+            SlotHold.objects.order_by('id'),
+            sorted([live, waitlist_hold], key=lambda hold: hold.id)
+        )
+
+
+class MaterializeSeriesTests(BookingFixtureMixin, TestCase):
+    """周期预约按滚动窗口生成，冲突的日期逐条报告，生成到最后一次后停止"""
+
+    def setUp(self):
+        super().setUp()
+        # 每周一次，共 5 次
+        self.series = AppointmentSeries.objects.create(
+            customer=self.customer, pet=self.pet, service=self.service,
+            start_date=self.day, start_time=time(9), interval_days=7, count=5
+        )
+
+    def series_dates(self):
+        return list(
+            self.series.appointments.order_by('date').values_list('date', flat=True)
+        )
+
+    def test_rolling_horizon(self):
+        day = self.day
+        created, conflicts = materialize_series(self.series, day + timedelta(days=10))
+        self.assertEqual([appointment.date for appointment in created], [
+            day, day + timedelta(days=7)
+        ])
+        self.assertEqual(conflicts, [])
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.materialized_until, day + timedelta(days=10))
+        self.assertTrue(self.series.is_active)
+
+        # 窗口前移后，第三次遇到假期，第四次时间已被占用
+        with self.captureOnCommitCallbacks(execute=True):
+            Holiday.objects.create(
+                name='店休', start_date=day + timedelta(days=14),
+                end_date=day + timedelta(days=14)
+            )
+        Appointment.objects.create(
+            customer=self.customer, pet=self.pet, service=self.service,
+            date=day + timedelta(days=21), start_time=time(9), end_time=time(10),
+            total_price=Decimal('100'), dog_size=self.pet.size
+        )
+        created, conflicts = materialize_series(self.series, day + timedelta(days=40))
+        self.assertEqual(
+            [appointment.date for appointment in created], [day + timedelta(days=28)]
+        )
+        self.assertEqual(conflicts, [
+            {'date': day + timedelta(days=14), 'reason': "该日期为假期，不接受预约"},
+            {'date': day + timedelta(days=21), 'reason': "该时间段已被预约"},
+        ])
+        self.assertEqual(self.series_dates(), [
+            day, day + timedelta(days=7), day + timedelta(days=28)
+        ])
+
+        # 最后一次已经生成，滚动任务不再处理
+        self.series.refresh_from_db()
+        self.assertEqual(self.series.materialized_until, day + timedelta(days=40))
+        self.assertFalse(self.series.is_active)
+        self.assertEqual(
+            materialize_series(self.series, day + timedelta(days=60)), ([], [])
+        )
+
+    def test_command(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Holiday.objects.create(name='店休', start_date=self.day, end_date=self.day)
+        horizon_days = (self.day - timezone.localdate()).days + 7
+        out = StringIO()
+        call_command('materialize_series', '--horizon-days', horizon_days, stdout=out)
+        self.assertIn(f"{self.series.id} {self.day}: 该日期为假期，不接受预约", out.getvalue())
+        self.assertIn('新增 1 个预约', out.getvalue())
+        self.assertEqual(self.series_dates(), [self.day + timedelta(days=7)])
+
+        # 窗口未前移时不重复生成
+        out = StringIO()
+        call_command('materialize_series', '--horizon-days', horizon_days, stdout=out)
+        self.assertIn('新增 0 个预约', out.getvalue())
+        self.assertEqual(len(self.series_dates()), 1)
+
+
+class QueryCountTests(BookingFixtureMixin, TestCase):
+    """列表、详情、状态变更和仪表盘接口的查询数是常数，与每页行数和备注数无关"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        appointments = book_appointments([
+            Appointment(
+                customer=cls.customer,
+                pet=cls.pet,
+                service=cls.service,
+                date=cls.day + timedelta(days=index // 8),
+                start_time=time(9 + index % 8),
+                end_time=time(10 + index % 8),
+                total_price=Decimal('100.00'),
+                dog_size=cls.pet.size
+            )
+            for index in range(60)
+        ])
+        AppointmentNote.objects.bulk_create([
+            AppointmentNote(appointment=appointment, staff=cls.staff, note=note)
+            for appointment in appointments
+            for note in ('已联系', '需要修剪指甲')
+        ])
+        cls.appointments = appointments
+
+    def get(self, user, url, data=None):
+        response = self.client_for(user).get(url, data or {})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def post(self, user, url):
+        response = self.client_for(user).post(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def test_list(self):
+        url = '/api/appointments/appointments/'
+        for user in (self.staff, self.customer):
+            for page_size in (5, 50):
+                with self.subTest(user=user.username, page_size=page_size):
+                    # 预约一页 + 整页的备注
+                    with self.assertNumQueries(2):
+                        response = self.get(user, url, {'page_size': page_size})
+                    self.assertEqual(len(response.data['results']), page_size)
+                    self.assertEqual(len(response.data['results'][0]['notes']), 2)
+                with self.subTest(user=user.username, page_size=page_size, pagination='offset'):
+                    # 页码分页多一次计数
+                    with self.assertNumQueries(3):
+                        response = self.get(
+                            user, url, {'page_size': page_size, 'pagination': 'offset'}
+                        )
+                    self.assertEqual(len(response.data['results']), page_size)
+
+    def test_retrieve(self):
+        url = f'/api/appointments/appointments/{self.appointments[0].id}/'
+        for user in (self.staff, self.customer):
+            with self.subTest(user=user.username):
+                # 预约及其关联对象 + 备注及工作人员
+                with self.assertNumQueries(2):
+                    response = self.get(user, url)
+                self.assertEqual(len(response.data['notes']), 2)
+
+    def test_transitions(self):
+        url = '/api/appointments/appointments/{}/{}/'
+        first, second = self.appointments[:2]
+        # 读取预约、更新状态，再把汇总从原状态的行移到新状态的行
+        # （新状态的行尚不存在，UPDATE 未命中后在保存点内 INSERT）；
+        # 完成和取消还会更新每日汇总的营收或取消数，并记录空出的时间段
+        with self.assertNumQueries(7):
+            self.post(self.staff, url.format(first.id, 'confirm'))
+        with self.assertNumQueries(9):
+            self.post(self.staff, url.format(first.id, 'complete'))
+        # 取消在事务中保存，测试中多出保存点的两条语句
+        with self.assertNumQueries(11):
+            self.post(self.customer, url.format(second.id, 'cancel'))
+
+    def test_dashboard(self):
+        # 统计查询每日汇总和客户表各一次，趋势查询汇总表一次，缓存命中时不查询数据库
+        for name, queries in (('statistics', 2), ('trend', 1),
+                              ('appointment_trend', 1), ('revenue_trend', 1)):
+            with self.subTest(endpoint=name):
+                url = f'/api/admin/dashboard/{name}/'
+                with self.assertNumQueries(queries):
+                    self.get(self.staff, url)
+                with self.assertNumQueries(0):
+                    self.get(self.staff, url)
+
+        for limit in (5, 50):
+            with self.subTest(endpoint='recent_appointments', limit=limit):
+                with self.assertNumQueries(1):
+                    response = self.get(
+                        self.staff,
+                        '/api/admin/dashboard/recent_appointments/',
+                        {'limit': limit}
+                    )
+                self.assertEqual(len(response.data), limit)
+
+
+class KeysetPaginationTests(BookingFixtureMixin, TestCase):
+    """游标分页向后、向前翻页都按完整排序返回，不重复也不遗漏"""
+
+    def test_next_and_previous(self):
+        book_appointments([
+            Appointment(
+                customer=self.customer, pet=self.pet, service=self.service,
+                date=self.day + timedelta(days=index // 3),
+                start_time=time(9 + index % 3), end_time=time(10 + index % 3),
+                total_price=Decimal('100'), dog_size=self.pet.size
+            )
+            for index in range(7)
+        ])
+        expected = [
+            str(appointment_id) for appointment_id in Appointment.objects.order_by(
+                '-date', '-start_time', 'id'
+            ).values_list('id', flat=True)
+        ]
+        client = self.client_for(self.customer)
+
+        pages = []
+        url = '/api/appointments/appointments/?page_size=3'
+        while url:
+            response = client.get(url)
+            pages.append([row['id'] for row in response.data['results']])
+            url = response.data['next']
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+
+        backwards = []
+        url = response.data['previous']
+        while url:
+            response = client.get(url)
+            backwards.append([row['id'] for row in response.data['results']])
+            url = response.data['previous']
+        self.assertEqual(backwards, pages[-2::-1])
+
+
+class ListRepresentationTests(BookingFixtureMixin, TestCase):
+    """列表接口的快速表示与原序列化器渲染出的 JSON 逐字节相同"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        pets = [cls.pet] + Pet.objects.bulk_create([
+            Pet(
+                owner=cls.customer, name='豆豆', breed='柯基', weight=Decimal('12.5'),
+                birthday=timezone.localdate() - timedelta(days=400), gender='F',
+                is_sterilized=True, photo='pets/doudou.jpg'
+            ),
+            Pet(
+                owner=cls.customer, name='大黄', weight=Decimal('30'),
+                birthday=timezone.localdate() - timedelta(days=45), gender='M'
+            ),
+        ])
+        priced = Service.objects.create(
+            name='美容', description='修剪造型', duration=90, image='services/groom.jpg'
+        )
+        ServicePrice.objects.create(
+            service=priced, dog_size=DogSize.LARGE, price=Decimal('320.50')
+        )
+        # 没有设置价格的服务
+        Service.objects.create(name='驱虫', duration=30, is_active=False)
+        appointments = book_appointments([
+            Appointment(
+                customer=cls.customer, pet=pet, service=cls.service, date=cls.day,
+                start_time=time(9 + index), end_time=time(10 + index),
+                total_price=Decimal('150.00'), dog_size=pet.size,
+                status=status
+            )
+            for index, (pet, status) in enumerate(zip(
+                pets, (AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED,
+                       AppointmentStatus.PENDING)
+            ))
+        ])
+        AppointmentNote.objects.bulk_create([
+            AppointmentNote(appointment=appointments[0], staff=cls.staff, note=note)
+            for note in ('已电话确认', '需要嘴套')
+        ])
+
+    def assertSameBytes(self, url, serializer_class, model):
+        response = self.client_for(self.customer).get(url, {'page_size': 50})
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        self.assertTrue(results)
+        objects = model.objects.in_bulk([row['id'] for row in results])
+        serialized = serializer_class(
+            [objects[model._meta.pk.to_python(row['id'])] for row in results],
+            many=True,
+            context={'request': response.wsgi_request}
+        ).data
+        renderer = JSONRenderer()
+        self.assertEqual(renderer.render(results), renderer.render(serialized))
+        return results
+
+    def test_appointments(self):
+        results = self.assertSameBytes(
+            '/api/appointments/appointments/', AppointmentSerializer, Appointment
+        )
+        self.assertIn(2, [len(row['notes']) for row in results])
+
+    def test_pets(self):
+        results = self.assertSameBytes('/api/pets/pets/', PetSerializer, Pet)
+        self.assertEqual(
+            {row['photo'] is None for row in results}, {True, False}
+        )
+        self.assertEqual({row['age'] is None for row in results}, {True, False})
+
+    def test_services(self):
+        results = self.assertSameBytes(
+            '/api/services/services/', ServiceSerializer, Service
+        )
+        self.assertEqual(
+            sorted(len(row['prices']) for row in results), [0, 1, 3]
+        )
+
+
+class ConcurrentBookingTests(BookingFixtureMixin, TransactionTestCase):
+    """多个线程同时预约重叠的时间段，只有互不重叠的预约成功，其余得到冲突"""
+    threads = 20
+
+    def setUp(self):
+        super().setUp()
+        self.create_fixtures()
+
+    def test_parallel_bookings_do_not_overlap(self):
+        # 60 分钟的服务，每隔 30 分钟一个开始时间，相邻请求两两重叠
+        start_times = [time(9 + index // 2 % 2, 30 * (index % 2)) for index in range(self.threads)]
+        barrier = threading.Barrier(self.threads)
+        results = []
+        errors = []
+
+        def book(start_time):
+            try:
+                barrier.wait()
+                appointment = Appointment(
+                    customer=self.customer,
+                    pet=self.pet,
+                    service=self.service,
+                    date=self.day,
+                    start_time=start_time,
+                    end_time=time(start_time.hour + 1, start_time.minute),
+                    total_price=Decimal('100.00'),
+                    dog_size=self.pet.size
+                )
+                book_appointment(appointment)
+                results.append('booked')
+            except BookingConflict:
+                results.append('conflict')
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        workers = [
+            threading.Thread(target=book, args=(start_time,))
+            for start_time in start_times
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), self.threads)
+        booked = sorted(Appointment.objects.filter(date=self.day).values_list(
+            'start_time', 'end_time'
+        ))
+        self.assertEqual(len(booked), results.count('booked'))
+        self.assertGreaterEqual(len(booked), 1)
+        # 未配置资源时同一时间只接待一个预约
+        for previous, current in zip(booked, booked[1:]):
+            self.assertLessEqual(previous[1], current[0])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN 只适用于 SQLite')
+class IndexUsageTests(BookingFixtureMixin, TestCase):
+    """热点查询由索引定位，而不是扫描整张表"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        customers = [cls.customer] + [
+            Customer.objects.create_user(
+                f'customer{index}@example.com', 'password', username=f'customer{index}'
+            )
+            for index in range(9)
+        ]
+        pets = [cls.pet] + [
+            Pet.objects.create(owner=customer, name='豆豆', weight=Decimal('5'), gender='F')
+            for customer in customers[1:]
+        ]
+        statuses = (
+            [AppointmentStatus.COMPLETED] * 6 +
+            [AppointmentStatus.CANCELLED, AppointmentStatus.NO_SHOW,
+             AppointmentStatus.PENDING, AppointmentStatus.CONFIRMED]
+        )
+        Appointment.objects.bulk_create([
+            Appointment(
+                customer=customers[index % 10],
+                pet=pets[index % 10],
+                service=cls.service,
+                date=cls.day + timedelta(days=index // 8 - 200),
+                start_time=time(9 + index % 8),
+                end_time=time(10 + index % 8),
+                status=statuses[index % 10],
+                total_price=Decimal('100.00'),
+                dog_size=DogSize.SMALL
+            )
+            for index in range(2000)
+        ])
+        # 让查询规划器按真实的数据分布选择索引
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def captured_selects(self, table, func):
+        """执行 func，返回其中读取 table 的 SELECT 语句"""
+        with CaptureQueriesContext(connection) as context:
+            func()
+        statements = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and f'FROM "{table}"' in query['sql']
+        ]
+        self.assertTrue(statements, f'没有读取 {table} 的查询')
+        return statements
+
+    def assertUsesIndex(self, sql, table, indexes):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            details = [row[-1] for row in cursor.fetchall()]
+        steps = [detail for detail in details if table in detail.split()]
+        self.assertTrue(steps, details)
+        for detail in steps:
+            self.assertRegex(
+                detail,
+                rf'^SEARCH {table} USING (COVERING )?INDEX ({"|".join(indexes)}) ',
+                details
+            )
+
+    def test_busy_rows_by_date_and_status(self):
+        # (date, status) 与游标分页的 (-date, -start_time, id) 都以日期开头，
+        # SQLite 按统计信息在两者之间选择
+        for date_filter in ({'date__in': [self.day]},
+                            {'date__range': (self.day, self.day + timedelta(days=13))}):
+            with self.subTest(date_filter=date_filter):
+                for sql in self.captured_selects(
+                    'appointments_appointment', lambda: load_busy_rows(date_filter)
+                ):
+                    self.assertUsesIndex(
+                        sql, 'appointments_appointment',
+                        ['appointment_date_status_idx', 'appointment_keyset_idx']
+                    )
+
+    def test_customer_list_by_date_and_status(self):
+        client = self.client_for(self.customer)
+        day = self.day - timedelta(days=100)
+        sql = self.captured_selects('appointments_appointment', lambda: client.get(
+            '/api/appointments/appointments/',
+            {'date': day.isoformat(), 'status': AppointmentStatus.COMPLETED}
+        ))[0]
+        self.assertUsesIndex(
+            sql, 'appointments_appointment', ['appointment_customer_date_idx']
+        )
+
+    def test_dashboard_created_at_ranges(self):
+        today = timezone.localdate()
+        statements = self.captured_selects(
+            'appointments_appointment',
+            lambda: rebuild_metrics(today - timedelta(days=30), today)
+        )
+        for sql in statements:
+            self.assertUsesIndex(
+                sql, 'appointments_appointment', ['appointment_created_idx']
+            )
+        statements = self.captured_selects(
+            'accounts_customer',
+            lambda: rebuild_metrics(today - timedelta(days=30), today)
+        )
+        for sql in statements:
+            self.assertUsesIndex(sql, 'accounts_customer', ['customer_keyset_idx'])
+
+
+class ConditionalRequestTests(BookingFixtureMixin, TestCase):
+    """可用时间段只用 ETag 验证，只带 If-Modified-Since 的请求总是得到最新数据"""
+
+    def test_slots_use_etag_only(self):
+        client = self.client_for(self.customer)
+        url = '/api/appointments/appointments/available_slots/'
+        params = {'date': self.day.isoformat(), 'service': str(self.service.id)}
+
+        response = client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+
+        self.assertEqual(client.get(url, params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(
+            client.get(
+                url, params, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+            ).status_code,
+            200
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.book(client, '09:00').status_code, 201)
+        response = client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ExportTests(BookingFixtureMixin, TestCase):
+    """导出的创建时间与接口一样使用本地时区，出错时返回 JSON"""
+
+    def test_created_at_in_local_time(self):
+        self.assertEqual(self.book(self.client_for(self.customer), '09:00').status_code, 201)
+        appointment = Appointment.objects.get()
+        client = self.client_for(self.staff)
+        expected = client.get(
+            f'/api/appointments/appointments/{appointment.id}/'
+        ).data['created_at']
+        self.assertEqual(
+            expected, timezone.localtime(appointment.created_at).isoformat()
+        )
+
+        url = '/api/appointments/appointments/export/'
+        response = client.get(url, {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        rows = list(csv.DictReader(
+            b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        ))
+        self.assertEqual(rows[0]['created_at'], expected)
+
+        response = client.get(url, {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        line = b''.join(response.streaming_content).decode('utf-8').splitlines()[0]
+        self.assertEqual(json.loads(line)['created_at'], expected)
+
+    def test_errors_are_json(self):
+        url = '/api/appointments/appointments/export/'
+        for export_format in ('csv', 'ndjson'):
+            with self.subTest(format=export_format):
+                response = self.client_for(self.customer).get(
+                    url, {'format': export_format}
+                )
+                self.assertEqual(response.status_code, 403)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertIn('error', json.loads(response.content))
+
+                response = self.client_for(self.staff).get(
+                    url, {'format': export_format, 'from': '2026-13-01'}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertIn('error', json.loads(response.content))
+
+                response = APIClient().get(url, {'format': export_format})
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['Content-Type'], 'application/json')
+
+
+class SlotStreamTests(BookingFixtureMixin, TestCase):
+    """同一天同一服务的连接共用观察者，变化只计算一次并以 delta 事件推送（进程内后端）"""
+
+    url = '/api/appointments/slots/stream/'
+
+    def book_and_publish(self, start_time):
+        # 测试事务不会提交，手动执行提交后的版本号更新和发布
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.book(self.client_for(self.customer), start_time)
+        self.assertEqual(response.status_code, 201)
+
+    async def test_watcher_fan_out(self):
+        with mock.patch.object(
+            SlotWatcher, 'load_slots', autospec=True,
+            side_effect=SlotWatcher.load_slots
+        ) as load_slots:
+            watcher, first = await SlotWatcher.join(self.day, self.service)
+            same, second = await SlotWatcher.join(self.day, self.service)
+            self.assertIs(same, watcher)
+            self.assertEqual(load_slots.call_count, 1)
+            self.assertIn(
+                {'start_time': '09:00:00', 'end_time': '10:00:00'}, watcher.snapshot()
+            )
+            self.assertEqual(broker.subscriber_count(slot_channel(self.day)), 1)
+
+            await sync_to_async(self.book_and_publish)('09:00')
+            deltas = [
+                await asyncio.wait_for(listener.get(), 5)
+                for listener in (first, second)
+            ]
+            self.assertEqual(load_slots.call_count, 2)
+
+        self.assertEqual(deltas[0], deltas[1])
+        self.assertEqual(deltas[0]['added'], [])
+        self.assertIn(
+            {'start_time': '09:00:00', 'end_time': '10:00:00'}, deltas[0]['removed']
+        )
+        self.assertNotIn(
+            {'start_time': '09:00:00', 'end_time': '10:00:00'}, watcher.snapshot()
+        )
+
+        watcher.leave(first)
+        self.assertIs(SlotWatcher.watchers.get(watcher.key), watcher)
+        watcher.leave(second)
+        self.assertNotIn(watcher.key, SlotWatcher.watchers)
+        self.assertEqual(broker.subscriber_count(slot_channel(self.day)), 0)
+
+    async def test_stream_events(self):
+        params = {'date': self.day.isoformat(), 'service': str(self.service.id)}
+        response = await self.async_client.get(self.url, params)
+        self.assertEqual(response.status_code, 401)
+
+        await self.async_client.aforce_login(self.customer)
+        response = await self.async_client.get(self.url, {'date': self.day.isoformat()})
+        self.assertEqual(response.status_code, 400)
+
+        response = await self.async_client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        stream = response.streaming_content
+        try:
+            event, data = (await anext(stream)).decode().split('\n')[:2]
+            self.assertEqual(event, 'event: slots')
+            snapshot = json.loads(data.removeprefix('data: '))
+            self.assertEqual(snapshot['date'], self.day.isoformat())
+            self.assertEqual(snapshot['service_id'], str(self.service.id))
+            self.assertIn(
+                {'start_time': '09:00:00', 'end_time': '10:00:00'},
+                snapshot['available_slots']
+            )
+
+            await sync_to_async(self.book_and_publish)('09:00')
+            chunk = (await asyncio.wait_for(anext(stream), 5)).decode()
+            self.assertTrue(chunk.endswith('\n\n'))
+            event, data = chunk.split('\n')[:2]
+            self.assertEqual(event, 'event: delta')
+            delta = json.loads(data.removeprefix('data: '))
+            self.assertEqual(delta['added'], [])
+            self.assertIn(
+                {'start_time': '09:00:00', 'end_time': '10:00:00'}, delta['removed']
+            )
+        finally:
+            await stream.aclose()
@@ -0,0 +1,73 @@
+# appointments/transitions.py
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.utils import timezone
+from .models import Appointment
+from .utils import AppointmentStatus
+
+# 操作: (目标状态, 允许的原状态)
+TRANSITIONS = {
+    'confirm': (AppointmentStatus.CONFIRMED, [AppointmentStatus.PENDING]),
+    'complete': (AppointmentStatus.COMPLETED, [AppointmentStatus.CONFIRMED]),
+    'cancel': (AppointmentStatus.CANCELLED, AppointmentStatus.ACTIVE),
+    'no_show': (AppointmentStatus.NO_SHOW, AppointmentStatus.ACTIVE),
+}
+
+# 一次批量操作最多处理的预约数
+MAX_BULK_TRANSITION = 200
+
+# 批量状态变化后发送一次，代替逐条的 post_save：
+# appointments_transitioned.send(
+#     sender=Appointment, transition='cancel', status='cancelled',
+#     appointments=[{'id', 'date', 'start_time', 'end_time', 'previous_status',
+#                    'created_at', 'service_id', 'dog_size', 'total_price'}, ...]
+# )
+# 与 post_save 一样在事务内发送，需要在提交后处理的接收者自行使用 on_commit
+appointments_transitioned = Signal()
+
+
+def transition_appointments(queryset, transition):
+    """
+    将 queryset 中处于允许状态的预约批量改为目标状态
+
+    先锁定并读取候选预约，再用一条带状态条件的 UPDATE 只更新 status 和 updated_at，
+    不逐条 save()。返回 (moved_ids, rejected)，rejected 为 [(id, 当前状态)]。
+    """
+    status, sources = TRANSITIONS[transition]
+    with transaction.atomic():
+        rows = list(queryset.select_for_update().values_list(
+            'id', 'status', 'date', 'start_time', 'end_time',
+            'created_at', 'service_id', 'dog_size', 'total_price'
+        ).order_by())
+        movable = [row for row in rows if row[1] in sources]
+        rejected = [(row[0], row[1]) for row in rows if row[1] not in sources]
+        if not movable:
+            return [], rejected
+
+        Appointment.objects.filter(
+            id__in=[row[0] for row in movable],
+            status__in=sources
+        ).update(status=status, updated_at=timezone.now())
+
+        appointments_transitioned.send(
+            sender=Appointment,
+            transition=transition,
+            status=status,
+            appointments=[
+                {
+                    'id': appointment_id,
+                    'date': day,
+                    'start_time': start_time,
+                    'end_time': end_time,
+                    'previous_status': previous_status,
+                    'created_at': created_at,
+                    'service_id': service_id,
+                    'dog_size': dog_size,
+                    'total_price': total_price,
+                }
+                for (appointment_id, previous_status, day, start_time, end_time,
+                     created_at, service_id, dog_size, total_price) in movable
+            ]
+        )
+    return [row[0] for row in movable], rejected
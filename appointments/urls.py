@@ -2,22 +2,39 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AppointmentViewSet
+from .views import AppointmentViewSet, AppointmentSeriesViewSet, WaitlistViewSet
+from .streams import slot_stream
 
 router = DefaultRouter()
 router.register('appointments', AppointmentViewSet, basename='appointment')
+router.register('series', AppointmentSeriesViewSet, basename='appointment-series')
+router.register('waitlist', WaitlistViewSet, basename='waitlist')
 
 app_name = 'appointments'
 
 urlpatterns = [
+    path('slots/stream/', slot_stream, name='slot-stream'),
     path('', include(router.urls)),
 ]
 
 # 这个配置会自动生成以下URL模式:
 # GET/POST          /api/appointments/appointments/          - 列表和创建
 # GET/PUT/DELETE    /api/appointments/appointments/{id}/    - 详情、更新和删除
+# POST             /api/appointments/appointments/bulk/     - 批量预约
+# POST             /api/appointments/appointments/hold/     - 结账期间临时保留时间段
+# POST             /api/appointments/appointments/bulk_confirm/  - 批量确认预约
+# POST             /api/appointments/appointments/bulk_complete/ - 批量完成预约
+# POST             /api/appointments/appointments/bulk_cancel/   - 批量取消预约
 # GET              /api/appointments/appointments/available_slots/ - 获取可用时间段
+# GET              /api/appointments/appointments/availability_calendar/ - 获取日期范围内的可用时间段
+# GET              /api/appointments/appointments/export/   - 流式导出预约 (format=csv|ndjson)
 # POST             /api/appointments/appointments/{id}/cancel/    - 取消预约
 # POST             /api/appointments/appointments/{id}/confirm/   - 确认预约
 # POST             /api/appointments/appointments/{id}/complete/  - 完成预约
-# POST             /api/appointments/appointments/{id}/add_note/  - 添加备注
\ No newline at end of file
+# POST             /api/appointments/appointments/{id}/add_note/  - 添加备注
+# GET (SSE)        /api/appointments/slots/stream/          - 可用时间段变化的事件流
+# GET/POST          /api/appointments/series/                - 周期预约列表和创建
+# POST             /api/appointments/series/{id}/cancel/     - 取消周期预约
+# GET/POST          /api/appointments/waitlist/              - 候补登记列表和创建
+# POST             /api/appointments/waitlist/{id}/accept/   - 接受保留的时间段并预约
+# POST             /api/appointments/waitlist/{id}/cancel/   - 取消候补登记
@@ -2,41 +2,52 @@
 
 from datetime import datetime, timedelta
 from django.utils import timezone
-from business_hours.models import BusinessHours
-from holidays.models import Holiday
+from .schedule import get_schedule
 
 class AppointmentStatus:
     PENDING = 'pending'      # 待确认
     CONFIRMED = 'confirmed'  # 已确认
     COMPLETED = 'completed'  # 已完成
     CANCELLED = 'cancelled'  # 已取消
+    NO_SHOW = 'no_show'      # 未到店
     
     CHOICES = [
         (PENDING, '待确认'),
         (CONFIRMED, '已确认'),
         (COMPLETED, '已完成'),
         (CANCELLED, '已取消'),
+        (NO_SHOW, '未到店'),
+    ]
+
+    # 仍然占用时间段的状态
+    ACTIVE = [PENDING, CONFIRMED]
+
+class WaitlistStatus:
+    WAITING = 'waiting'      # 等待中
+    OFFERED = 'offered'      # 已为其保留空位，等待确认
+    BOOKED = 'booked'        # 已预约
+    EXPIRED = 'expired'      # 保留超时
+    CANCELLED = 'cancelled'  # 已取消
+    
+    CHOICES = [
+        (WAITING, '等待中'),
+        (OFFERED, '待确认'),
+        (BOOKED, '已预约'),
+        (EXPIRED, '已过期'),
+        (CANCELLED, '已取消'),
     ]
 
 def get_available_time_slots(date, service_duration):
     """获取指定日期的可用时间段"""
-    # 检查是否是假期
-    if Holiday.objects.filter(
-        start_date__lte=date,
-        end_date__gte=date
-    ).exists():
+    # 假期、不营业或未设置营业时间的日期没有可用时间段
+    business_hours = get_schedule().get_open_hours(date)
+    if business_hours is None:
         return []
     
-    # 获取营业时间
-    weekday = date.isoweekday()
-    try:
-        business_hours = BusinessHours.objects.get(weekday=weekday)
-        if not business_hours.is_open:
-            return []
-    except BusinessHours.DoesNotExist:
-        return []
-    
-    # 生成时间段
+    return generate_time_slots(date, business_hours, service_duration)
+
+def generate_time_slots(date, business_hours, service_duration):
+    """根据营业时间生成指定日期的候选时间段"""
     slots = []
     current_time = datetime.combine(date, business_hours.start_time)
     end_time = datetime.combine(date, business_hours.end_time)
@@ -54,31 +65,30 @@ def is_valid_appointment_time(date, start_time, service_duration):
     """验证预约时间是否有效"""
     # 检查是否是过去的时间
     now = timezone.now()
-    appointment_datetime = datetime.combine(date, start_time)
+    appointment_datetime = timezone.make_aware(
+        datetime.combine(date, start_time)
+    )
     if appointment_datetime < now:
         return False, "不能预约过去的时间"
     
+    schedule = get_schedule()
+    
     # 检查是否是假期
-    if Holiday.objects.filter(
-        start_date__lte=date,
-        end_date__gte=date
-    ).exists():
+    if schedule.is_holiday(date):
         return False, "该日期为假期，不接受预约"
     
     # 检查是否在营业时间内
-    weekday = date.isoweekday()
-    try:
-        business_hours = BusinessHours.objects.get(weekday=weekday)
-        if not business_hours.is_open:
-            return False, "该日期不营业"
-            
-        end_time = (datetime.combine(date, start_time) + 
-                   timedelta(minutes=service_duration)).time()
-        
-        if (start_time < business_hours.start_time or 
-            end_time > business_hours.end_time):
-            return False, "预约时间超出营业时间范围"
-    except BusinessHours.DoesNotExist:
+    business_hours = schedule.get_business_hours(date)
+    if business_hours is None:
         return False, "该日期没有设置营业时间"
+    if not business_hours.is_open:
+        return False, "该日期不营业"
+        
+    end_time = (datetime.combine(date, start_time) + 
+               timedelta(minutes=service_duration)).time()
+    
+    if (start_time < business_hours.start_time or 
+        end_time > business_hours.end_time):
+        return False, "预约时间超出营业时间范围"
     
     return True, "预约时间有效"
\ No newline at end of file
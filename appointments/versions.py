@@ -0,0 +1,85 @@
+# appointments/versions.py
+
+import time
+from django.core.cache import cache
+from django.db import transaction
+from core.pubsub import broker
+from core.versions import bump_versions, bump_versions_on_commit
+
+HOLD_EXPIRY_KEY_PREFIX = 'hold-expiry:'
+
+
+def date_version_name(day):
+    """某天预约数据的版本号名称"""
+    return f'appointments:{day.isoformat()}'
+
+
+def slot_channel(day):
+    """某天可用时间段变化的发布订阅频道"""
+    return f'slots:{day.isoformat()}'
+
+
+def appointment_dates_changed(days):
+    """
+    预约新增、修改或删除后，在事务提交时更新相关日期的版本号，
+    并通知订阅了这些日期可用时间段的连接
+    """
+    days = set(days)
+    bump_versions_on_commit({date_version_name(day) for day in days})
+    for day in days:
+        broker.publish_on_commit(slot_channel(day), {'date': day.isoformat()})
+
+
+def _hold_expiry_key(day):
+    return f'{HOLD_EXPIRY_KEY_PREFIX}{day.isoformat()}'
+
+
+def _to_ns(value):
+    return int(value.timestamp() * 1_000_000) * 1000
+
+
+def hold_expiry_recorded(day, expires_at):
+    """
+    在事务提交后记录某天保留的过期时间
+
+    保留过期时没有任何写操作，版本号不会变化；记录下的过期时间
+    由 apply_hold_expiries 视为当时发生的修改。已过去的过期时间
+    在这里合并进日期版本号，列表只保留尚未到期的部分。
+    """
+    def record():
+        now = time.time_ns()
+        key = _hold_expiry_key(day)
+        pending = cache.get(key) or []
+        if any(expiry <= now for expiry in pending):
+            bump_versions([date_version_name(day)])
+        pending = [expiry for expiry in pending if expiry > now]
+        pending.append(_to_ns(expires_at))
+        cache.set(key, pending, timeout=None)
+
+    transaction.on_commit(record)
+
+
+def apply_hold_expiries(versions, days):
+    """
+    将已到期的保留计入日期版本号，versions 为 get_versions 的结果
+
+    只多一次缓存读取，不查询数据库。
+    """
+    now = time.time_ns()
+    found = cache.get_many([_hold_expiry_key(day) for day in days])
+    for day in days:
+        expired = [
+            expiry for expiry in found.get(_hold_expiry_key(day), ())
+            if expiry <= now
+        ]
+        if expired:
+            name = date_version_name(day)
+            versions[name] = max(versions[name], max(expired))
+    return versions
+
+
+async def anext_hold_expiry(day):
+    """某天尚未到期的最早保留过期时间（纳秒时间戳），没有时返回 None"""
+    now = time.time_ns()
+    pending = await cache.aget(_hold_expiry_key(day)) or []
+    return min((expiry for expiry in pending if expiry > now), default=None)
@@ -5,21 +5,70 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.utils import timezone
-from django.db.models import Q
-from datetime import datetime
-from .models import Appointment, AppointmentNote
+from django.http import StreamingHttpResponse
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Q, Prefetch
+from datetime import datetime, timedelta
+from .models import (
+    Appointment,
+    AppointmentNote,
+    AppointmentSeries,
+    WaitlistEntry,
+)
 from .serializers import (
     AppointmentSerializer,
     AppointmentDetailSerializer,
-    AppointmentNoteSerializer
+    AppointmentListRepresentation,
+    AppointmentNoteSerializer,
+    AppointmentBulkSerializer,
+    AppointmentIdsSerializer,
+    AppointmentSeriesSerializer,
+    SlotHoldCreateSerializer,
+    SlotHoldSerializer,
+    WaitlistEntrySerializer
+)
+from .utils import AppointmentStatus, WaitlistStatus
+from .availability import get_available_slots_by_date
+from .booking import BookingConflict, book_appointment
+from .recurrence import materialize_series
+from .transitions import transition_appointments
+from .versions import apply_hold_expiries, date_version_name
+from .waitlist import release_hold
+from .schedule import SCHEDULE_VERSION
+from .export import (
+    CSVRenderer,
+    NDJSONRenderer,
+    iter_export_rows,
+    stream_csv,
+    stream_ndjson
 )
-from .utils import AppointmentStatus, get_available_time_slots
 from services.models import Service
+from services.pricing import get_price_matrix
+from core.pagination import KeysetPagination
+from core.representation import ValuesListMixin
+from core.conditional import (
+    make_etag,
+    not_modified,
+    set_validators
+)
+from core.versions import get_versions
+from services.signals import CATALOG_VERSION
+from resources.signals import RESOURCES_VERSION
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+# 可用日历一次最多查询的天数
+MAX_CALENDAR_DAYS = 60
+
+class AppointmentPagination(KeysetPagination):
+    """预约列表按预约时间倒序的游标分页"""
+    ordering = ('-date', '-start_time', 'id')
+
+class AppointmentViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """预约管理视图集"""
     serializer_class = AppointmentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AppointmentPagination
+    list_representation_class = AppointmentListRepresentation
 
     def get_queryset(self):
         """
@@ -28,7 +77,18 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         - 普通用户只能看到自己的预约
         """
         user = self.request.user
-        queryset = Appointment.objects.all()
+        queryset = Appointment.objects.select_related(
+            'pet', 'service', 'resource'
+        )
+        
+        # 列表和详情需要序列化备注及其工作人员，一次性预取
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'staff_notes',
+                    queryset=AppointmentNote.objects.select_related('staff')
+                )
+            )
         
         # 如果不是管理员，只能看到自己的预约
         if not user.is_staff:
@@ -52,12 +112,89 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             
         return queryset.order_by('-date', '-start_time')
 
+    def handle_exception(self, exc):
+        """预约时间冲突统一返回 409"""
+        if isinstance(exc, BookingConflict):
+            data = {"error": str(exc)}
+            if exc.conflicts:
+                data["conflicts"] = exc.conflicts
+            return Response(data, status=status.HTTP_409_CONFLICT)
+        return super().handle_exception(exc)
+
     def get_serializer_class(self):
         """根据操作类型返回不同的序列化器"""
         if self.action == 'retrieve':
             return AppointmentDetailSerializer
         return AppointmentSerializer
 
+    def _availability_validators(self, request, days):
+        """
+        可用时间段的缓存验证信息
+        
+        响应只取决于相关日期的预约和保留、营业日程、服务目录和资源配置，
+        各版本号一次缓存读取取出，与请求路径一起生成 ETag。
+        """
+        versions = apply_hold_expiries(get_versions(
+            [date_version_name(day) for day in days] +
+            [SCHEDULE_VERSION, CATALOG_VERSION, RESOURCES_VERSION]
+        ), days)
+        etag = make_etag(
+            request.get_full_path(),
+            *sorted(versions.items())
+        )
+        return etag
+
+    @action(detail=False, methods=['post'])
+    def hold(self, request):
+        """
+        在结账期间临时保留时间段
+        参数:
+        - service: 服务ID
+        - date: 日期 (YYYY-MM-DD)
+        - start_time: 开始时间
+        - minutes: 保留分钟数，默认10，最多30
+        
+        保留期间其他客户不能预约该时间段；预约时传入 hold 或使用相同的
+        服务、日期和开始时间即可消费保留。同一客户同时只保留一个时间段。
+        """
+        serializer = SlotHoldCreateSerializer(
+            data=request.data,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        hold = serializer.save()
+        return Response(
+            SlotHoldSerializer(hold).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        批量预约（多只宠物或多个服务一次提交）
+        参数:
+        - appointments: 预约列表，每项包含 pet、service、date、start_time、notes
+        
+        所有预约在同一个事务中写入，任何一项失败则全部不创建。
+        """
+        serializer = AppointmentBulkSerializer(
+            data=request.data,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        appointments = serializer.save()
+        
+        # 重新查询以一次性带出宠物、服务和备注
+        appointments = Appointment.objects.filter(
+            id__in=[appointment.id for appointment in appointments]
+        ).select_related('pet', 'service', 'resource').prefetch_related(
+            'staff_notes__staff'
+        ).order_by('date', 'start_time')
+        return Response(
+            AppointmentSerializer(appointments, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
+
     @action(detail=False, methods=['get'])
     def available_slots(self, request):
         """
@@ -80,18 +217,11 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         try:
             # 转换日期格式
             date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            # 获取服务信息
-            service = Service.objects.get(id=service_id)
         except ValueError:
             return Response(
                 {"error": "无效的日期格式"},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        except Service.DoesNotExist:
-            return Response(
-                {"error": "服务不存在"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
             
         # 检查日期是否是过去的日期
         if date < timezone.now().date():
@@ -100,76 +230,248 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # 获取可用时间段
-        available_slots = get_available_time_slots(date, service.duration)
+        # 数据未变化时直接返回 304，不执行查询
+        etag = self._availability_validators(request, [date])
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
         
-        # 获取已存在的预约
-        existing_appointments = Appointment.objects.filter(
-            date=date,
-            status__in=[
-                AppointmentStatus.PENDING,
-                AppointmentStatus.CONFIRMED
-            ]
-        )
+        try:
+            # 获取服务信息
+            service = Service.objects.get(id=service_id)
+        except (Service.DoesNotExist, DjangoValidationError):
+            return Response(
+                {"error": "服务不存在"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # 从可用时间段中移除已被预约的时间
-        filtered_slots = []
-        for slot in available_slots:
-            is_available = True
-            slot_start = datetime.combine(date, slot['start_time'])
-            slot_end = datetime.combine(date, slot['end_time'])
-            
-            for appointment in existing_appointments:
-                appt_start = datetime.combine(
-                    date, 
-                    appointment.start_time
-                )
-                appt_end = datetime.combine(
-                    date, 
-                    appointment.end_time
-                )
-                
-                # 检查是否有重叠
-                if not (slot_end <= appt_start or slot_start >= appt_end):
-                    is_available = False
-                    break
-            
-            if is_available:
-                filtered_slots.append(slot)
+        # 获取可用时间段（已排除当天被预约的时间）
+        filtered_slots = get_available_slots_by_date(
+            date, date, service
+        )[date]
         
-        return Response({
+        return set_validators(Response({
             'date': date_str,
             'service_id': service_id,
             'service_name': service.name,
             'service_duration': service.duration,
             'available_slots': filtered_slots
+        }), etag)
+
+    @action(detail=False, methods=['get'])
+    def availability_calendar(self, request):
+        """
+        获取日期范围内每天的可用时间段，供月历选择器一次性加载
+        参数:
+        - service: 服务ID
+        - start: 开始日期 (YYYY-MM-DD)
+        - end: 结束日期 (YYYY-MM-DD)，与开始日期间隔不超过60天
+        """
+        service_id = request.query_params.get('service')
+        start_str = request.query_params.get('start')
+        end_str = request.query_params.get('end')
+        
+        if not service_id or not start_str or not end_str:
+            return Response(
+                {"error": "必须提供服务ID、开始日期和结束日期"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
+        except ValueError:
+            return Response(
+                {"error": "无效的日期格式"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if start_date > end_date:
+            return Response(
+                {"error": "开始日期不能晚于结束日期"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if end_date - start_date >= timedelta(days=MAX_CALENDAR_DAYS):
+            return Response(
+                {"error": f"查询范围不能超过{MAX_CALENDAR_DAYS}天"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # 过去的日期不再提供时间段
+        today = timezone.now().date()
+        if end_date < today:
+            return Response(
+                {"error": "不能选择过去的日期"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        start_date = max(start_date, today)
+        
+        # 数据未变化时直接返回 304，不执行查询
+        etag = self._availability_validators(request, [
+            start_date + timedelta(days=offset)
+            for offset in range((end_date - start_date).days + 1)
+        ])
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        
+        try:
+            service = Service.objects.get(id=service_id)
+        except (Service.DoesNotExist, DjangoValidationError):
+            return Response(
+                {"error": "服务不存在"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        slots_by_date = get_available_slots_by_date(
+            start_date, end_date, service
+        )
+        
+        return set_validators(Response({
+            'service_id': service_id,
+            'service_name': service.name,
+            'service_duration': service.duration,
+            'start': start_date.strftime('%Y-%m-%d'),
+            'end': end_str,
+            'days': [
+                {
+                    'date': day.strftime('%Y-%m-%d'),
+                    'available_slots': slots
+                }
+                for day, slots in slots_by_date.items()
+            ]
+        }), etag)
+
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[CSVRenderer, NDJSONRenderer]
+    )
+    def export(self, request):
+        """
+        导出预约数据（仅限管理员），以流式响应边查询边输出
+        参数:
+        - from: 开始日期 (YYYY-MM-DD)，可选
+        - to: 结束日期 (YYYY-MM-DD)，可选
+        - format: csv（默认）或 ndjson
+        """
+        if not request.user.is_staff:
+            return Response(
+                {"error": "只有工作人员能导出预约"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        queryset = Appointment.objects.all()
+        try:
+            if request.query_params.get('from'):
+                queryset = queryset.filter(date__gte=datetime.strptime(
+                    request.query_params['from'], '%Y-%m-%d'
+                ).date())
+            if request.query_params.get('to'):
+                queryset = queryset.filter(date__lte=datetime.strptime(
+                    request.query_params['to'], '%Y-%m-%d'
+                ).date())
+        except ValueError:
+            return Response(
+                {"error": "无效的日期格式"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        renderer = request.accepted_renderer
+        stream = stream_csv if renderer.format == 'csv' else stream_ndjson
+        response = StreamingHttpResponse(
+            stream(iter_export_rows(queryset)),
+            content_type=f'{renderer.media_type}; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="appointments.{renderer.format}"'
+        )
+        return response
+
+    def _bulk_transition(self, request, transition):
+        """
+        批量修改预约状态
+        
+        只处理当前用户可见的预约，一条带状态条件的 UPDATE 完成修改，
+        返回已修改的ID和未修改的ID及原因。
+        """
+        serializer = AppointmentIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        
+        moved, rejected = transition_appointments(
+            self.get_queryset().filter(id__in=ids),
+            transition
+        )
+        status_display = dict(AppointmentStatus.CHOICES)
+        reasons = {
+            appointment_id: f"当前状态为{status_display[current]}，无法执行该操作"
+            for appointment_id, current in rejected
+        }
+        moved_set = set(moved)
+        return Response({
+            'moved': [
+                appointment_id for appointment_id in ids
+                if appointment_id in moved_set
+            ],
+            'rejected': [
+                {
+                    'id': appointment_id,
+                    'reason': reasons.get(appointment_id, "预约不存在")
+                }
+                for appointment_id in ids
+                if appointment_id not in moved_set
+            ]
         })
 
+    @action(detail=False, methods=['post'])
+    def bulk_confirm(self, request):
+        """批量确认待确认的预约（仅限管理员），参数 ids 为预约ID列表"""
+        if not request.user.is_staff:
+            return Response(
+                {"error": "只有工作人员能确认预约"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return self._bulk_transition(request, 'confirm')
+
+    @action(detail=False, methods=['post'])
+    def bulk_complete(self, request):
+        """批量完成已确认的预约（仅限管理员），参数 ids 为预约ID列表"""
+        if not request.user.is_staff:
+            return Response(
+                {"error": "只有工作人员能完成预约"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return self._bulk_transition(request, 'complete')
+
+    @action(detail=False, methods=['post'])
+    def bulk_cancel(self, request):
+        """批量取消预约，普通用户只能取消自己的预约，参数 ids 为预约ID列表"""
+        return self._bulk_transition(request, 'cancel')
+
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """取消预约"""
         appointment = self.get_object()
         
         # 检查是否可以取消
-        if appointment.status not in [
-            AppointmentStatus.PENDING,
-            AppointmentStatus.CONFIRMED
-        ]:
+        if appointment.status not in AppointmentStatus.ACTIVE:
             return Response(
                 {"error": "该预约状态无法取消"},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
         # 检查是否有权限取消
-        if not request.user.is_staff and appointment.customer != request.user:
+        if not request.user.is_staff and appointment.customer_id != request.user.id:
             return Response(
                 {"error": "没有权限取消此预约"},
                 status=status.HTTP_403_FORBIDDEN
             )
             
-        # 取消预约
+        # 取消预约，空出的时间段与取消在同一事务中记录
         appointment.status = AppointmentStatus.CANCELLED
-        appointment.save()
+        with transaction.atomic():
+            appointment.save(update_fields=['status', 'updated_at'])
         
         return Response({
             "message": "预约已成功取消",
@@ -196,7 +498,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             
         # 确认预约
         appointment.status = AppointmentStatus.CONFIRMED
-        appointment.save()
+        appointment.save(update_fields=['status', 'updated_at'])
         
         return Response({
             "message": "预约已确认",
@@ -223,7 +525,7 @@ class AppointmentViewSet(viewsets.ModelViewSet):
             
         # 完成预约
         appointment.status = AppointmentStatus.COMPLETED
-        appointment.save()
+        appointment.save(update_fields=['status', 'updated_at'])
         
         return Response({
             "message": "预约已完成",
@@ -254,4 +556,152 @@ class AppointmentViewSet(viewsets.ModelViewSet):
         return Response(
             serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        )
+
+class AppointmentSeriesViewSet(viewsets.ModelViewSet):
+    """周期预约视图集"""
+    serializer_class = AppointmentSeriesSerializer
+    permission_classes = [IsAuthenticated]
+    # 规则生效后不支持修改，需取消后重新创建
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def get_queryset(self):
+        """管理员可以看到所有周期预约，普通用户只能看到自己的"""
+        queryset = AppointmentSeries.objects.select_related('pet', 'service')
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(customer=self.request.user)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        """创建周期预约，并生成滚动窗口内的具体预约"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        series = serializer.save()
+        
+        try:
+            created, conflicts = materialize_series(series)
+        except BookingConflict as exc:
+            return Response(
+                {"error": str(exc)},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return Response({
+            'series': self.get_serializer(series).data,
+            'appointments': [
+                {
+                    'id': appointment.id,
+                    'date': appointment.date.strftime('%Y-%m-%d'),
+                    'start_time': appointment.start_time.strftime('%H:%M'),
+                    'end_time': appointment.end_time.strftime('%H:%M'),
+                    'total_price': appointment.total_price
+                }
+                for appointment in created
+            ],
+            'conflicts': [
+                {
+                    'date': conflict['date'].strftime('%Y-%m-%d'),
+                    'reason': conflict['reason']
+                }
+                for conflict in conflicts
+            ]
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """取消周期预约，同时取消其尚未发生的预约"""
+        series = self.get_object()
+        series.is_active = False
+        series.save(update_fields=['is_active', 'updated_at'])
+        
+        cancelled, _ = transition_appointments(
+            series.appointments.filter(
+                date__gte=timezone.localdate(),
+                status__in=AppointmentStatus.ACTIVE
+            ),
+            'cancel'
+        )
+        
+        return Response({
+            "message": "周期预约已取消",
+            "series_id": series.id,
+            "cancelled_appointments": len(cancelled)
+        })
+
+class WaitlistViewSet(viewsets.ModelViewSet):
+    """候补登记视图集"""
+    serializer_class = WaitlistEntrySerializer
+    permission_classes = [IsAuthenticated]
+    # 登记后不支持修改，需取消后重新登记
+    http_method_names = ['get', 'post', 'head', 'options']
+
+    def get_queryset(self):
+        """管理员可以看到所有候补登记，普通用户只能看到自己的"""
+        queryset = WaitlistEntry.objects.select_related('pet', 'service', 'hold')
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(customer=self.request.user)
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def accept(self, request, pk=None):
+        """接受为候补保留的时间段，完成预约"""
+        entry = self.get_object()
+        hold = entry.hold
+        if entry.status != WaitlistStatus.OFFERED or hold is None:
+            return Response(
+                {"error": "该候补没有待确认的时间段"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        dog_size = entry.pet.size
+        price = get_price_matrix().get_price(entry.service_id, dog_size)
+        if price is None:
+            return Response(
+                {"error": "该服务未设置对应体型的价格"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        appointment = Appointment(
+            customer_id=entry.customer_id,
+            pet=entry.pet,
+            service=entry.service,
+            date=hold.date,
+            start_time=hold.start_time,
+            end_time=hold.end_time,
+            total_price=price,
+            dog_size=dog_size
+        )
+        try:
+            book_appointment(appointment, hold=hold)
+        except BookingConflict as exc:
+            return Response(
+                {"error": str(exc)},
+                status=status.HTTP_409_CONFLICT
+            )
+        # 登记由 book_appointment 在消费保留的同一事务中改为已预约
+        
+        return Response(
+            AppointmentSerializer(appointment).data,
+            status=status.HTTP_201_CREATED
+        )
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """取消候补登记，已保留的时间段顺延给下一位候补"""
+        entry = self.get_object()
+        hold = entry.hold
+        # 已保留的时间段由 release_hold 记录，顺延给下一位候补
+        released = hold is not None and release_hold(hold, WaitlistStatus.CANCELLED)
+        if not released and not WaitlistEntry.objects.filter(
+            id=entry.id,
+            status=WaitlistStatus.WAITING
+        ).update(status=WaitlistStatus.CANCELLED, updated_at=timezone.now()):
+            return Response(
+                {"error": "该候补登记状态无法取消"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            "message": "候补登记已取消",
+            "waitlist_id": entry.id
+        })
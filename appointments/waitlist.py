@@ -0,0 +1,172 @@
+# appointments/waitlist.py
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import FreedSlot, SlotHold, WaitlistEntry
+from .availability import (
+    NoResourceAvailable,
+    load_resource_pools,
+    time_to_seconds,
+)
+from .booking import run_locked
+from .holds import create_hold
+from .schedule import get_schedule
+from .utils import WaitlistStatus, generate_time_slots
+from .versions import appointment_dates_changed
+
+# 为候补客户保留空位的分钟数，超时后依次顺延给下一位
+WAITLIST_OFFER_MINUTES = 15
+# 每个空出的时间段最多检查的候补登记数
+WAITLIST_MATCH_LIMIT = 50
+
+# 候补匹配在后台线程中执行，不占用取消预约请求的响应时间；
+# 单线程按提交顺序处理，同一时间段不会被并发匹配
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='waitlist')
+
+
+def slots_freed(slots):
+    """
+    记录空出的时间段，slots 为 (date, start_time, end_time) 序列
+
+    应在释放时间段的事务中调用：空出的时间段与取消、改期一起提交，
+    提交后交给后台线程匹配候补，调用方无需等待。后台线程的任务随进程退出丢失时，
+    仍未处理的时间段由 process_waitlist 补处理。已经开始的时间段直接忽略。
+    """
+    now = timezone.localtime()
+    slots = [
+        FreedSlot(date=day, start_time=start_time, end_time=end_time)
+        for day, start_time, end_time in slots
+        if (day, start_time) > (now.date(), now.time())
+    ]
+    if slots:
+        FreedSlot.objects.bulk_create(slots)
+        transaction.on_commit(lambda: _executor.submit(_process))
+
+
+def _process():
+    """后台线程的入口：为已记录的空出时间段匹配候补"""
+    close_old_connections()
+    try:
+        backfill_freed_slots()
+    finally:
+        close_old_connections()
+
+
+def backfill_freed_slots():
+    """
+    依次为已记录的空出时间段匹配候补，匹配后删除记录，返回处理的数量
+
+    backfill_slot 在锁定当天的事务中只分配仍然空闲的资源，同一时间段被重复处理
+    （后台线程和定时任务同时运行，或删除记录前进程退出）不会重复保留。
+    """
+    processed = 0
+    for slot in FreedSlot.objects.all():
+        backfill_slot(slot.date, slot.start_time, slot.end_time)
+        FreedSlot.objects.filter(id=slot.id).delete()
+        processed += 1
+    return processed
+
+
+def _candidate_slots(entry, day, hours, start_time, end_time, now):
+    """候补登记在空出的 [start_time, end_time) 内可以接受的时间段"""
+    for slot in generate_time_slots(day, hours, entry.duration):
+        if slot['start_time'] < start_time or slot['end_time'] > end_time:
+            continue
+        if entry.earliest_start and slot['start_time'] < entry.earliest_start:
+            continue
+        if entry.latest_start and slot['start_time'] > entry.latest_start:
+            continue
+        if timezone.make_aware(datetime.combine(day, slot['start_time'])) <= now:
+            continue
+        yield slot
+
+
+def backfill_slot(day, start_time, end_time):
+    """
+    为空出的时间段寻找候补，返回获得保留的登记，没有合适的候补时返回 None
+
+    先用索引按状态、日期范围和服务时长筛选候补登记，只有放得进该时间段的
+    登记才会被取出；再按登记顺序逐个检查开始时间偏好和资源技能，
+    为第一个能安排的客户保留时间段。
+    """
+    hours = get_schedule().get_open_hours(day)
+    if hours is None:
+        return None
+
+    length = (time_to_seconds(end_time) - time_to_seconds(start_time)) // 60
+    candidates = list(WaitlistEntry.objects.filter(
+        Q(latest_start__isnull=True) | Q(latest_start__gte=start_time),
+        status=WaitlistStatus.WAITING,
+        date_from__lte=day,
+        date_to__gte=day,
+        duration__lte=length
+    ).order_by('created_at')[:WAITLIST_MATCH_LIMIT])
+    if not candidates:
+        return None
+
+    def offer():
+        now = timezone.now()
+        pool = load_resource_pools([day])[day]
+        for entry in candidates:
+            for slot in _candidate_slots(entry, day, hours, start_time, end_time, now):
+                try:
+                    resource_id = pool.allocate(
+                        entry.service_id,
+                        slot['start_time'],
+                        slot['end_time']
+                    )
+                except NoResourceAvailable:
+                    continue
+                # 登记可能已被客户取消，只更新仍在等待的登记
+                hold = create_hold(
+                    entry.customer_id, entry.service_id, resource_id, day,
+                    slot['start_time'], slot['end_time'],
+                    now + timedelta(minutes=WAITLIST_OFFER_MINUTES)
+                )
+                if not WaitlistEntry.objects.filter(
+                    id=entry.id,
+                    status=WaitlistStatus.WAITING
+                ).update(status=WaitlistStatus.OFFERED, hold=hold, updated_at=now):
+                    hold.delete()
+                    break
+                return entry
+        return None
+
+    return run_locked([day], offer)
+
+
+def release_hold(hold, entry_status):
+    """
+    删除仍然存在的候补保留并更新登记状态，返回是否由本次操作删除
+
+    删除成功的一方在同一事务中记录空出的时间段，顺延给下一位候补。
+    """
+    with transaction.atomic():
+        deleted, _ = SlotHold.objects.filter(id=hold.id).delete()
+        if not deleted:
+            return False
+        WaitlistEntry.objects.filter(
+            id=hold.waitlist_entry.id,
+            status=WaitlistStatus.OFFERED
+        ).update(status=entry_status, updated_at=timezone.now())
+        appointment_dates_changed([hold.date])
+        slots_freed([(hold.date, hold.start_time, hold.end_time)])
+    return True
+
+
+def expire_offers():
+    """
+    回收已过期的候补保留，空出的时间段记录后顺延给下一位候补
+
+    只按过期时间索引读取已过期的保留，返回回收的保留数量。
+    """
+    expired = SlotHold.objects.filter(
+        expires_at__lte=timezone.now(),
+        waitlist_entry__isnull=False
+    ).select_related('waitlist_entry')
+    return sum(
+        release_hold(hold, WaitlistStatus.EXPIRED) for hold in expired
+    )
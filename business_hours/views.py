@@ -5,12 +5,21 @@ from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from datetime import datetime, timedelta
+from core.conditional import (
+    make_etag,
+    not_modified,
+    set_validators
+)
+from core.versions import get_version
+from appointments.schedule import SCHEDULE_VERSION
 from .models import BusinessHours
 from .serializers import BusinessHoursSerializer
 
 class BusinessHoursViewSet(viewsets.ModelViewSet):
     queryset = BusinessHours.objects.all()
     serializer_class = BusinessHoursSerializer
+    # 每周固定 7 条记录，不分页
+    pagination_class = None
     
     def get_permissions(self):
         """仅管理员可以修改营业时间，其他用户可以查看"""
@@ -25,11 +34,18 @@ class BusinessHoursViewSet(viewsets.ModelViewSet):
         start_of_week = today - timedelta(days=today.weekday())
         end_of_week = start_of_week + timedelta(days=6)
         
+        # 营业时间未变化且仍在同一周时直接返回 304
+        version = get_version(SCHEDULE_VERSION)
+        etag = make_etag(request.get_full_path(), start_of_week.date(), version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        
         business_hours = self.get_queryset()
         serializer = self.get_serializer(business_hours, many=True)
         
-        return Response({
+        return set_validators(Response({
             'start_date': start_of_week.date(),
             'end_date': end_of_week.date(),
             'business_hours': serializer.data
-        })
\ No newline at end of file
+        }), etag)
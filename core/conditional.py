@@ -0,0 +1,37 @@
+# core/conditional.py
+
+import hashlib
+from django.utils.cache import get_conditional_response
+
+
+def make_etag(*parts):
+    """由版本号和请求参数生成强 ETag"""
+    digest = hashlib.md5(
+        '|'.join(str(part) for part in parts).encode(),
+        usedforsecurity=False
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified(request, etag):
+    """
+    客户端缓存仍然有效（If-None-Match 匹配）时返回 304 响应，否则返回 None
+
+    应在执行查询和序列化之前调用。
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        set_validators(response, etag)
+    return response
+
+
+def set_validators(response, etag):
+    """
+    为响应设置 ETag，并要求客户端每次使用前重新验证
+
+    不发送 Last-Modified：它只精确到秒，同一秒内的修改会让只带 If-Modified-Since
+    的客户端得到过期的 304；部分响应还随当天日期变化，与版本号的时间无关。
+    """
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
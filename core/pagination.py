@@ -0,0 +1,158 @@
+# core/pagination.py
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
+
+
+class StandardPageNumberPagination(PageNumberPagination):
+    """页码分页，可通过 page_size 参数调整每页数量"""
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+
+
+def _encode_value(value):
+    """将排序字段的值转换为可写入游标的字符串"""
+    if isinstance(value, (date, time, datetime)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def _reverse_ordering(ordering):
+    """翻转排序字段的方向，用于向前翻页"""
+    return tuple(
+        field[1:] if field.startswith('-') else f'-{field}'
+        for field in ordering
+    )
+
+
+class KeysetPagination(CursorPagination):
+    """
+    复合键游标分页
+
+    DRF 自带的 CursorPagination 只记录第一个排序字段的值，值相同的行仍靠偏移量跳过。
+    这里游标记录全部排序字段的值，下一页的条件是在排序上严格位于该组值之后，
+    配合相同顺序的索引，任意深度的翻页与第一页代价相同。
+    排序字段的最后一个必须唯一（通常为 id）。
+
+    传入 pagination=offset 时改用页码分页。
+    """
+    ordering = ('-created_at', 'id')
+    page_size_query_param = 'page_size'
+    max_page_size = settings.PAGINATION_MAX_PAGE_SIZE
+    mode_query_param = 'pagination'
+    offset_pagination_class = StandardPageNumberPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.offset_paginator = None
+        if request.query_params.get(self.mode_query_param) == 'offset':
+            self.offset_paginator = self.offset_pagination_class()
+            page = self.offset_paginator.paginate_queryset(
+                queryset, request, view
+            )
+            self.display_page_controls = self.offset_paginator.display_page_controls
+            return page
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor.reverse
+        position = None if cursor is None else self.decode_position(cursor.position)
+
+        ordering = _reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_after_filter(ordering, position))
+
+        if self.template is not None:
+            self.display_page_controls = True
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        return self.page
+
+    def get_after_filter(self, ordering, position):
+        """构建 (f1, f2, ...) 在排序上严格位于 position 之后的查询条件"""
+        condition = Q()
+        for index, field in enumerate(ordering):
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            branch = Q(**{f'{field.lstrip("-")}__{lookup}': position[index]})
+            for previous, value in zip(ordering[:index], position):
+                branch &= Q(**{previous.lstrip('-'): value})
+            condition |= branch
+        # 冗余的首字段范围条件，使数据库可以直接在索引上定位起点
+        first = ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{lookup}': position[0]}) & condition
+
+    def encode_position(self, instance):
+        # 列表的快速表示分页的是 values() 行
+        if isinstance(instance, dict):
+            values = [instance[field.lstrip('-')] for field in self.ordering]
+        else:
+            values = [getattr(instance, field.lstrip('-')) for field in self.ordering]
+        return json.dumps([_encode_value(value) for value in values])
+
+    def decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def get_next_link(self):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=False,
+            position=self.encode_position(self.page[-1])
+        ))
+
+    def get_previous_link(self):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=True,
+            position=self.encode_position(self.page[0])
+        ))
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.offset_paginator is not None:
+            return self.offset_paginator.to_html()
+        return super().to_html()
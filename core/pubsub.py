@@ -0,0 +1,166 @@
+# core/pubsub.py
+
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# 每个订阅者最多积压的消息数，超过后丢弃新消息并标记 overflowed
+SUBSCRIPTION_QUEUE_SIZE = 100
+
+
+class Subscription:
+    """
+    某个频道在事件循环中的一个订阅者
+
+    消息由任意线程投递，通过 call_soon_threadsafe 放入所属事件循环的队列；
+    订阅者处理不及时导致队列满时丢弃消息，由订阅者根据 overflowed 自行全量同步。
+    """
+
+    def __init__(self, channel, loop):
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIPTION_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, message):
+        """在所属事件循环中放入消息"""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def deliver(self, message):
+        """在任意线程投递消息"""
+        self.loop.call_soon_threadsafe(self.put, message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def drain(self):
+        """丢弃积压的消息并清除 overflowed 标记"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+
+class LocalPubSubBackend:
+    """进程内后端，发布的消息只分发给本进程的订阅者，适用于单进程部署和开发测试"""
+
+    def __init__(self, broker):
+        self.broker = broker
+
+    def start(self):
+        pass
+
+    def publish(self, channel, message):
+        self.broker.deliver(channel, message)
+
+
+class RedisPubSubBackend:
+    """
+    Redis 发布订阅后端，在多个工作进程之间转发消息
+
+    发布者只写 Redis；每个进程一个后台线程订阅全部频道，收到后分发给本进程的订阅者，
+    本进程发布的消息也经由 Redis 回到本进程。需要安装 redis 并配置 REDIS_URL。
+    """
+    channel_prefix = 'pubsub:'
+
+    def __init__(self, broker):
+        import redis
+
+        self.broker = broker
+        self.client = redis.Redis.from_url(settings.REDIS_URL)
+
+    def start(self):
+        thread = threading.Thread(target=self._listen, name='pubsub', daemon=True)
+        thread.start()
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.psubscribe(f'{self.channel_prefix}*')
+        for item in pubsub.listen():
+            try:
+                channel = item['channel'].decode()[len(self.channel_prefix):]
+                self.broker.deliver(channel, json.loads(item['data']))
+            except Exception:
+                logger.exception('分发发布订阅消息失败')
+
+    def publish(self, channel, message):
+        self.client.publish(f'{self.channel_prefix}{channel}', json.dumps(message))
+
+
+class Broker:
+    """
+    进程内的发布订阅中心
+
+    订阅只占用内存；发布经由 settings.PUBSUB_BACKEND 指定的后端，
+    后端再把消息交给每个进程的 deliver 分发给本进程的订阅者。
+    消息必须可以序列化为 JSON。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    backend = import_string(settings.PUBSUB_BACKEND)(self)
+                    backend.start()
+                    self._backend = backend
+        return self._backend
+
+    def subscribe(self, channel):
+        """在当前事件循环中订阅频道，必须在协程中调用"""
+        self.backend
+        subscription = Subscription(channel, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def subscriber_count(self, channel):
+        with self._lock:
+            return len(self._subscriptions.get(channel, ()))
+
+    def publish(self, channel, message):
+        # 通知只是尽力而为，后端不可用时不影响已经提交的业务操作
+        try:
+            self.backend.publish(channel, message)
+        except Exception:
+            logger.exception('发布消息失败: %s', channel)
+
+    def publish_on_commit(self, channel, message):
+        """在当前事务提交后发布，订阅者收到时一定能读到新数据"""
+        transaction.on_commit(lambda: self.publish(channel, message))
+
+    def deliver(self, channel, message):
+        """把消息交给本进程的订阅者，可以在任意线程调用"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.deliver(message)
+            except RuntimeError:
+                # 订阅者所在的事件循环已关闭
+                self.unsubscribe(subscription)
+
+
+broker = Broker()
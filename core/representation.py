@@ -0,0 +1,66 @@
+# core/representation.py
+
+from rest_framework.response import Response
+
+
+class ValuesRepresentation:
+    """
+    列表接口基于 values() 行的只读快速表示
+
+    ModelSerializer 每一行都要为每个字段查找属性、调用 to_representation，
+    列表较长时序列化占据大部分耗时。子类声明查询字段 fields，并在 represent_row
+    中按原序列化器的字段顺序直接拼出结果；日期时间、小数、文件等格式化规则
+    较复杂的字段借用原序列化器的字段实例，保证输出与原序列化器完全一致。
+    """
+    serializer_class = None
+    fields = ()
+
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.serializer_fields = self.serializer_class(context=self.context).fields
+
+    def represent(self, rows):
+        rows = list(rows)
+        self.prepare(rows)
+        return [self.represent_row(row) for row in rows]
+
+    def prepare(self, rows):
+        """逐行转换前一次性加载关联数据，默认不需要"""
+
+    def format(self, name, value):
+        """用原序列化器的字段格式化值，与序列化器一样 None 原样返回"""
+        if value is None:
+            return None
+        return self.serializer_fields[name].to_representation(value)
+
+    def format_file(self, name, model_field, value):
+        """格式化文件字段，values() 只返回文件名，先还原为 FieldFile"""
+        if not value:
+            return None
+        return self.serializer_fields[name].to_representation(
+            model_field.attr_class(None, model_field, value)
+        )
+
+    def represent_row(self, row):
+        raise NotImplementedError
+
+
+class ValuesListMixin:
+    """
+    list 使用 list_representation_class 的快速表示
+
+    查询、筛选和分页与原来相同，只是以 values() 行代替模型实例。
+    """
+    list_representation_class = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        representation = self.list_representation_class(
+            self.get_serializer_context()
+        )
+        rows = queryset.values(*representation.fields)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(representation.represent(page))
+        return Response(representation.represent(rows))
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
     'appointments.apps.AppointmentsConfig',
     'business_hours.apps.BusinessHoursConfig',
     'holidays.apps.HolidaysConfig',
+    'resources.apps.ResourcesConfig',
+    'search.apps.SearchConfig',
     'dashboard.apps.DashboardConfig',
 ]
 
@@ -82,22 +84,58 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # 事务开始时即获取写锁，并发预约排队等待而不是在升级锁时失败
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Cache
+# 营业日程等进程内缓存通过共享缓存中的版本号在多个工作进程之间失效，
+# 生产环境多进程部署时应配置 REDIS_URL
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# 发布订阅后端，多进程部署时通过 Redis 在工作进程之间转发（见 core/pubsub.py）
+if REDIS_URL:
+    PUBSUB_BACKEND = 'core.pubsub.RedisPubSubBackend'
+else:
+    PUBSUB_BACKEND = 'core.pubsub.LocalPubSubBackend'
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'rest_framework_simplejwt.authentication.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # 预约、宠物、客户列表使用游标分页（core.pagination.KeysetPagination），
+    # 其余列表默认使用页码分页
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardPageNumberPagination',
     'PAGE_SIZE': 10
 }
 
+# 分页参数 page_size 允许的最大值
+PAGINATION_MAX_PAGE_SIZE = int(os.getenv('PAGINATION_MAX_PAGE_SIZE', '100'))
+
+# 仪表盘响应的缓存时间（秒），预约或客户变化时提前过期（见 dashboard/cache.py）
+DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', '30'))
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', 'http://localhost:5173').split(',')
 
@@ -124,17 +162,6 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # 指定自定义用户模型
 AUTH_USER_MODEL = 'accounts.Customer'
 
-# REST Framework JWT设置
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
-    ),
-    'DEFAULT_PERMISSION_CLASSES': (
-        'rest_framework.permissions.IsAuthenticated',
-    ),
-}
-
 # JWT设置
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -38,6 +38,8 @@ urlpatterns = [
     path('api/appointments/', include('appointments.urls')),
     path('api/business-hours/', include('business_hours.urls')),  # 新增
     path('api/holidays/', include('holidays.urls')),  
+    path('api/resources/', include('resources.urls')),
+    path('api/search/', include('search.urls')),
     path('api/admin/dashboard/', include('dashboard.urls')),  # 新增
 ]
 
@@ -0,0 +1,51 @@
+# core/versions.py
+
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY_PREFIX = 'version:'
+
+
+def get_version(name):
+    """
+    获取指定数据的版本号
+
+    版本号为最近一次变化的时间（纳秒时间戳），保存在共享缓存中，
+    所有工作进程都能看到同一个值；缓存中不存在时以当前时间初始化。
+    """
+    return get_versions([name])[name]
+
+
+def get_versions(names):
+    """一次缓存读取获取多个版本号，返回 {name: version}"""
+    keys = {VERSION_KEY_PREFIX + name: name for name in names}
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = time.time_ns()
+        for key in missing:
+            cache.add(key, now, timeout=None)
+        found.update(cache.get_many(missing))
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump_version(name):
+    """数据发生变化后更新版本号，使依赖该版本号的缓存全部失效"""
+    bump_versions([name])
+
+
+def bump_versions(names):
+    """同时更新多个版本号"""
+    version = time.time_ns()
+    cache.set_many(
+        {VERSION_KEY_PREFIX + name: version for name in names},
+        timeout=None
+    )
+
+
+def bump_versions_on_commit(names):
+    """在当前事务提交后更新版本号，避免其他进程在提交前读到旧数据并缓存为新版本"""
+    names = list(names)
+    if names:
+        transaction.on_commit(lambda: bump_versions(names))
@@ -1,3 +1,30 @@
+# dashboard/admin.py
+
 from django.contrib import admin
+from .models import DailyMetrics, DailyServiceMetrics
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """汇总数据由信号和 rebuild_daily_metrics 维护，后台只能查看"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DailyMetrics)
+class DailyMetricsAdmin(ReadOnlyAdmin):
+    list_display = (
+        'date', 'appointments', 'cancellations', 'revenue',
+        'new_customers', 'updated_at'
+    )
+    date_hierarchy = 'date'
+
 
-# Register your models here.
+@admin.register(DailyServiceMetrics)
+class DailyServiceMetricsAdmin(ReadOnlyAdmin):
+    list_display = ('date', 'service', 'dog_size', 'status', 'appointments', 'amount')
+    list_filter = ('service', 'dog_size', 'status')
+    date_hierarchy = 'date'
@@ -0,0 +1,83 @@
+# dashboard/cache.py
+
+import functools
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.response import Response
+from core.versions import bump_versions_on_commit, get_version
+
+# 预约和客户数据的版本号名称，仪表盘的缓存响应依赖该版本号
+DASHBOARD_VERSION = 'dashboard'
+
+CACHE_KEY_PREFIX = 'dashboard:'
+# 响应过期后继续保留的时间（秒），重新计算期间返回给其他请求
+STALE_TIMEOUT = 600
+# 重新计算的锁的最长持有时间（秒），计算中断时到期后由其他请求接手
+REFRESH_LOCK_TIMEOUT = 10
+
+
+def dashboard_changed():
+    """预约或客户变化后，在事务提交时使仪表盘的缓存响应全部过期"""
+    bump_versions_on_commit([DASHBOARD_VERSION])
+
+
+def _cache_key(name, request):
+    # 统计周期都以今天为终点，日期变化后使用新的缓存
+    digest = hashlib.md5(
+        repr((name, timezone.localdate(), sorted(request.query_params.lists()))).encode(),
+        usedforsecurity=False
+    ).hexdigest()
+    return f'{CACHE_KEY_PREFIX}{digest}'
+
+
+def _with_headers(response, state, age):
+    response['X-Cache'] = state
+    response['Age'] = str(int(age))
+    return response
+
+
+def cached_response(view):
+    """
+    缓存仪表盘接口的响应
+
+    同一接口和参数的响应在 DASHBOARD_CACHE_TTL 秒内且预约和客户数据未变化时直接返回。
+    过期后只有取得锁的一个请求重新计算，其他请求继续返回过期的响应；
+    没有可用的旧响应时各自计算。只缓存 200 响应。
+    响应头 X-Cache 为 HIT、STALE 或 MISS，Age 为响应已缓存的秒数。
+    """
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = _cache_key(view.__name__, request)
+        lock_key = f'{key}:lock'
+        version = get_version(DASHBOARD_VERSION)
+        entry = cache.get(key)
+        now = time.time()
+
+        locked = False
+        if entry is not None:
+            age = now - entry['created']
+            if entry['version'] == version and age < settings.DASHBOARD_CACHE_TTL:
+                return _with_headers(Response(entry['data']), 'HIT', age)
+            locked = cache.add(lock_key, True, REFRESH_LOCK_TIMEOUT)
+            if not locked:
+                # 其他请求正在重新计算
+                return _with_headers(Response(entry['data']), 'STALE', age)
+
+        try:
+            response = view(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                # 记录计算前读取的版本号，计算期间数据变化时下次请求会重新计算
+                cache.set(key, {
+                    'version': version,
+                    'created': now,
+                    'data': response.data,
+                }, settings.DASHBOARD_CACHE_TTL + STALE_TIMEOUT)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return _with_headers(response, 'MISS', 0)
+
+    return wrapper
@@ -0,0 +1,28 @@
+# dashboard/management/commands/rebuild_daily_metrics.py
+
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from dashboard.rollups import rebuild_metrics
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise CommandError(f'无效的日期格式: {value}')
+
+
+class Command(BaseCommand):
+    help = '按原始预约和客户数据回填或重建仪表盘每日汇总（首次部署或数据修复后运行）'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', type=_parse_date,
+                            help='开始日期 (YYYY-MM-DD)，默认最早')
+        parser.add_argument('--end', type=_parse_date,
+                            help='结束日期 (YYYY-MM-DD)，默认最晚')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            days = rebuild_metrics(options['start'], options['end'])
+        self.stdout.write(self.style.SUCCESS(f'已重建 {days} 天的汇总'))
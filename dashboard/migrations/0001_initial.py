@@ -0,0 +1,51 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='日期')),
+                ('appointments', models.IntegerField(default=0, verbose_name='预约数')),
+                ('cancellations', models.IntegerField(default=0, verbose_name='取消数')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='营收')),
+                ('new_customers', models.IntegerField(default=0, verbose_name='新增客户数')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '每日汇总',
+                'verbose_name_plural': '每日汇总',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyServiceMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='日期')),
+                ('dog_size', models.CharField(blank=True, choices=[('S', '小型犬 (8kg以下)'), ('M', '中型犬 (8-15kg)'), ('L', '大型犬 (16-25kg)')], max_length=1, verbose_name='体型')),
+                ('status', models.CharField(choices=[('pending', '待确认'), ('confirmed', '已确认'), ('completed', '已完成'), ('cancelled', '已取消'), ('no_show', '未到店')], max_length=10, verbose_name='状态')),
+                ('appointments', models.IntegerField(default=0, verbose_name='预约数')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='金额')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_metrics', to='services.service', verbose_name='服务项目')),
+            ],
+            options={
+                'verbose_name': '每日服务明细',
+                'verbose_name_plural': '每日服务明细',
+                'ordering': ['-date', 'service', 'dog_size', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'service', 'dog_size', 'status'), name='unique_daily_service_metrics')],
+            },
+        ),
+    ]
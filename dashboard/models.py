@@ -1,3 +1,82 @@
+# dashboard/models.py
+
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+from services.models import DogSize, Service
+from appointments.utils import AppointmentStatus
+
+
+class DailyMetrics(models.Model):
+    """
+    每日汇总指标
+
+    预约和客户都按创建时间在本地时区的日期归类；营收为当天创建、目前已完成的预约金额，
+    取消数为当天创建、目前已取消的预约数，与原先直接统计预约表的口径一致。
+    由 dashboard.signals 增量维护，可用 rebuild_daily_metrics 重建。
+    """
+    date = models.DateField(_('日期'), unique=True)
+    appointments = models.IntegerField(_('预约数'), default=0)
+    cancellations = models.IntegerField(_('取消数'), default=0)
+    revenue = models.DecimalField(
+        _('营收'),
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+    new_customers = models.IntegerField(_('新增客户数'), default=0)
+    updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('每日汇总')
+        verbose_name_plural = _('每日汇总')
+        ordering = ['-date']
+
+    def __str__(self):
+        return f"{self.date} 汇总"
+
+
+class DailyServiceMetrics(models.Model):
+    """
+    按服务、体型和状态细分的每日预约数和金额
+
+    每天的行数只与服务数、体型数和状态数有关，与预约量无关。
+    """
+    date = models.DateField(_('日期'))
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        related_name='daily_metrics',
+        verbose_name=_('服务项目')
+    )
+    dog_size = models.CharField(
+        _('体型'),
+        max_length=1,
+        choices=DogSize.choices,
+        blank=True
+    )
+    status = models.CharField(
+        _('状态'),
+        max_length=10,
+        choices=AppointmentStatus.CHOICES
+    )
+    appointments = models.IntegerField(_('预约数'), default=0)
+    amount = models.DecimalField(
+        _('金额'),
+        max_digits=12,
+        decimal_places=2,
+        default=0
+    )
+
+    class Meta:
+        verbose_name = _('每日服务明细')
+        verbose_name_plural = _('每日服务明细')
+        ordering = ['-date', 'service', 'dog_size', 'status']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'service', 'dog_size', 'status'],
+                name='unique_daily_service_metrics'
+            ),
+        ]
 
-# Create your models here.
+    def __str__(self):
+        return f"{self.date} {self.service} {self.dog_size} {self.status}"
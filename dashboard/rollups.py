@@ -0,0 +1,151 @@
+# dashboard/rollups.py
+
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from appointments.models import Appointment
+from appointments.utils import AppointmentStatus
+from .cache import dashboard_changed
+from .models import DailyMetrics, DailyServiceMetrics
+
+
+def local_date(value):
+    """时间点在本地时区的日期，汇总表都按这个日期归类"""
+    return timezone.localtime(value).date()
+
+
+def day_start(day):
+    """本地日期的零点，按时间范围筛选时使用半开区间 [day_start(a), day_start(b))"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _increment(model, lookup, deltas, **values):
+    """对汇总行做原子的增量更新，行不存在时创建"""
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    updates.update(values)
+    if model.objects.filter(**lookup).update(**updates):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas, **values)
+    except IntegrityError:
+        # 并发的请求刚刚创建了这一行
+        model.objects.filter(**lookup).update(**updates)
+
+
+class MetricsDelta:
+    """
+    一次操作对汇总表的增量
+
+    先在内存中按行合并，再对每个受影响的行执行一次增量 UPDATE，
+    例如预约从待确认改为已确认时每日汇总不变，只更新两行服务明细。
+    """
+
+    def __init__(self):
+        # (日期, 服务, 体型, 状态) -> [预约数, 金额]
+        self.services = defaultdict(lambda: [0, Decimal('0')])
+        # 日期 -> 新增客户数
+        self.customers = defaultdict(int)
+
+    def add_appointment(self, created_at, service_id, dog_size, status,
+                        total_price, sign=1):
+        entry = self.services[local_date(created_at), service_id, dog_size or '', status]
+        entry[0] += sign
+        entry[1] += sign * total_price
+
+    def add_customer(self, created_at, sign=1):
+        self.customers[local_date(created_at)] += sign
+
+    def apply(self):
+        """写入数据库并使仪表盘缓存过期，必须在事务内调用"""
+        daily = defaultdict(lambda: defaultdict(int))
+        for (day, service_id, dog_size, status), (count, amount) in self.services.items():
+            if not count and not amount:
+                continue
+            _increment(
+                DailyServiceMetrics,
+                {
+                    'date': day,
+                    'service_id': service_id,
+                    'dog_size': dog_size,
+                    'status': status,
+                },
+                {'appointments': count, 'amount': amount}
+            )
+            totals = daily[day]
+            totals['appointments'] += count
+            if status == AppointmentStatus.CANCELLED:
+                totals['cancellations'] += count
+            if status == AppointmentStatus.COMPLETED:
+                totals['revenue'] += amount
+        for day, count in self.customers.items():
+            daily[day]['new_customers'] += count
+
+        now = timezone.now()
+        for day, totals in daily.items():
+            deltas = {field: value for field, value in totals.items() if value}
+            if deltas:
+                _increment(DailyMetrics, {'date': day}, deltas, updated_at=now)
+        dashboard_changed()
+
+
+def rebuild_metrics(start=None, end=None):
+    """
+    按原始数据重建 [start, end]（本地日期，默认全部）的汇总
+
+    预约和客户各一次分组查询，删除范围内的旧汇总后批量写入，必须在事务内调用。
+    返回重建的天数。
+    """
+    appointments = Appointment.objects.all()
+    customers = get_user_model().objects.all()
+    services = DailyServiceMetrics.objects.all()
+    daily_metrics = DailyMetrics.objects.all()
+    if start is not None:
+        appointments = appointments.filter(created_at__gte=day_start(start))
+        customers = customers.filter(created_at__gte=day_start(start))
+        services = services.filter(date__gte=start)
+        daily_metrics = daily_metrics.filter(date__gte=start)
+    if end is not None:
+        end_start = day_start(end + timedelta(days=1))
+        appointments = appointments.filter(created_at__lt=end_start)
+        customers = customers.filter(created_at__lt=end_start)
+        services = services.filter(date__lte=end)
+        daily_metrics = daily_metrics.filter(date__lte=end)
+
+    service_rows = []
+    daily = defaultdict(lambda: defaultdict(int))
+    for row in appointments.annotate(day=TruncDate('created_at')).values(
+        'day', 'service', 'dog_size', 'status'
+    ).annotate(count=Count('id'), amount=Sum('total_price')).order_by():
+        service_rows.append(DailyServiceMetrics(
+            date=row['day'],
+            service_id=row['service'],
+            dog_size=row['dog_size'],
+            status=row['status'],
+            appointments=row['count'],
+            amount=row['amount']
+        ))
+        totals = daily[row['day']]
+        totals['appointments'] += row['count']
+        if row['status'] == AppointmentStatus.CANCELLED:
+            totals['cancellations'] += row['count']
+        if row['status'] == AppointmentStatus.COMPLETED:
+            totals['revenue'] += row['amount']
+    for row in customers.annotate(day=TruncDate('created_at')).values(
+        'day'
+    ).annotate(count=Count('id')).order_by():
+        daily[row['day']]['new_customers'] += row['count']
+
+    services.delete()
+    daily_metrics.delete()
+    DailyServiceMetrics.objects.bulk_create(service_rows)
+    DailyMetrics.objects.bulk_create([
+        DailyMetrics(date=day, **totals) for day, totals in daily.items()
+    ])
+    dashboard_changed()
+    return len(daily)
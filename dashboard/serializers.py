@@ -0,0 +1,48 @@
+# dashboard/serializers.py
+
+from django.utils import timezone
+from rest_framework import serializers
+from .trends import (
+    DEFAULT_BUCKETS,
+    GROUP_FIELDS,
+    MAX_BUCKETS,
+    METRICS,
+    shift_buckets,
+)
+
+
+class TrendQuerySerializer(serializers.Serializer):
+    """趋势参数"""
+    start = serializers.DateField(required=False, help_text='开始日期，默认按粒度取最近若干个数据点')
+    end = serializers.DateField(required=False, help_text='结束日期，默认今天')
+    granularity = serializers.ChoiceField(
+        choices=list(MAX_BUCKETS),
+        default='day',
+        help_text='粒度（day/week/month）'
+    )
+    metric = serializers.ChoiceField(
+        choices=list(METRICS),
+        default='count',
+        help_text='指标（count: 预约数, revenue: 营收, cancellations: 取消数）'
+    )
+    group_by = serializers.ChoiceField(
+        choices=list(GROUP_FIELDS),
+        required=False,
+        help_text='分组（service/dog_size/status），不指定时不分组'
+    )
+
+    def validate(self, attrs):
+        granularity = attrs['granularity']
+        end = attrs.get('end') or timezone.localdate()
+        start = attrs.get('start') or shift_buckets(
+            end, granularity, 1 - DEFAULT_BUCKETS[granularity]
+        )
+        if start > end:
+            raise serializers.ValidationError("开始日期不能晚于结束日期")
+        if shift_buckets(start, granularity, MAX_BUCKETS[granularity]) <= end:
+            raise serializers.ValidationError(
+                f"时间范围过大，按该粒度最多 {MAX_BUCKETS[granularity]} 个数据点"
+            )
+        attrs['start'] = start
+        attrs['end'] = end
+        return attrs
@@ -0,0 +1,82 @@
+# dashboard/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import Customer
+from appointments.booking import appointments_created
+from appointments.models import Appointment
+from appointments.transitions import appointments_transitioned
+from .cache import dashboard_changed
+from .rollups import MetricsDelta
+
+# 影响汇总的预约字段，依次对应 MetricsDelta.add_appointment 的参数
+ROLLUP_FIELDS = ('created_at', 'service_id', 'dog_size', 'status', 'total_price')
+
+
+def _current(instance):
+    return [getattr(instance, field) for field in ROLLUP_FIELDS]
+
+
+def _loaded(instance):
+    """从数据库加载时的值，新建或字段未加载时返回 None"""
+    values = [instance.get_loaded_value(field) for field in ROLLUP_FIELDS]
+    return None if any(value is None for value in values) else values
+
+
+@receiver(post_save, sender=Appointment)
+def appointment_saved(sender, instance, created, **kwargs):
+    """新预约计入汇总；状态、服务、体型或价格变化时从原来的行移到新的行"""
+    delta = MetricsDelta()
+    if not created:
+        previous = _loaded(instance)
+        if previous is None or previous == _current(instance):
+            # 汇总不变，最近预约列表仍可能变化
+            dashboard_changed()
+            return
+        delta.add_appointment(*previous, sign=-1)
+    delta.add_appointment(*_current(instance))
+    delta.apply()
+
+
+@receiver(post_delete, sender=Appointment)
+def appointment_deleted(sender, instance, **kwargs):
+    delta = MetricsDelta()
+    delta.add_appointment(*(_loaded(instance) or _current(instance)), sign=-1)
+    delta.apply()
+
+
+@receiver(appointments_created)
+def appointments_bulk_created(sender, appointments, **kwargs):
+    """批量预约和周期预约没有 post_save，合并后一次写入"""
+    delta = MetricsDelta()
+    for appointment in appointments:
+        delta.add_appointment(*_current(appointment))
+    delta.apply()
+
+
+@receiver(appointments_transitioned)
+def appointments_bulk_transitioned(sender, status, appointments, **kwargs):
+    """批量状态变化没有 post_save，按原状态和新状态移动"""
+    delta = MetricsDelta()
+    for row in appointments:
+        values = [row['created_at'], row['service_id'], row['dog_size']]
+        delta.add_appointment(
+            *values, row['previous_status'], row['total_price'], sign=-1
+        )
+        delta.add_appointment(*values, status, row['total_price'])
+    delta.apply()
+
+
+@receiver(post_save, sender=Customer)
+def customer_saved(sender, instance, created, **kwargs):
+    if created:
+        delta = MetricsDelta()
+        delta.add_customer(instance.created_at)
+        delta.apply()
+
+
+@receiver(post_delete, sender=Customer)
+def customer_deleted(sender, instance, **kwargs):
+    delta = MetricsDelta()
+    delta.add_customer(instance.created_at, sign=-1)
+    delta.apply()
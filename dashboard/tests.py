@@ -0,0 +1,453 @@
+# dashboard/tests.py
+
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from accounts.models import Customer
+from appointments.booking import book_appointments
+from appointments.models import Appointment
+from appointments.tests import BookingFixtureMixin
+from pets.models import Pet
+from services.models import DogSize, Service
+from .cache import REFRESH_LOCK_TIMEOUT
+from .models import DailyMetrics, DailyServiceMetrics
+from .rollups import day_start, rebuild_metrics
+from .trends import DEFAULT_BUCKETS, MAX_BUCKETS
+
+
+class StatisticsTests(TestCase):
+    """statistics 每个周期都只查询每日汇总和客户表各一次"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = Customer.objects.create_user(
+            'staff@example.com', 'password', username='staff', is_staff=True
+        )
+        today = timezone.localdate()
+        # 每天 23:30 注册一位客户，检验按本地日期划分周期
+        customers = Customer.objects.bulk_create([
+            Customer(email=f'customer{offset}@example.com', username=f'customer{offset}')
+            for offset in range(70)
+        ])
+        for offset, customer in enumerate(customers):
+            Customer.objects.filter(id=customer.id).update(
+                created_at=day_start(today - timedelta(days=offset)) +
+                timedelta(hours=23, minutes=30)
+            )
+        for offset in range(70):
+            DailyMetrics.objects.update_or_create(
+                date=today - timedelta(days=offset),
+                defaults={
+                    'appointments': offset + 1,
+                    'revenue': Decimal(offset * 10),
+                }
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_query_count_and_totals(self):
+        for period, days in (('day', 1), ('week', 7), ('month', 30)):
+            with self.subTest(period=period):
+                with self.assertNumQueries(2):
+                    response = self.client.get(
+                        '/api/admin/dashboard/statistics/', {'period': period}
+                    )
+                self.assertEqual(response.status_code, 200)
+                current = range(days)
+                previous = range(days, days * 2)
+                self.assertEqual(
+                    response.data['appointments'],
+                    sum(offset + 1 for offset in current)
+                )
+                self.assertEqual(
+                    response.data['appointmentGrowth'],
+                    round((sum(offset + 1 for offset in current) -
+                           sum(offset + 1 for offset in previous)) /
+                          sum(offset + 1 for offset in previous) * 100, 1)
+                )
+                self.assertEqual(
+                    response.data['revenue'],
+                    float(sum(offset * 10 for offset in current))
+                )
+                if period == 'day':
+                    self.assertEqual(
+                        response.data['todayAppointments'], response.data['appointments']
+                    )
+                    self.assertEqual(response.data['todayRevenue'], response.data['revenue'])
+                else:
+                    self.assertNotIn('todayAppointments', response.data)
+                    self.assertNotIn('todayRevenue', response.data)
+                # staff 也在今天注册
+                self.assertEqual(response.data['newCustomers'], days + 1)
+                self.assertEqual(
+                    response.data['customerGrowth'],
+                    round((days + 1 - days) / days * 100, 1)
+                )
+
+    def test_invalid_period(self):
+        response = self.client.get('/api/admin/dashboard/statistics/', {'period': 'year'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.data)
+
+
+class RollupConsistencyTests(BookingFixtureMixin, TestCase):
+    """增量维护的汇总与按原始数据重建的结果相同"""
+
+    def snapshot(self):
+        services = {
+            (row.date, row.service_id, row.dog_size, row.status):
+                (row.appointments, row.amount)
+            for row in DailyServiceMetrics.objects.all()
+            if row.appointments or row.amount
+        }
+        daily = {
+            row.date: (row.appointments, row.cancellations, row.revenue, row.new_customers)
+            for row in DailyMetrics.objects.all()
+            if row.appointments or row.cancellations or row.revenue or row.new_customers
+        }
+        return services, daily
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot()
+        with transaction.atomic():
+            rebuild_metrics()
+        self.assertEqual(self.snapshot(), incremental)
+        call_command('rebuild_daily_metrics', stdout=StringIO())
+        self.assertEqual(self.snapshot(), incremental)
+
+    def test_rollup_matches_recompute(self):
+        big = Pet.objects.create(
+            owner=self.customer, name='大黄', weight=Decimal('20'), gender='M'
+        )
+        customer = self.client_for(self.customer)
+        staff = self.client_for(self.staff)
+        url = '/api/appointments/appointments/'
+
+        # 昨天深夜（本地时间）创建的预约归入昨天
+        late = day_start(timezone.localdate()) - timedelta(minutes=30)
+        with mock.patch('django.utils.timezone.now', return_value=late):
+            first = self.book(customer, '09:00').data['id']
+        second = self.book(customer, '10:00', pet=big).data['id']
+        third = self.book(customer, '11:00').data['id']
+        bulk = book_appointments([
+            Appointment(
+                customer=self.customer, pet=pet, service=self.service,
+                date=self.day, start_time=time(hour), end_time=time(hour + 1),
+                total_price=Decimal('100') if pet is self.pet else Decimal('150'),
+                dog_size=pet.size
+            )
+            for hour, pet in ((13, self.pet), (14, big), (15, big))
+        ])
+        Customer.objects.create_user('new@example.com', 'password', username='new')
+
+        # 单条状态变化
+        staff.post(f'{url}{first}/confirm/')
+        staff.post(f'{url}{first}/complete/')
+        customer.post(f'{url}{third}/cancel/')
+        # 改期并更换宠物（体型变化）
+        response = customer.put(f'{url}{second}/', {
+            'pet': str(self.pet.id),
+            'service': str(self.service.id),
+            'date': self.day.isoformat(),
+            'start_time': '16:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        # 批量状态变化
+        ids = [str(appointment.id) for appointment in bulk]
+        staff.post(f'{url}bulk_confirm/', {'ids': ids[:2]}, format='json')
+        staff.post(f'{url}bulk_complete/', {'ids': ids[:1]}, format='json')
+        customer.post(f'{url}bulk_cancel/', {'ids': ids[1:]}, format='json')
+        # 删除
+        Appointment.objects.get(id=ids[2]).delete()
+
+        services, daily = self.snapshot()
+        today = timezone.localdate()
+        yesterday = today - timedelta(days=1)
+        self.assertEqual(daily[yesterday], (1, 0, Decimal('100'), 0))
+        self.assertEqual(
+            services[yesterday, self.service.id, self.pet.size, 'completed'],
+            (1, Decimal('100'))
+        )
+        # 今天创建 5 个、删除 1 个，取消 2 个，完成 1 个
+        self.assertEqual(daily[today][:3], (4, 2, Decimal('100')))
+        self.assertMatchesRebuild()
+
+
+class TrendTests(TestCase):
+    """趋势：补零、按周和按月汇总、分组以及参数校验"""
+
+    url = '/api/admin/dashboard/trend/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = Customer.objects.create_user(
+            'staff@example.com', 'password', username='staff', is_staff=True
+        )
+        cls.bath = Service.objects.create(name='洗澡', duration=60)
+        cls.trim = Service.objects.create(name='修剪', duration=90)
+        # 2026-03-02 是星期一
+        for day, appointments, cancellations, revenue in (
+            (date(2026, 2, 27), 1, 0, '80'),
+            (date(2026, 3, 2), 3, 1, '200'),
+            (date(2026, 3, 5), 5, 0, '300'),
+            (date(2026, 3, 10), 2, 2, '0'),
+        ):
+            DailyMetrics.objects.create(
+                date=day, appointments=appointments,
+                cancellations=cancellations, revenue=Decimal(revenue)
+            )
+        DailyServiceMetrics.objects.bulk_create([
+            DailyServiceMetrics(
+                date=day, service=service, dog_size=dog_size, status=status,
+                appointments=appointments, amount=Decimal(amount)
+            )
+            for day, service, dog_size, status, appointments, amount in (
+                (date(2026, 3, 2), cls.bath, 'S', 'completed', 2, '200'),
+                (date(2026, 3, 2), cls.trim, 'L', 'cancelled', 1, '150'),
+                (date(2026, 3, 5), cls.trim, 'L', 'pending', 4, '600'),
+                (date(2026, 3, 5), cls.bath, '', 'pending', 1, '100'),
+                # 只有取消的服务在营收分组中全为零，应被省略
+                (date(2026, 3, 10), cls.bath, 'S', 'cancelled', 2, '200'),
+            )
+        ])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def trend(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_days_without_data_are_zero(self):
+        data = self.trend(start='2026-03-01', end='2026-03-06')
+        self.assertEqual(data['dates'], [
+            '2026-03-01', '2026-03-02', '2026-03-03',
+            '2026-03-04', '2026-03-05', '2026-03-06',
+        ])
+        self.assertEqual(data['values'], [0, 3, 0, 0, 5, 0])
+
+        data = self.trend(start='2026-03-01', end='2026-03-03', metric='revenue')
+        self.assertEqual(data['values'], [0.0, 200.0, 0.0])
+
+    def test_weeks_start_on_monday(self):
+        data = self.trend(start='2026-03-04', end='2026-03-22', granularity='week')
+        self.assertEqual(data['start'], '2026-03-02')
+        self.assertEqual(data['end'], '2026-03-22')
+        self.assertEqual(data['dates'], ['2026-03-02', '2026-03-09', '2026-03-16'])
+        self.assertEqual(data['values'], [8, 2, 0])
+
+        data = self.trend(
+            start='2026-03-01', end='2026-03-10',
+            granularity='week', metric='cancellations'
+        )
+        # 星期日所在的周从前一个星期一开始
+        self.assertEqual(data['dates'], ['2026-02-23', '2026-03-02', '2026-03-09'])
+        self.assertEqual(data['values'], [0, 1, 2])
+
+    def test_months(self):
+        data = self.trend(
+            start='2026-01-15', end='2026-03-31',
+            granularity='month', metric='revenue'
+        )
+        self.assertEqual(data['dates'], ['2026-01-01', '2026-02-01', '2026-03-01'])
+        self.assertEqual(data['values'], [0.0, 80.0, 500.0])
+
+    def test_group_by_service(self):
+        data = self.trend(start='2026-03-02', end='2026-03-05', group_by='service')
+        self.assertNotIn('values', data)
+        self.assertEqual(data['series'], [
+            {'key': str(self.trim.id), 'label': '修剪', 'values': [1, 0, 0, 4]},
+            {'key': str(self.bath.id), 'label': '洗澡', 'values': [2, 0, 0, 1]},
+        ])
+
+        # 营收只统计已完成的金额，全为零的组被省略
+        data = self.trend(
+            start='2026-03-01', end='2026-03-31', granularity='week',
+            metric='revenue', group_by='service'
+        )
+        self.assertEqual(data['series'], [
+            {'key': str(self.bath.id), 'label': '洗澡', 'values': [0.0, 200.0, 0.0, 0.0, 0.0, 0.0]},
+        ])
+
+    def test_group_by_dog_size_and_status(self):
+        data = self.trend(
+            start='2026-03-01', end='2026-03-31',
+            granularity='month', group_by='dog_size'
+        )
+        self.assertEqual(data['series'], [
+            {'key': 'L', 'label': DogSize.LARGE.label, 'values': [5]},
+            {'key': 'S', 'label': DogSize.SMALL.label, 'values': [4]},
+            {'key': '', 'label': '未知', 'values': [1]},
+        ])
+
+        data = self.trend(
+            start='2026-03-01', end='2026-03-31', granularity='month',
+            metric='cancellations', group_by='status'
+        )
+        self.assertEqual(data['series'], [
+            {'key': 'cancelled', 'label': '已取消', 'values': [3]},
+        ])
+
+    def test_bucket_caps(self):
+        end = date(2026, 3, 31)
+        for granularity, allowed, too_many in (
+            ('day', end - timedelta(days=365), end - timedelta(days=366)),
+            ('week', date(2023, 4, 10), date(2023, 4, 9)),
+            ('month', date(2021, 4, 30), date(2021, 3, 31)),
+        ):
+            with self.subTest(granularity=granularity):
+                data = self.trend(
+                    start=allowed.isoformat(), end=end.isoformat(),
+                    granularity=granularity
+                )
+                self.assertEqual(len(data['dates']), MAX_BUCKETS[granularity])
+
+                response = self.client.get(self.url, {
+                    'start': too_many.isoformat(),
+                    'end': end.isoformat(),
+                    'granularity': granularity,
+                })
+                self.assertEqual(response.status_code, 400)
+
+    def test_default_start(self):
+        today = timezone.localdate()
+        data = self.trend()
+        self.assertEqual(len(data['dates']), DEFAULT_BUCKETS['day'])
+        self.assertEqual(data['end'], today.strftime('%Y-%m-%d'))
+
+        data = self.trend(granularity='month')
+        self.assertEqual(len(data['dates']), DEFAULT_BUCKETS['month'])
+        self.assertEqual(data['dates'][-1], today.replace(day=1).strftime('%Y-%m-%d'))
+
+    def test_invalid_parameters(self):
+        for params in (
+            {'granularity': 'year'},
+            {'metric': 'profit'},
+            {'group_by': 'customer'},
+            {'start': '2026-03-10', 'end': '2026-03-01'},
+            {'start': '2026-03-32'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_period_trends(self):
+        today = timezone.localdate()
+        DailyMetrics.objects.update_or_create(
+            date=today, defaults={'appointments': 4, 'revenue': Decimal('120')}
+        )
+        for action, value in (('appointment_trend', 4), ('revenue_trend', 120.0)):
+            for period, days in (('week', 7), ('month', 30)):
+                with self.subTest(action=action, period=period):
+                    response = self.client.get(
+                        f'/api/admin/dashboard/{action}/', {'period': period}
+                    )
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(response.data['dates']), days)
+                    self.assertEqual(response.data['dates'][-1], today.strftime('%Y-%m-%d'))
+                    self.assertEqual(response.data['values'][-1], value)
+                    self.assertEqual(sum(response.data['values'][:-1]), 0)
+
+            with self.subTest(action=action, period='year'):
+                response = self.client.get(
+                    f'/api/admin/dashboard/{action}/', {'period': 'year'}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data, {'error': '无效的统计周期'})
+
+
+@override_settings(DASHBOARD_CACHE_TTL=30)
+class CachedResponseTests(BookingFixtureMixin, TestCase):
+    """仪表盘响应缓存：命中、过期后的单请求重算以及数据变化后失效"""
+
+    url = '/api/admin/dashboard/statistics/'
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.staff)
+
+    def get(self, now):
+        with mock.patch('dashboard.cache.time') as clock:
+            clock.time.return_value = now
+            return self.client.get(self.url, {'period': 'day'})
+
+    def test_hit_and_age(self):
+        response = self.get(1000)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response['Age'], '0')
+
+        with self.assertNumQueries(0):
+            response = self.get(1012.5)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response['Age'], '12')
+
+        # 参数不同的请求分别缓存
+        response = self.client.get(self.url, {'period': 'week'})
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_expired_entry_refreshed_by_one_request(self):
+        self.get(1000)
+        self.book(self.client_for(self.customer), '09:00')
+
+        # 另一个请求持有锁时，返回过期的响应而不重新计算
+        with mock.patch('dashboard.cache.cache.add', return_value=False) as add:
+            with self.assertNumQueries(0):
+                response = self.get(1040)
+        add.assert_called_once()
+        self.assertEqual(add.call_args.args[2], REFRESH_LOCK_TIMEOUT)
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertEqual(response['Age'], '40')
+        self.assertEqual(response.data['appointments'], 0)
+
+        # 取得锁的请求重新计算，完成后释放锁
+        with mock.patch('dashboard.cache.cache.add', wraps=cache.add) as add:
+            response = self.get(1041)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response['Age'], '0')
+        self.assertEqual(response.data['appointments'], 1)
+        lock_key = add.call_args.args[0]
+        self.assertTrue(lock_key.endswith(':lock'))
+        self.assertIsNone(cache.get(lock_key))
+        self.assertEqual(self.get(1042)['X-Cache'], 'HIT')
+
+    def test_lock_released_when_view_fails(self):
+        self.get(1000)
+        with mock.patch.object(
+            DailyMetrics.objects, 'filter', side_effect=RuntimeError
+        ):
+            with self.assertRaises(RuntimeError):
+                self.get(1040)
+        # 锁已释放，下一个请求不会返回过期的响应
+        self.assertEqual(self.get(1041)['X-Cache'], 'MISS')
+
+    def test_appointment_change_invalidates(self):
+        response = self.get(1000)
+        self.assertEqual(response.data['appointments'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.client_for(self.customer), '09:00')
+
+        # 仍在缓存时间内，但版本号已变化
+        response = self.get(1001)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['appointments'], 1)
+        self.assertEqual(self.get(1002)['X-Cache'], 'HIT')
+
+    def test_only_successful_responses_cached(self):
+        for _ in range(2):
+            response = self.client.get(self.url, {'period': 'year'})
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response['X-Cache'], 'MISS')
@@ -0,0 +1,152 @@
+# dashboard/trends.py
+
+from datetime import timedelta
+from django.db.models import F, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from appointments.utils import AppointmentStatus
+from services.models import DogSize
+from .models import DailyMetrics, DailyServiceMetrics
+
+# 每种粒度最多的数据点数，以及未指定开始日期时的默认点数
+MAX_BUCKETS = {
+    'day': 366,
+    'week': 156,
+    'month': 60,
+}
+DEFAULT_BUCKETS = {
+    'day': 30,
+    'week': 12,
+    'month': 12,
+}
+
+# 指标: (每日汇总的字段, 在服务明细上的聚合)
+METRICS = {
+    'count': ('appointments', Sum('appointments')),
+    'revenue': (
+        'revenue',
+        Sum('amount', filter=Q(status=AppointmentStatus.COMPLETED))
+    ),
+    'cancellations': (
+        'cancellations',
+        Sum('appointments', filter=Q(status=AppointmentStatus.CANCELLED))
+    ),
+}
+
+# 分组: 服务明细上取值的字段
+GROUP_FIELDS = {
+    'service': ('service', 'service__name'),
+    'dog_size': ('dog_size',),
+    'status': ('status',),
+}
+
+
+def _add_months(day, months):
+    """day 所在月加减 months 个月后的第一天"""
+    index = day.year * 12 + day.month - 1 + months
+    return day.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def bucket_start(day, granularity):
+    """day 所在的数据点的第一天，周从星期一开始"""
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def shift_buckets(day, granularity, count):
+    """从 day 所在的数据点移动 count 个数据点后的第一天"""
+    day = bucket_start(day, granularity)
+    if granularity == 'week':
+        return day + timedelta(weeks=count)
+    if granularity == 'month':
+        return _add_months(day, count)
+    return day + timedelta(days=count)
+
+
+def bucket_dates(start, end, granularity):
+    """[start, end] 覆盖的全部数据点的第一天，用于补齐没有数据的日期"""
+    dates = []
+    day = bucket_start(start, granularity)
+    while day <= end:
+        dates.append(day)
+        day = shift_buckets(day, granularity, 1)
+    return dates
+
+
+def _bucket(granularity):
+    # 汇总表的日期已经是本地时区的日期，截断不需要再做时区转换
+    if granularity == 'week':
+        return TruncWeek('date')
+    if granularity == 'month':
+        return TruncMonth('date')
+    return F('date')
+
+
+def _number(metric, value):
+    if metric == 'revenue':
+        return float(value or 0)
+    return value or 0
+
+
+def _label(group_by, row):
+    if group_by == 'service':
+        return row['service__name']
+    if group_by == 'dog_size':
+        return DogSize(row['dog_size']).label if row['dog_size'] else '未知'
+    return dict(AppointmentStatus.CHOICES).get(row['status'], row['status'])
+
+
+def build_trend(start, end, granularity='day', metric='count', group_by=None):
+    """
+    统计 [start, end] 内按日、周或月汇总的趋势
+
+    从每日汇总表（分组时从服务明细表）一次分组查询取得全部数据点，
+    没有数据的日期在 Python 中补零。不分组时返回 values 列表，
+    分组时返回 series 列表，每组一条，按合计从大到小排列并省略全为零的组。
+    """
+    dates = bucket_dates(start, end, granularity)
+    index = {day: position for position, day in enumerate(dates)}
+    field, aggregate = METRICS[metric]
+    result = {
+        'granularity': granularity,
+        'metric': metric,
+        'start': dates[0].strftime('%Y-%m-%d'),
+        'end': end.strftime('%Y-%m-%d'),
+        'dates': [day.strftime('%Y-%m-%d') for day in dates],
+    }
+
+    if group_by is None:
+        values = [_number(metric, 0)] * len(dates)
+        for row in DailyMetrics.objects.filter(
+            date__range=(dates[0], end)
+        ).annotate(bucket=_bucket(granularity)).values('bucket').annotate(
+            value=Sum(field)
+        ).order_by():
+            values[index[row['bucket']]] = _number(metric, row['value'])
+        result['values'] = values
+        return result
+
+    group_fields = GROUP_FIELDS[group_by]
+    series = {}
+    for row in DailyServiceMetrics.objects.filter(
+        date__range=(dates[0], end)
+    ).annotate(bucket=_bucket(granularity)).values(
+        'bucket', *group_fields
+    ).annotate(value=aggregate).order_by():
+        key = row[group_fields[0]]
+        entry = series.get(key)
+        if entry is None:
+            entry = series[key] = {
+                'key': str(key),
+                'label': _label(group_by, row),
+                'values': [_number(metric, 0)] * len(dates),
+            }
+        entry['values'][index[row['bucket']]] = _number(metric, row['value'])
+
+    result['series'] = sorted(
+        (entry for entry in series.values() if any(entry['values'])),
+        key=lambda entry: (-sum(entry['values']), entry['label'])
+    )
+    return result
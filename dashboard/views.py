@@ -2,23 +2,42 @@ from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAdminUser
+from rest_framework import status
 from django.utils import timezone
-from django.db.models import Count, Sum
+from django.db.models import Count, Q, Sum
 from datetime import timedelta
 from decimal import Decimal
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from typing import Dict, List, Union, Any
 
-from appointments.models import Appointment
 from accounts.models import Customer
+from appointments.models import Appointment
 from appointments.utils import AppointmentStatus
+from .cache import cached_response
+from .models import DailyMetrics
+from .rollups import day_start
+from .serializers import TrendQuerySerializer
+from .trends import build_trend
+
+# 统计周期: 天数，与同样长度的上一周期比较
+STATISTICS_PERIODS = {
+    'day': 1,
+    'week': 7,
+    'month': 30,
+}
+
+# 预约和收入趋势的周期: 天数
+TREND_PERIODS = {
+    'week': 7,
+    'month': 30,
+}
 
 class DashboardViewSet(ViewSet):
     """
     后台仪表盘数据接口，提供统计数据和分析图表所需的数据
     
-    所有接口都需要管理员权限
+    所有接口都需要管理员权限；响应按接口和参数短时间缓存，预约或客户变化后立即过期
     """
     permission_classes = [IsAdminUser]
 
@@ -37,86 +56,189 @@ class DashboardViewSet(ViewSet):
         return round(((float(current) - float(previous)) / float(previous) * 100), 1)
 
     @swagger_auto_schema(
-        operation_description="获取仪表盘统计数据，包括今日预约数、营收和新增客户等关键指标",
+        operation_description="获取仪表盘统计数据，包括统计周期内的预约数、营收和新增客户等关键指标，以及与上一周期相比的增长率",
+        manual_parameters=[
+            openapi.Parameter(
+                'period',
+                openapi.IN_QUERY,
+                description="统计周期（day: 今日对比昨日, week: 近7天对比之前7天, month: 近30天对比之前30天）",
+                type=openapi.TYPE_STRING,
+                enum=list(STATISTICS_PERIODS),
+                default='day'
+            )
+        ],
         responses={
             200: openapi.Response(
                 description="统计数据",
                 schema=openapi.Schema(
                     type=openapi.TYPE_OBJECT,
                     properties={
-                        'todayAppointments': openapi.Schema(type=openapi.TYPE_INTEGER, description='今日预约数'),
+                        'period': openapi.Schema(type=openapi.TYPE_STRING, description='统计周期'),
+                        'start': openapi.Schema(type=openapi.TYPE_STRING, description='周期开始日期'),
+                        'end': openapi.Schema(type=openapi.TYPE_STRING, description='周期结束日期'),
+                        'appointments': openapi.Schema(type=openapi.TYPE_INTEGER, description='周期内预约数'),
                         'appointmentGrowth': openapi.Schema(type=openapi.TYPE_NUMBER, description='预约增长率'),
-                        'todayRevenue': openapi.Schema(type=openapi.TYPE_NUMBER, description='今日营收'),
+                        'revenue': openapi.Schema(type=openapi.TYPE_NUMBER, description='周期内营收'),
                         'revenueGrowth': openapi.Schema(type=openapi.TYPE_NUMBER, description='营收增长率'),
                         'newCustomers': openapi.Schema(type=openapi.TYPE_INTEGER, description='新增客户数'),
                         'customerGrowth': openapi.Schema(type=openapi.TYPE_NUMBER, description='客户增长率'),
+                        'todayAppointments': openapi.Schema(type=openapi.TYPE_INTEGER, description='今日预约数（兼容旧字段，仅 period=day）'),
+                        'todayRevenue': openapi.Schema(type=openapi.TYPE_NUMBER, description='今日营收（兼容旧字段，仅 period=day）'),
                     }
                 )
             )
         }
     )
     @action(detail=False, methods=['get'])
+    @cached_response
     def statistics(self, request) -> Response:
         """
         获取仪表盘统计数据，包括：
-        1. 今日预约数及增长率
-        2. 今日营收及增长率
+        1. 周期内预约数及增长率
+        2. 周期内营收及增长率
         3. 新增客户数及增长率
-        """
-        today = timezone.now().date()
-        yesterday = today - timedelta(days=1)
-        
-        # 今日预约统计
-        today_appointments = Appointment.objects.filter(
-            created_at__date=today
-        ).count()
         
-        yesterday_appointments = Appointment.objects.filter(
-            created_at__date=yesterday
-        ).count()
+        预约和营收读取每日汇总，新增客户按注册时间的半开区间直接统计客户表，
+        每张表一次条件聚合查询同时得到本周期和上一周期。
+        period=day 时另外返回旧字段 todayAppointments、todayRevenue
+        """
+        period = request.query_params.get('period', 'day')
+        if period not in STATISTICS_PERIODS:
+            return Response(
+                {"error": "无效的统计周期"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        days = STATISTICS_PERIODS[period]
+        today = timezone.localdate()
+        current_start = today - timedelta(days=days - 1)
+        previous_start = current_start - timedelta(days=days)
         
-        # 今日营收（已完成的预约）
-        today_revenue = Appointment.objects.filter(
-            created_at__date=today,
-            status=AppointmentStatus.COMPLETED
+        current = Q(date__gte=current_start)
+        previous = Q(date__lt=current_start)
+        totals = DailyMetrics.objects.filter(
+            date__range=(previous_start, today)
         ).aggregate(
-            total=Sum('total_price')
-        )['total'] or Decimal('0')
-        
-        yesterday_revenue = Appointment.objects.filter(
-            created_at__date=yesterday,
-            status=AppointmentStatus.COMPLETED
+            current_appointments=Sum('appointments', filter=current, default=0),
+            previous_appointments=Sum('appointments', filter=previous, default=0),
+            # 营收（已完成的预约）
+            current_revenue=Sum('revenue', filter=current, default=Decimal('0')),
+            previous_revenue=Sum('revenue', filter=previous, default=Decimal('0')),
+        )
+        # 新增客户统计，由注册时间索引定位
+        boundary = day_start(current_start)
+        totals.update(Customer.objects.filter(
+            created_at__gte=day_start(previous_start),
+            created_at__lt=day_start(today + timedelta(days=1))
         ).aggregate(
-            total=Sum('total_price')
-        )['total'] or Decimal('0')
+            current_new_customers=Count('id', filter=Q(created_at__gte=boundary)),
+            previous_new_customers=Count('id', filter=Q(created_at__lt=boundary)),
+        ))
 
-        # 新增客户统计
-        new_customers_today = Customer.objects.filter(
-            created_at__date=today
-        ).count()
-        
-        new_customers_yesterday = Customer.objects.filter(
-            created_at__date=yesterday
-        ).count()
+        data = {
+            'period': period,
+            'start': current_start.strftime('%Y-%m-%d'),
+            'end': today.strftime('%Y-%m-%d'),
+            'appointments': totals['current_appointments'],
+            'appointmentGrowth': self._calculate_growth_rate(totals['current_appointments'], totals['previous_appointments']),
+            'revenue': float(totals['current_revenue']),
+            'revenueGrowth': self._calculate_growth_rate(totals['current_revenue'], totals['previous_revenue']),
+            'newCustomers': totals['current_new_customers'],
+            'customerGrowth': self._calculate_growth_rate(totals['current_new_customers'], totals['previous_new_customers'])
+        }
+        if period == 'day':
+            # 兼容按天统计时的旧字段名
+            data['todayAppointments'] = data['appointments']
+            data['todayRevenue'] = data['revenue']
+        return Response(data)
 
+    def _period_trend(self, request, metric) -> Response:
+        """按天的趋势，period 为 week 时取最近 7 天，month 时取最近 30 天"""
+        period = request.query_params.get('period', 'week')
+        if period not in TREND_PERIODS:
+            return Response(
+                {"error": "无效的统计周期"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        today = timezone.localdate()
+        trend = build_trend(
+            today - timedelta(days=TREND_PERIODS[period] - 1), today, metric=metric
+        )
         return Response({
-            'todayAppointments': today_appointments,
-            'appointmentGrowth': self._calculate_growth_rate(today_appointments, yesterday_appointments),
-            'todayRevenue': float(today_revenue),
-            'revenueGrowth': self._calculate_growth_rate(today_revenue, yesterday_revenue),
-            'newCustomers': new_customers_today,
-            'customerGrowth': self._calculate_growth_rate(new_customers_today, new_customers_yesterday)
+            'dates': trend['dates'],
+            'values': trend['values']
         })
 
+    @swagger_auto_schema(
+        operation_description="获取趋势数据，可指定日期范围、粒度、指标和分组",
+        query_serializer=TrendQuerySerializer,
+        responses={
+            200: openapi.Response(
+                description="趋势数据",
+                schema=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    properties={
+                        'granularity': openapi.Schema(type=openapi.TYPE_STRING, description='粒度'),
+                        'metric': openapi.Schema(type=openapi.TYPE_STRING, description='指标'),
+                        'start': openapi.Schema(type=openapi.TYPE_STRING, description='第一个数据点的开始日期'),
+                        'end': openapi.Schema(type=openapi.TYPE_STRING, description='结束日期'),
+                        'dates': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_STRING),
+                            description='每个数据点的开始日期'
+                        ),
+                        'values': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(type=openapi.TYPE_NUMBER),
+                            description='每个数据点的值（不分组时）'
+                        ),
+                        'series': openapi.Schema(
+                            type=openapi.TYPE_ARRAY,
+                            items=openapi.Schema(
+                                type=openapi.TYPE_OBJECT,
+                                properties={
+                                    'key': openapi.Schema(type=openapi.TYPE_STRING, description='分组值'),
+                                    'label': openapi.Schema(type=openapi.TYPE_STRING, description='分组名称'),
+                                    'values': openapi.Schema(
+                                        type=openapi.TYPE_ARRAY,
+                                        items=openapi.Schema(type=openapi.TYPE_NUMBER),
+                                        description='每个数据点的值'
+                                    ),
+                                }
+                            ),
+                            description='每组的数据（分组时）'
+                        ),
+                    }
+                )
+            )
+        }
+    )
+    @action(detail=False, methods=['get'])
+    @cached_response
+    def trend(self, request) -> Response:
+        """
+        获取趋势数据
+
+        参数:
+        - start / end: 日期范围 (YYYY-MM-DD)，end 默认今天，start 默认按粒度取最近若干个数据点
+        - granularity: day/week/month，周从星期一开始
+        - metric: count/revenue/cancellations
+        - group_by: service/dog_size/status，可选
+
+        无论范围多大都只有一次分组查询，范围按粒度限制最大数据点数
+        """
+        serializer = TrendQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return Response(build_trend(**serializer.validated_data))
+
     @swagger_auto_schema(
         operation_description="获取预约趋势数据，支持按周或月查看",
         manual_parameters=[
             openapi.Parameter(
                 'period',
                 openapi.IN_QUERY,
-                description="统计周期（week: 本周, month: 本月）",
+                description="统计周期（week: 最近7天, month: 最近30天）",
                 type=openapi.TYPE_STRING,
-                enum=['week', 'month'],
+                enum=list(TREND_PERIODS),
                 default='week'
             )
         ],
@@ -142,40 +264,10 @@ class DashboardViewSet(ViewSet):
         }
     )
     @action(detail=False, methods=['get'])
+    @cached_response
     def appointment_trend(self, request) -> Response:
-        """获取预约趋势数据，支持周/月两种时间范围"""
-        period = request.query_params.get('period', 'week')
-        today = timezone.now().date()
-        
-        # 确定日期范围
-        if period == 'week':
-            start_date = today - timedelta(days=6)
-            dates = [(start_date + timedelta(days=i)) for i in range(7)]
-        else:  # month
-            start_date = today - timedelta(days=29)
-            dates = [(start_date + timedelta(days=i)) for i in range(30)]
-
-        # 查询预约数据
-        appointments_by_date = Appointment.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=today
-        ).values('created_at__date').annotate(
-            count=Count('id')
-        ).order_by('created_at__date')
-
-        # 将查询结果转换为字典
-        count_dict = {
-            item['created_at__date']: item['count']
-            for item in appointments_by_date
-        }
-
-        # 构建数据列表，确保每天都有数据
-        values = [count_dict.get(date, 0) for date in dates]
-
-        return Response({
-            'dates': [date.strftime('%Y-%m-%d') for date in dates],
-            'values': values
-        })
+        """获取预约趋势数据，支持周/月两种时间范围，更多选项见 trend"""
+        return self._period_trend(request, 'count')
 
     @swagger_auto_schema(
         operation_description="获取收入趋势数据，支持按周或月查看",
@@ -183,9 +275,9 @@ class DashboardViewSet(ViewSet):
             openapi.Parameter(
                 'period',
                 openapi.IN_QUERY,
-                description="统计周期（week: 本周, month: 本月）",
+                description="统计周期（week: 最近7天, month: 最近30天）",
                 type=openapi.TYPE_STRING,
-                enum=['week', 'month'],
+                enum=list(TREND_PERIODS),
                 default='week'
             )
         ],
@@ -211,39 +303,10 @@ class DashboardViewSet(ViewSet):
         }
     )
     @action(detail=False, methods=['get'])
+    @cached_response
     def revenue_trend(self, request) -> Response:
-        """获取收入趋势数据，支持周/月两种时间范围"""
-        period = request.query_params.get('period', 'week')
-        today = timezone.now().date()
-        
-        if period == 'week':
-            start_date = today - timedelta(days=6)
-            dates = [(start_date + timedelta(days=i)) for i in range(7)]
-        else:  # month
-            start_date = today - timedelta(days=29)
-            dates = [(start_date + timedelta(days=i)) for i in range(30)]
-
-        revenue_by_date = Appointment.objects.filter(
-            created_at__date__gte=start_date,
-            created_at__date__lte=today,
-            status=AppointmentStatus.COMPLETED
-        ).values('created_at__date').annotate(
-            total=Sum('total_price')
-        ).order_by('created_at__date')
-
-        # 将查询结果转换为字典
-        revenue_dict = {
-            item['created_at__date']: float(item['total'])
-            for item in revenue_by_date
-        }
-
-        # 构建数据列表，确保每天都有数据
-        values = [revenue_dict.get(date, 0) for date in dates]
-
-        return Response({
-            'dates': [date.strftime('%Y-%m-%d') for date in dates],
-            'values': values
-        })
+        """获取收入趋势数据，支持周/月两种时间范围，更多选项见 trend"""
+        return self._period_trend(request, 'revenue')
 
     @swagger_auto_schema(
         operation_description="获取最近预约列表",
@@ -277,6 +340,7 @@ class DashboardViewSet(ViewSet):
         }
     )
     @action(detail=False, methods=['get'])
+    @cached_response
     def recent_appointments(self, request) -> Response:
         """获取最近预约列表，支持通过limit参数限制返回数量"""
         limit = int(request.query_params.get('limit', 10))
@@ -6,6 +6,13 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from datetime import datetime
 from django.utils import timezone
+from core.conditional import (
+    make_etag,
+    not_modified,
+    set_validators
+)
+from core.versions import get_version
+from appointments.schedule import SCHEDULE_VERSION
 from .models import Holiday
 from .serializers import HolidaySerializer
 
@@ -23,9 +30,20 @@ class HolidayViewSet(viewsets.ModelViewSet):
     def upcoming(self, request):
         """获取即将到来的假期"""
         today = timezone.now().date()
+        
+        # 假期未变化且仍是同一天时直接返回 304
+        version = get_version(SCHEDULE_VERSION)
+        etag = make_etag(request.get_full_path(), today, version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        
         upcoming_holidays = Holiday.objects.filter(
             end_date__gte=today
         ).order_by('start_date')[:5]
         
         serializer = self.get_serializer(upcoming_holidays, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return set_validators(
+            Response(serializer.data),
+            etag
+        )
\ No newline at end of file
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pets', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pet',
+            index=models.Index(fields=['owner', '-created_at', 'id'], name='pet_owner_keyset_idx'),
+        ),
+    ]
@@ -7,6 +7,16 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from services.models import DogSize
 import uuid
 
+def size_for_weight(weight):
+    """根据体重计算体型"""
+    weight = float(weight)
+    if weight <= 8:
+        return DogSize.SMALL
+    elif weight <= 15:
+        return DogSize.MEDIUM
+    else:
+        return DogSize.LARGE
+
 class Pet(models.Model):
     """宠物模型"""
     id = models.UUIDField(
@@ -56,6 +66,13 @@ class Pet(models.Model):
         verbose_name = _('宠物')
         verbose_name_plural = _('宠物')
         ordering = ['-created_at']
+        indexes = [
+            # 宠物列表按主人筛选后的游标分页排序
+            models.Index(
+                fields=['owner', '-created_at', 'id'],
+                name='pet_owner_keyset_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.get_size_display()})"
@@ -63,13 +80,7 @@ class Pet(models.Model):
     @property
     def size(self):
         """根据体重自动计算体型"""
-        weight = float(self.weight)
-        if weight <= 8:
-            return DogSize.SMALL
-        elif weight <= 15:
-            return DogSize.MEDIUM
-        else:
-            return DogSize.LARGE
+        return size_for_weight(self.weight)
 
     def get_size_display(self):
         """获取体型显示名称"""
@@ -1,9 +1,25 @@
 # pets/serializers.py
 
 from rest_framework import serializers
-from .models import Pet, PetHealthRecord
+from .models import Pet, PetHealthRecord, size_for_weight
 from django.utils import timezone
 from dateutil.relativedelta import relativedelta
+from core.representation import ValuesRepresentation
+from services.models import DogSize
+
+def format_age(birthday, today):
+    """格式化宠物年龄"""
+    if not birthday:
+        return None
+    
+    age = relativedelta(today, birthday)
+    
+    years = age.years
+    months = age.months
+    
+    if years > 0:
+        return f"{years}岁{months}个月" if months > 0 else f"{years}岁"
+    return f"{months}个月"
 
 class PetHealthRecordSerializer(serializers.ModelSerializer):
     class Meta:
@@ -28,18 +44,40 @@ class PetSerializer(serializers.ModelSerializer):
 
     def get_age(self, obj):
         """计算宠物年龄"""
-        if not obj.birthday:
-            return None
-        
-        today = timezone.now().date()
-        age = relativedelta(today, obj.birthday)
-        
-        years = age.years
-        months = age.months
-        
-        if years > 0:
-            return f"{years}岁{months}个月" if months > 0 else f"{years}岁"
-        return f"{months}个月"
+        return format_age(obj.birthday, timezone.now().date())
+
+class PetListRepresentation(ValuesRepresentation):
+    """宠物列表的快速表示，输出与 PetSerializer 一致"""
+    serializer_class = PetSerializer
+    fields = (
+        'id', 'name', 'breed', 'weight', 'birthday', 'gender',
+        'is_sterilized', 'notes', 'photo', 'created_at'
+    )
+    gender_labels = dict(Pet._meta.get_field('gender').flatchoices)
+    size_labels = dict(DogSize.choices)
+    photo_field = Pet._meta.get_field('photo')
+
+    def prepare(self, rows):
+        self.today = timezone.now().date()
+
+    def represent_row(self, row):
+        size = size_for_weight(row['weight'])
+        return {
+            'id': str(row['id']),
+            'name': row['name'],
+            'breed': row['breed'],
+            'weight': self.format('weight', row['weight']),
+            'birthday': self.format('birthday', row['birthday']),
+            'gender': row['gender'],
+            'gender_display': str(self.gender_labels.get(row['gender'], row['gender'])),
+            'is_sterilized': row['is_sterilized'],
+            'notes': row['notes'],
+            'photo': self.format_file('photo', self.photo_field, row['photo']),
+            'size': str(size),
+            'size_display': str(self.size_labels[size]),
+            'age': format_age(row['birthday'], self.today),
+            'created_at': self.format('created_at', row['created_at']),
+        }
 
 class PetDetailSerializer(PetSerializer):
     """详细的宠物信息序列化器，包含健康记录"""
@@ -4,19 +4,24 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from core.pagination import KeysetPagination
+from core.representation import ValuesListMixin
 from django.shortcuts import get_object_or_404
 from .models import Pet, PetHealthRecord
 from .serializers import (
     PetSerializer,
     PetDetailSerializer,
-    PetHealthRecordSerializer
+    PetHealthRecordSerializer,
+    PetListRepresentation
 )
 from services.models import DogSize
 
-class PetViewSet(viewsets.ModelViewSet):
+class PetViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """宠物视图集"""
     serializer_class = PetSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    list_representation_class = PetListRepresentation
 
     def get_queryset(self):
         """只返回当前用户的宠物"""
@@ -0,0 +1,11 @@
+# resources/admin.py
+
+from django.contrib import admin
+from .models import Resource
+
+@admin.register(Resource)
+class ResourceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'is_active')
+    list_filter = ('is_active',)
+    search_fields = ('name',)
+    filter_horizontal = ('services',)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ResourcesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'resources'
+    verbose_name = '服务资源'
+
+    def ready(self):
+        from . import signals  # noqa: F401
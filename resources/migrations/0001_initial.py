@@ -0,0 +1,32 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:26
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('services', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resource',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, verbose_name='资源名称')),
+                ('is_active', models.BooleanField(default=True, verbose_name='是否启用')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+                ('services', models.ManyToManyField(blank=True, related_name='resources', to='services.service', verbose_name='可提供的服务')),
+            ],
+            options={
+                'verbose_name': '服务资源',
+                'verbose_name_plural': '服务资源',
+                'ordering': ['name'],
+            },
+        ),
+    ]
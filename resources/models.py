@@ -0,0 +1,39 @@
+# resources/models.py
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from services.models import Service
+import uuid
+
+class Resource(models.Model):
+    """
+    服务资源模型
+    
+    每个资源是一个能独立接待预约的工位（一位美容师及其使用的美容台），
+    同一时间只能服务一个预约，只能承接其技能范围内的服务项目。
+    美容台不单独建模：同时能接待的预约数等于启用中的资源数。
+    """
+    id = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False
+    )
+    name = models.CharField(_('资源名称'), max_length=100)
+    services = models.ManyToManyField(
+        Service,
+        related_name='resources',
+        blank=True,
+        verbose_name=_('可提供的服务')
+    )
+    is_active = models.BooleanField(_('是否启用'), default=True)
+    
+    created_at = models.DateTimeField(_('创建时间'), auto_now_add=True)
+    updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('服务资源')
+        verbose_name_plural = _('服务资源')
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
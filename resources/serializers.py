@@ -0,0 +1,10 @@
+# resources/serializers.py
+
+from rest_framework import serializers
+from .models import Resource
+
+class ResourceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Resource
+        fields = ['id', 'name', 'services', 'is_active']
+        read_only_fields = ['id']
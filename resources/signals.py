@@ -0,0 +1,16 @@
+# resources/signals.py
+
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from core.versions import bump_versions_on_commit
+from .models import Resource
+
+RESOURCES_VERSION = 'resources'
+
+
+@receiver(post_save, sender=Resource)
+@receiver(post_delete, sender=Resource)
+@receiver(m2m_changed, sender=Resource.services.through)
+def resources_changed(sender, **kwargs):
+    """资源或其服务技能变化时更新版本号，使可用时间段的缓存失效"""
+    bump_versions_on_commit([RESOURCES_VERSION])
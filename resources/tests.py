@@ -0,0 +1,37 @@
+# resources/tests.py
+
+from django.test import TestCase
+from appointments.tests import BookingFixtureMixin
+from .models import Resource
+
+
+class ResourceTests(BookingFixtureMixin, TestCase):
+    """同一时间能接待的预约数等于有技能的启用资源数；有预约的资源不能删除"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.resources = []
+        for name in ('小王', '小李'):
+            resource = Resource.objects.create(name=name)
+            resource.services.add(cls.service)
+            cls.resources.append(resource)
+
+    def test_capacity_equals_active_resources(self):
+        client = self.client_for(self.customer)
+        for _ in self.resources:
+            self.assertEqual(self.book(client, '09:00').status_code, 201)
+        self.assertEqual(self.book(client, '09:00').status_code, 409)
+
+    def test_destroy(self):
+        client = self.client_for(self.staff)
+        self.assertEqual(self.book(self.client_for(self.customer), '09:00').status_code, 201)
+        used = Resource.objects.get(appointments__isnull=False)
+        unused = Resource.objects.exclude(id=used.id).get()
+
+        response = client.delete(f'/api/resources/{used.id}/')
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('error', response.data)
+        self.assertTrue(Resource.objects.filter(id=used.id).exists())
+
+        self.assertEqual(client.delete(f'/api/resources/{unused.id}/').status_code, 204)
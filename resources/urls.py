@@ -0,0 +1,14 @@
+# resources/urls.py
+
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import ResourceViewSet
+
+router = DefaultRouter()
+router.register('', ResourceViewSet)
+
+app_name = 'resources'
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
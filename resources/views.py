@@ -0,0 +1,29 @@
+# resources/views.py
+
+from django.db.models import ProtectedError
+from rest_framework import status, viewsets
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.response import Response
+from .models import Resource
+from .serializers import ResourceSerializer
+
+class ResourceViewSet(viewsets.ModelViewSet):
+    """服务资源视图集"""
+    queryset = Resource.objects.prefetch_related('services')
+    serializer_class = ResourceSerializer
+    
+    def get_permissions(self):
+        """仅管理员可以维护资源，其他用户可以查看"""
+        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+            return [IsAdminUser()]
+        return [IsAuthenticated()]
+
+    def destroy(self, request, *args, **kwargs):
+        """删除资源，已有预约的资源不能删除，只能停用"""
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except ProtectedError:
+            return Response(
+                {"error": "该资源已有预约，无法删除，请改为停用"},
+                status=status.HTTP_409_CONFLICT
+            )
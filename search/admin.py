@@ -0,0 +1,17 @@
+# search/admin.py
+
+from django.contrib import admin
+from .models import SearchDocument
+
+
+@admin.register(SearchDocument)
+class SearchDocumentAdmin(admin.ModelAdmin):
+    """搜索文档（只读，由信号和 rebuild_search_index 维护）"""
+    list_display = ('kind', 'object_id', 'body', 'updated_at')
+    list_filter = ('kind',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,143 @@
+# search/backends.py
+
+from uuid import UUID
+from django.db import connection
+from .models import SearchDocument
+
+# 摘要中命中部分的标记
+HIGHLIGHT_START = '['
+HIGHLIGHT_END = ']'
+# 未使用全文匹配时摘要截取的字符数
+SNIPPET_LENGTH = 64
+
+
+def _escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _uuid(value):
+    return value if isinstance(value, UUID) else UUID(value)
+
+
+class SQLiteSearchBackend:
+    """
+    SQLite FTS5 全文索引（trigram 分词）
+
+    trigram 分词支持任意位置的子串匹配，中文、手机号片段和输入中的前缀都能命中。
+    不少于 3 个字符的词在索引中匹配并按 bm25 排序；更短的词无法使用 trigram 索引，
+    在全文表上用 LIKE 过滤（只扫描索引表本身，不关联业务表）。
+    """
+
+    def search(self, terms, kinds, limit):
+        indexed = [term for term in terms if len(term) >= 3]
+        conditions = []
+        params = []
+        if indexed:
+            conditions.append('search_fts MATCH %s')
+            params.append(' '.join(
+                '"{}"'.format(term.replace('"', '""')) for term in indexed
+            ))
+        for term in terms:
+            if len(term) < 3:
+                conditions.append("search_fts.body LIKE %s ESCAPE '\\'")
+                params.append(f'%{_escape_like(term)}%')
+        if kinds:
+            conditions.append(f"d.kind IN ({', '.join(['%s'] * len(kinds))})")
+            params.extend(kinds)
+
+        if indexed:
+            columns = (
+                f"snippet(search_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', "
+                f"'…', 12), -bm25(search_fts)"
+            )
+            rank = 'bm25(search_fts)'
+        else:
+            columns = f'substr(d.body, 1, {SNIPPET_LENGTH}), 0'
+            rank = 'd.updated_at DESC'
+
+        # 正文以第一个词开头的文档（名称、用户名等）排在前面，适合边输入边搜索
+        params.append(f'{_escape_like(terms[0])}%')
+        params.append(limit)
+        sql = (
+            f'SELECT d.kind, d.object_id, {columns} '
+            f'FROM search_fts JOIN search_searchdocument d ON d.id = search_fts.rowid '
+            f'WHERE {" AND ".join(conditions)} '
+            f"ORDER BY d.body LIKE %s ESCAPE '\\' DESC, {rank} "
+            f'LIMIT %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [
+                (kind, _uuid(object_id), snippet, score)
+                for kind, object_id, snippet, score in cursor.fetchall()
+            ]
+
+
+class PostgresSearchBackend:
+    """
+    PostgreSQL tsvector 前缀匹配 + pg_trgm 子串匹配
+
+    两个条件分别使用表达式 GIN 索引和 trigram GIN 索引，
+    按 ts_rank 与 word_similarity 之和排序。
+    """
+
+    def search(self, terms, kinds, limit):
+        tsquery = ' & '.join(
+            "'{}':*".format(term.replace('\\', '\\\\').replace("'", "''"))
+            for term in terms
+        )
+        params = [
+            f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, '
+            f'MaxWords=12, MinWords=4',
+            ' '.join(terms),
+            tsquery,
+            [f'%{_escape_like(term)}%' for term in terms],
+        ]
+        kind_condition = ''
+        if kinds:
+            kind_condition = 'AND d.kind = ANY(%s) '
+            params.append(list(kinds))
+        params.append(limit)
+        sql = (
+            "SELECT d.kind, d.object_id, ts_headline('simple', d.body, q, %s), "
+            "ts_rank(to_tsvector('simple', d.body), q) + "
+            "word_similarity(%s, d.body) AS score "
+            "FROM search_searchdocument d, to_tsquery('simple', %s) q "
+            "WHERE (to_tsvector('simple', d.body) @@ q OR d.body ILIKE ALL(%s)) "
+            f"{kind_condition}"
+            "ORDER BY score DESC LIMIT %s"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return [
+                (kind, _uuid(object_id), snippet, score)
+                for kind, object_id, snippet, score in cursor.fetchall()
+            ]
+
+
+class BasicSearchBackend:
+    """其他数据库没有全文索引，只在搜索文档表上做子串匹配"""
+
+    def search(self, terms, kinds, limit):
+        queryset = SearchDocument.objects.all()
+        for term in terms:
+            queryset = queryset.filter(body__icontains=term)
+        if kinds:
+            queryset = queryset.filter(kind__in=kinds)
+        return [
+            (kind, object_id, body[:SNIPPET_LENGTH], 0)
+            for kind, object_id, body in queryset.order_by(
+                '-updated_at'
+            ).values_list('kind', 'object_id', 'body')[:limit]
+        ]
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend():
+    """按当前数据库选择搜索实现"""
+    return BACKENDS.get(connection.vendor, BasicSearchBackend)()
@@ -0,0 +1,104 @@
+# search/indexing.py
+
+from collections import defaultdict
+from django.contrib.auth import get_user_model
+from appointments.models import Appointment, AppointmentNote
+from pets.models import Pet
+from services.models import Service
+from .models import SearchDocument, SearchKind
+
+# 重建索引时每批处理的对象数
+REBUILD_CHUNK_SIZE = 500
+
+
+def _join(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def _appointment_texts(ids):
+    """预约的备注和全部工作人员备注"""
+    texts = {
+        appointment_id: [notes]
+        for appointment_id, notes in Appointment.objects.filter(
+            id__in=ids
+        ).values_list('id', 'notes')
+    }
+    for appointment_id, note in AppointmentNote.objects.filter(
+        appointment__in=ids
+    ).order_by('created_at').values_list('appointment', 'note'):
+        texts[appointment_id].append(note)
+    return {appointment_id: _join(*parts) for appointment_id, parts in texts.items()}
+
+
+def _pet_texts(ids):
+    return {
+        pet_id: _join(name, breed)
+        for pet_id, name, breed in Pet.objects.filter(
+            id__in=ids
+        ).values_list('id', 'name', 'breed')
+    }
+
+
+def _customer_texts(ids):
+    return {
+        customer_id: _join(username, email, phone)
+        for customer_id, username, email, phone in get_user_model().objects.filter(
+            id__in=ids
+        ).values_list('id', 'username', 'email', 'phone')
+    }
+
+
+def _service_texts(ids):
+    return {
+        service_id: _join(name, description)
+        for service_id, name, description in Service.objects.filter(
+            id__in=ids
+        ).values_list('id', 'name', 'description')
+    }
+
+
+# 类型: (模型, 读取可搜索文本的函数, 参与索引的字段)
+SOURCES = {
+    SearchKind.APPOINTMENT: (Appointment, _appointment_texts, {'notes'}),
+    SearchKind.PET: (Pet, _pet_texts, {'name', 'breed'}),
+    SearchKind.CUSTOMER: (
+        get_user_model(), _customer_texts, {'username', 'email', 'phone'}
+    ),
+    SearchKind.SERVICE: (Service, _service_texts, {'name', 'description'}),
+}
+
+
+def reindex(kind, ids):
+    """
+    重新索引指定对象，必须在事务内调用
+
+    删除旧文档后写入新文档，没有可搜索文本或已删除的对象不保留文档。
+    全文索引由数据库触发器（SQLite）或表达式索引（PostgreSQL）同步。
+    """
+    ids = list(ids)
+    if not ids:
+        return
+    texts = SOURCES[kind][1](ids)
+    SearchDocument.objects.filter(kind=kind, object_id__in=ids).delete()
+    SearchDocument.objects.bulk_create([
+        SearchDocument(kind=kind, object_id=object_id, body=body)
+        for object_id, body in texts.items()
+        if body
+    ])
+
+
+def remove(kind, ids):
+    """从索引中删除指定对象"""
+    SearchDocument.objects.filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+def rebuild_index(chunk_size=REBUILD_CHUNK_SIZE):
+    """清空并重建全部索引，返回每种类型的文档数"""
+    SearchDocument.objects.all().delete()
+    counts = defaultdict(int)
+    for kind, (model, _texts, _fields) in SOURCES.items():
+        ids = list(model._default_manager.values_list('pk', flat=True).order_by('pk'))
+        for start in range(0, len(ids), chunk_size):
+            reindex(kind, ids[start:start + chunk_size])
+        counts[kind] = SearchDocument.objects.filter(kind=kind).count()
+    return dict(counts)
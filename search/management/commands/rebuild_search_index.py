@@ -0,0 +1,24 @@
+# search/management/commands/rebuild_search_index.py
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from search.indexing import REBUILD_CHUNK_SIZE, rebuild_index
+
+
+class Command(BaseCommand):
+    help = '清空并重建全文搜索索引（首次部署或索引损坏时运行，之后由信号增量维护）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=REBUILD_CHUNK_SIZE,
+            help='每批索引的对象数'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            counts = rebuild_index(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            '，'.join(f'{kind} {count} 条' for kind, count in counts.items())
+        ))
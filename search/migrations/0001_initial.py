@@ -0,0 +1,77 @@
+# Generated by Django 5.1.2 on 2026-10-18 02:44
+
+from django.db import migrations, models
+
+# 全文索引依赖数据库，不能用模型 Meta 声明，按数据库分别创建
+INDEX_SQL = {
+    # FTS5 外部内容表，正文只存一份在 search_searchdocument 中，由触发器同步索引。
+    # 之后修改 SearchDocument 的迁移如果导致 SQLite 重建该表，需要重新创建这些触发器
+    'sqlite': [
+        "CREATE VIRTUAL TABLE search_fts USING fts5("
+        "body, content='search_searchdocument', content_rowid='id', "
+        "tokenize='trigram')",
+        "CREATE TRIGGER search_fts_insert AFTER INSERT ON search_searchdocument BEGIN "
+        "INSERT INTO search_fts(rowid, body) VALUES (new.id, new.body); END",
+        "CREATE TRIGGER search_fts_delete AFTER DELETE ON search_searchdocument BEGIN "
+        "INSERT INTO search_fts(search_fts, rowid, body) "
+        "VALUES ('delete', old.id, old.body); END",
+        "CREATE TRIGGER search_fts_update AFTER UPDATE ON search_searchdocument BEGIN "
+        "INSERT INTO search_fts(search_fts, rowid, body) "
+        "VALUES ('delete', old.id, old.body); "
+        "INSERT INTO search_fts(rowid, body) VALUES (new.id, new.body); END",
+    ],
+    'postgresql': [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX search_document_tsv_idx ON search_searchdocument "
+        "USING gin (to_tsvector('simple', body))",
+        "CREATE INDEX search_document_trgm_idx ON search_searchdocument "
+        "USING gin (body gin_trgm_ops)",
+    ],
+}
+
+DROP_INDEX_SQL = {
+    'sqlite': [
+        "DROP TRIGGER IF EXISTS search_fts_insert",
+        "DROP TRIGGER IF EXISTS search_fts_delete",
+        "DROP TRIGGER IF EXISTS search_fts_update",
+        "DROP TABLE IF EXISTS search_fts",
+    ],
+    'postgresql': [
+        "DROP INDEX IF EXISTS search_document_tsv_idx",
+        "DROP INDEX IF EXISTS search_document_trgm_idx",
+    ],
+}
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('appointment', '预约'), ('pet', '宠物'), ('customer', '客户'), ('service', '服务')], max_length=20, verbose_name='类型')),
+                ('object_id', models.UUIDField(verbose_name='对象ID')),
+                ('body', models.TextField(verbose_name='内容')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='更新时间')),
+            ],
+            options={
+                'verbose_name': '搜索文档',
+                'verbose_name_plural': '搜索文档',
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(_run(INDEX_SQL), _run(DROP_INDEX_SQL)),
+    ]
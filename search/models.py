@@ -0,0 +1,38 @@
+# search/models.py
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class SearchKind(models.TextChoices):
+    APPOINTMENT = 'appointment', _('预约')
+    PET = 'pet', _('宠物')
+    CUSTOMER = 'customer', _('客户')
+    SERVICE = 'service', _('服务')
+
+
+class SearchDocument(models.Model):
+    """
+    搜索索引中的一条文档，对应一个预约、宠物、客户或服务
+
+    body 为该对象所有可搜索文本的拼接，由信号增量维护。
+    全文索引建立在 body 上：SQLite 为 FTS5 外部内容表 search_fts（trigram 分词，
+    由触发器同步），PostgreSQL 为 tsvector 表达式索引和 pg_trgm 索引，见迁移 0001。
+    """
+    kind = models.CharField(_('类型'), max_length=20, choices=SearchKind.choices)
+    object_id = models.UUIDField(_('对象ID'))
+    body = models.TextField(_('内容'))
+    updated_at = models.DateTimeField(_('更新时间'), auto_now=True)
+
+    class Meta:
+        verbose_name = _('搜索文档')
+        verbose_name_plural = _('搜索文档')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['kind', 'object_id'],
+                name='unique_search_document'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.object_id}"
@@ -0,0 +1,40 @@
+# search/serializers.py
+
+from rest_framework import serializers
+from .models import SearchKind
+
+# 搜索词最多的个数，以及一次最多返回的结果数
+MAX_SEARCH_TERMS = 5
+MAX_SEARCH_LIMIT = 50
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """搜索参数"""
+    q = serializers.CharField(max_length=100)
+    kind = serializers.MultipleChoiceField(
+        choices=SearchKind.choices,
+        required=False
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=MAX_SEARCH_LIMIT,
+        default=20
+    )
+
+    def validate_q(self, value):
+        terms = list(dict.fromkeys(
+            term for term in value.replace('"', ' ').split() if term
+        ))
+        if not terms:
+            raise serializers.ValidationError("请输入搜索内容")
+        return terms[:MAX_SEARCH_TERMS]
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """搜索结果"""
+    kind = serializers.ChoiceField(choices=SearchKind.choices)
+    id = serializers.UUIDField()
+    title = serializers.CharField()
+    subtitle = serializers.CharField(allow_blank=True)
+    snippet = serializers.CharField(allow_blank=True)
+    score = serializers.FloatField()
@@ -0,0 +1,54 @@
+# search/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from accounts.models import Customer
+from appointments.booking import appointments_created
+from appointments.models import Appointment, AppointmentNote
+from pets.models import Pet
+from services.models import Service
+from .indexing import SOURCES, reindex, remove
+from .models import SearchKind
+
+KINDS = {model: kind for kind, (model, _texts, _fields) in SOURCES.items()}
+
+
+@receiver(post_save, sender=Appointment)
+@receiver(post_save, sender=Pet)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Service)
+def object_saved(sender, instance, created, update_fields=None, **kwargs):
+    """可搜索字段可能变化时重新索引该对象"""
+    kind = KINDS[sender]
+    if update_fields is not None and not SOURCES[kind][2] & set(update_fields):
+        return
+    # 预约的状态变化很频繁，只有备注变化时才需要重新索引
+    if (sender is Appointment and not created and
+            instance.get_loaded_value('notes') == instance.notes):
+        return
+    reindex(kind, [instance.pk])
+
+
+@receiver(post_delete, sender=Appointment)
+@receiver(post_delete, sender=Pet)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Service)
+def object_deleted(sender, instance, **kwargs):
+    """对象删除后从索引中移除"""
+    remove(KINDS[sender], [instance.pk])
+
+
+@receiver(post_save, sender=AppointmentNote)
+@receiver(post_delete, sender=AppointmentNote)
+def appointment_note_changed(sender, instance, **kwargs):
+    """工作人员备注属于所在预约的文档"""
+    reindex(SearchKind.APPOINTMENT, [instance.appointment_id])
+
+
+@receiver(appointments_created)
+def appointments_bulk_created(sender, appointments, **kwargs):
+    """批量预约和周期预约生成的预约没有 post_save"""
+    reindex(
+        SearchKind.APPOINTMENT,
+        [appointment.pk for appointment in appointments if appointment.notes]
+    )
@@ -0,0 +1,196 @@
+# search/tests.py
+
+from datetime import time
+from decimal import Decimal
+from unittest import mock, skipUnless
+from django.db import connection
+from django.test import TestCase
+from accounts.models import Customer
+from appointments.booking import book_appointments
+from appointments.models import Appointment, AppointmentNote
+from appointments.tests import BookingFixtureMixin
+from appointments.utils import AppointmentStatus
+from pets.models import Pet
+from services.models import Service
+from .models import SearchDocument, SearchKind
+
+
+def document_body(kind, object_id):
+    return SearchDocument.objects.filter(
+        kind=kind, object_id=object_id
+    ).values_list('body', flat=True).first()
+
+
+@skipUnless(connection.vendor == 'sqlite', '全文索引触发器只在 SQLite 上创建')
+class FullTextTriggerTests(TestCase):
+    """搜索文档的新增、修改和删除由触发器同步到 FTS5 索引"""
+
+    def matches(self, term):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT rowid FROM search_fts WHERE search_fts MATCH %s',
+                [f'"{term}"']
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_triggers(self):
+        document = SearchDocument.objects.create(
+            kind=SearchKind.PET, object_id='00000000-0000-0000-0000-000000000001',
+            body='泰迪犬 奶油色'
+        )
+        self.assertEqual(self.matches('泰迪犬'), [document.id])
+
+        document.body = '金毛犬 浅金色'
+        document.save()
+        self.assertEqual(self.matches('泰迪犬'), [])
+        self.assertEqual(self.matches('金毛犬'), [document.id])
+
+        document.delete()
+        self.assertEqual(self.matches('金毛犬'), [])
+
+
+class IndexSignalTests(BookingFixtureMixin, TestCase):
+    """可搜索字段变化时通过信号维护索引"""
+
+    def create_appointment(self, start_time, notes=''):
+        return Appointment.objects.create(
+            customer=self.customer,
+            pet=self.pet,
+            service=self.service,
+            date=self.day,
+            start_time=start_time,
+            end_time=time(start_time.hour + 1),
+            total_price=Decimal('100'),
+            dog_size=self.pet.size,
+            notes=notes
+        )
+
+    def test_appointment_reindexed_only_when_notes_change(self):
+        appointment = Appointment.objects.get(
+            id=self.create_appointment(time(9), '怕吹风机').id
+        )
+        self.assertEqual(
+            document_body(SearchKind.APPOINTMENT, appointment.id), '怕吹风机'
+        )
+
+        with mock.patch('search.signals.reindex') as reindex:
+            appointment.status = AppointmentStatus.CONFIRMED
+            appointment.save()
+        reindex.assert_not_called()
+
+        appointment.notes = '怕吹风机，需要安抚'
+        appointment.save()
+        self.assertEqual(
+            document_body(SearchKind.APPOINTMENT, appointment.id), '怕吹风机，需要安抚'
+        )
+
+    def test_staff_notes(self):
+        appointment = self.create_appointment(time(9), '怕吹风机')
+        note = AppointmentNote.objects.create(
+            appointment=appointment, staff=self.staff, note='耳朵发炎'
+        )
+        self.assertEqual(
+            document_body(SearchKind.APPOINTMENT, appointment.id), '怕吹风机\n耳朵发炎'
+        )
+        note.delete()
+        self.assertEqual(
+            document_body(SearchKind.APPOINTMENT, appointment.id), '怕吹风机'
+        )
+
+    def test_bulk_created_appointments(self):
+        created = book_appointments([
+            Appointment(
+                customer=self.customer, pet=self.pet, service=self.service,
+                date=self.day, start_time=time(hour), end_time=time(hour + 1),
+                total_price=Decimal('100'), dog_size=self.pet.size, notes=notes
+            )
+            for hour, notes in ((9, '第一次来'), (10, ''))
+        ])
+        self.assertEqual(
+            document_body(SearchKind.APPOINTMENT, created[0].id), '第一次来'
+        )
+        # 没有备注的预约不保留文档
+        self.assertIsNone(document_body(SearchKind.APPOINTMENT, created[1].id))
+
+    def test_deleted_objects_removed(self):
+        appointment = self.create_appointment(time(9), '怕吹风机')
+        appointment.delete()
+        self.assertIsNone(document_body(SearchKind.APPOINTMENT, appointment.id))
+
+        pet_id = self.pet.id
+        self.assertEqual(document_body(SearchKind.PET, pet_id), '旺财')
+        self.pet.delete()
+        self.assertIsNone(document_body(SearchKind.PET, pet_id))
+
+
+class SearchTests(BookingFixtureMixin, TestCase):
+    """搜索接口：任意片段、短词、类型过滤和前缀优先的排序"""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = Customer.objects.create_user(
+            'xiaobai@example.com', 'password', username='小白妈妈', phone='13812345678'
+        )
+        cls.white = Pet.objects.create(
+            owner=cls.owner, name='小白', breed='金毛寻回犬',
+            weight=Decimal('30'), gender='F'
+        )
+        cls.package = Service.objects.create(
+            name='美容套餐', description='洗澡、修剪、剪指甲和清洁耳朵', duration=90
+        )
+        # 正文不以搜索词开头，但词出现两次且正文更短，bm25 分数更高
+        cls.care = Service.objects.create(
+            name='精致洗护', description='美容套餐 美容套餐', duration=60
+        )
+
+    def search(self, q, **params):
+        response = self.client_for(self.staff).get('/api/search/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return [(result['kind'], result['id']) for result in response.data['results']]
+
+    def test_phone_fragment(self):
+        self.assertEqual(
+            self.search('2345'), [(SearchKind.CUSTOMER, str(self.owner.id))]
+        )
+
+    def test_chinese_substring(self):
+        self.assertEqual(
+            self.search('寻回犬'), [(SearchKind.PET, str(self.white.id))]
+        )
+
+    def test_short_terms_use_like(self):
+        response = self.client_for(self.staff).get('/api/search/', {'q': '小白'})
+        results = response.data['results']
+        self.assertEqual(
+            {(result['kind'], result['id']) for result in results},
+            {
+                (SearchKind.CUSTOMER, str(self.owner.id)),
+                (SearchKind.PET, str(self.white.id)),
+            }
+        )
+        self.assertTrue(all(result['score'] == 0 for result in results))
+
+        # 短词与索引词组合时两个条件都要满足
+        self.assertEqual(
+            self.search('小白 金毛寻回'), [(SearchKind.PET, str(self.white.id))]
+        )
+
+    def test_kind_filter(self):
+        self.assertEqual(
+            self.search('小白', kind='pet'), [(SearchKind.PET, str(self.white.id))]
+        )
+        self.assertEqual(self.search('小白', kind='service'), [])
+
+    @skipUnless(connection.vendor == 'sqlite', '分数为 SQLite 的 bm25')
+    def test_prefix_first(self):
+        response = self.client_for(self.staff).get('/api/search/', {'q': '美容套餐'})
+        results = response.data['results']
+        self.assertEqual([result['id'] for result in results], [
+            str(self.package.id), str(self.care.id)
+        ])
+        self.assertLess(results[0]['score'], results[1]['score'])
+
+    def test_staff_only(self):
+        response = self.client_for(self.customer).get('/api/search/', {'q': '小白'})
+        self.assertEqual(response.status_code, 403)
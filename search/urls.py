@@ -0,0 +1,14 @@
+# search/urls.py
+
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import SearchViewSet
+
+router = DefaultRouter()
+router.register('', SearchViewSet, basename='search')
+
+app_name = 'search'
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,117 @@
+# search/views.py
+
+from rest_framework.viewsets import ViewSet
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from django.contrib.auth import get_user_model
+from appointments.models import Appointment
+from pets.models import Pet
+from services.models import Service
+from .backends import get_backend
+from .models import SearchKind
+from .serializers import SearchQuerySerializer, SearchResultSerializer
+
+
+def _appointment_labels(ids):
+    return {
+        row['id']: (
+            f"{row['pet__name']} · {row['service__name']}",
+            f"{row['date']:%Y-%m-%d} {row['start_time']:%H:%M} · "
+            f"{row['customer__username']}"
+        )
+        for row in Appointment.objects.filter(id__in=ids).values(
+            'id', 'pet__name', 'service__name', 'date', 'start_time',
+            'customer__username'
+        )
+    }
+
+
+def _pet_labels(ids):
+    return {
+        row['id']: (row['name'], row['owner__username'])
+        for row in Pet.objects.filter(id__in=ids).values(
+            'id', 'name', 'owner__username'
+        )
+    }
+
+
+def _customer_labels(ids):
+    return {
+        row['id']: (row['username'], row['phone'] or row['email'])
+        for row in get_user_model().objects.filter(id__in=ids).values(
+            'id', 'username', 'phone', 'email'
+        )
+    }
+
+
+def _service_labels(ids):
+    return {
+        row['id']: (row['name'], f"{row['duration']}分钟")
+        for row in Service.objects.filter(id__in=ids).values(
+            'id', 'name', 'duration'
+        )
+    }
+
+
+# 每种类型一次查询取得结果的标题和副标题
+LABELS = {
+    SearchKind.APPOINTMENT: _appointment_labels,
+    SearchKind.PET: _pet_labels,
+    SearchKind.CUSTOMER: _customer_labels,
+    SearchKind.SERVICE: _service_labels,
+}
+
+
+class SearchViewSet(ViewSet):
+    """
+    前台全文搜索
+
+    在预约备注、工作人员备注、宠物、客户和服务中搜索，只有工作人员可以使用
+    """
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        """
+        搜索
+
+        参数:
+        - q: 搜索内容，多个词用空格分隔，需全部命中；支持词中任意片段
+        - kind: 限定类型（appointment/pet/customer/service），可重复
+        - limit: 返回数量，默认 20，最多 50
+        """
+        serializer = SearchQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        terms = serializer.validated_data['q']
+
+        hits = get_backend().search(
+            terms,
+            sorted(serializer.validated_data.get('kind', ())),
+            serializer.validated_data['limit']
+        )
+
+        ids_by_kind = {}
+        for kind, object_id, _snippet, _score in hits:
+            ids_by_kind.setdefault(kind, []).append(object_id)
+        labels = {
+            kind: LABELS[kind](ids) for kind, ids in ids_by_kind.items()
+        }
+
+        results = []
+        for kind, object_id, snippet, score in hits:
+            label = labels[kind].get(object_id)
+            # 索引与对象的删除在同一事务中，这里只是防御
+            if label is None:
+                continue
+            results.append({
+                'kind': kind,
+                'id': object_id,
+                'title': label[0],
+                'subtitle': label[1],
+                'snippet': snippet,
+                'score': score,
+            })
+
+        return Response({
+            'query': ' '.join(terms),
+            'results': SearchResultSerializer(results, many=True).data,
+        })
@@ -0,0 +1,61 @@
+# services/pricing.py
+
+import threading
+from collections import defaultdict
+from core.versions import get_version
+from .models import ServicePrice
+from .signals import CATALOG_VERSION
+
+
+class PriceMatrix:
+    """
+    服务价格矩阵 {service_id: {dog_size: ServicePrice}}
+
+    一次查询加载全部价格，之后按服务和体型取价格只需字典查找。
+    价格对象在进程内共享，只能读取，不能修改或保存。
+    """
+
+    def __init__(self, prices):
+        matrix = defaultdict(dict)
+        for price in prices:
+            matrix[price.service_id][price.dog_size] = price
+        self.matrix = dict(matrix)
+
+    @classmethod
+    def load(cls):
+        """从数据库加载全部服务价格"""
+        return cls(ServicePrice.objects.only(
+            'id', 'service_id', 'dog_size', 'price'
+        ).order_by('service', 'dog_size'))
+
+    def get_prices(self, service_id):
+        """获取服务的全部价格，按体型排序"""
+        return list(self.matrix.get(service_id, {}).values())
+
+    def get_price(self, service_id, dog_size):
+        """获取服务在指定体型下的价格，未设置时返回 None"""
+        price = self.matrix.get(service_id, {}).get(dog_size)
+        return None if price is None else price.price
+
+
+_lock = threading.Lock()
+_compiled = None
+
+
+def get_price_matrix():
+    """
+    获取当前进程缓存的价格矩阵
+
+    每次只读取一次共享缓存中的服务目录版本号，
+    服务或价格变化后版本号更新，才重新查询数据库构建。
+    """
+    global _compiled
+    version = get_version(CATALOG_VERSION)
+    compiled = _compiled
+    if compiled is not None and compiled[0] == version:
+        return compiled[1]
+
+    with _lock:
+        if _compiled is None or _compiled[0] != version:
+            _compiled = (version, PriceMatrix.load())
+        return _compiled[1]
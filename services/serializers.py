@@ -3,6 +3,8 @@
 
 from rest_framework import serializers
 from .models import Service, ServicePrice, DogSize
+from .pricing import get_price_matrix
+from core.representation import ValuesRepresentation
 
 class ServicePriceSerializer(serializers.ModelSerializer):
     dog_size_display = serializers.CharField(
@@ -16,7 +18,8 @@ class ServicePriceSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 class ServiceSerializer(serializers.ModelSerializer):
-    prices = ServicePriceSerializer(many=True, read_only=True)
+    # 价格来自进程内缓存的价格矩阵，列表中的服务不再逐个查询价格
+    prices = serializers.SerializerMethodField()
     
     class Meta:
         model = Service
@@ -24,6 +27,49 @@ class ServiceSerializer(serializers.ModelSerializer):
                  'image', 'is_active', 'prices']
         read_only_fields = ['id']
 
+    def get_prices(self, obj):
+        return ServicePriceSerializer(
+            get_price_matrix().get_prices(obj.id),
+            many=True
+        ).data
+
+class ServiceListRepresentation(ValuesRepresentation):
+    """服务列表的快速表示，输出与 ServiceSerializer 一致"""
+    serializer_class = ServiceSerializer
+    fields = ('id', 'name', 'description', 'duration', 'image', 'is_active')
+    image_field = Service._meta.get_field('image')
+
+    size_labels = dict(DogSize.choices)
+
+    def prepare(self, rows):
+        price_matrix = get_price_matrix()
+        price_field = ServicePriceSerializer().fields['price']
+        self.prices = {
+            row['id']: [
+                {
+                    'id': str(price.id),
+                    'dog_size': price.dog_size,
+                    'dog_size_display': str(
+                        self.size_labels.get(price.dog_size, price.dog_size)
+                    ),
+                    'price': price_field.to_representation(price.price),
+                }
+                for price in price_matrix.get_prices(row['id'])
+            ]
+            for row in rows
+        }
+
+    def represent_row(self, row):
+        return {
+            'id': str(row['id']),
+            'name': row['name'],
+            'description': row['description'],
+            'duration': row['duration'],
+            'image': self.format_file('image', self.image_field, row['image']),
+            'is_active': row['is_active'],
+            'prices': self.prices[row['id']],
+        }
+
 class ServicePriceCreateSerializer(serializers.ModelSerializer):
     """用于创建服务价格的序列化器"""
     class Meta:
@@ -44,4 +90,37 @@ class ServicePriceCreateSerializer(serializers.ModelSerializer):
 class ServiceDetailSerializer(ServiceSerializer):
     """详细的服务信息序列化器"""
     class Meta(ServiceSerializer.Meta):
-        fields = ServiceSerializer.Meta.fields + ['created_at', 'updated_at']
\ No newline at end of file
+        fields = ServiceSerializer.Meta.fields + ['created_at', 'updated_at']
+
+class QuoteSerializer(serializers.Serializer):
+    """报价结果"""
+    service = serializers.UUIDField()
+    service_name = serializers.CharField()
+    duration = serializers.IntegerField()
+    pet = serializers.UUIDField(allow_null=True)
+    dog_size = serializers.CharField()
+    dog_size_display = serializers.CharField()
+    price = serializers.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        allow_null=True
+    )
+
+class QuoteServiceSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Service
+        fields = ['id', 'name', 'duration']
+
+class PetQuoteSerializer(serializers.Serializer):
+    """单只宠物对各服务的报价，prices 为 {服务ID: 价格}，未设置价格时为 null"""
+    id = serializers.UUIDField()
+    name = serializers.CharField()
+    dog_size = serializers.CharField()
+    dog_size_display = serializers.CharField()
+    prices = serializers.DictField(
+        child=serializers.DecimalField(
+            max_digits=10,
+            decimal_places=2,
+            allow_null=True
+        )
+    )
@@ -0,0 +1,17 @@
+# services/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from core.versions import bump_versions_on_commit
+from .models import Service, ServicePrice
+
+CATALOG_VERSION = 'catalog'
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=ServicePrice)
+@receiver(post_delete, sender=ServicePrice)
+def catalog_changed(sender, **kwargs):
+    """服务或价格变化时更新服务目录的版本号"""
+    bump_versions_on_commit([CATALOG_VERSION])
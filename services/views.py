@@ -1,22 +1,52 @@
 # services/views.py
 
+import uuid
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.db.models import Q
+from django.core.exceptions import ValidationError as DjangoValidationError
+from core.conditional import (
+    make_etag,
+    not_modified,
+    set_validators
+)
+from core.versions import get_version
+from core.representation import ValuesListMixin
 from .models import Service, ServicePrice, DogSize
+from pets.models import Pet
+from .signals import CATALOG_VERSION
+from .pricing import get_price_matrix
 from .serializers import (
     ServiceSerializer,
     ServiceDetailSerializer,
+    ServiceListRepresentation,
     ServicePriceSerializer,
-    ServicePriceCreateSerializer
+    ServicePriceCreateSerializer,
+    QuoteSerializer,
+    QuoteServiceSerializer,
+    PetQuoteSerializer
 )
 
-class ServiceViewSet(viewsets.ModelViewSet):
+# 批量报价一次最多查询的宠物数和服务数
+MAX_QUOTE_PETS = 20
+MAX_QUOTE_SERVICES = 100
+
+
+def _parse_ids(value):
+    """解析逗号分隔的 UUID 列表，去重并保持顺序，格式错误时抛出 ValueError"""
+    if not value:
+        return []
+    return list(dict.fromkeys(
+        uuid.UUID(item.strip()) for item in value.split(',') if item.strip()
+    ))
+
+class ServiceViewSet(ValuesListMixin, viewsets.ModelViewSet):
     """服务项目视图集"""
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
+    list_representation_class = ServiceListRepresentation
     
     def get_permissions(self):
         """普通用户只能查看，管理员可以进行所有操作"""
@@ -29,6 +59,18 @@ class ServiceViewSet(viewsets.ModelViewSet):
             return ServiceDetailSerializer
         return ServiceSerializer
 
+    def list(self, request, *args, **kwargs):
+        """服务列表，服务目录未变化时直接返回 304"""
+        version = get_version(CATALOG_VERSION)
+        etag = make_etag(request.build_absolute_uri(), version)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return set_validators(
+            super().list(request, *args, **kwargs),
+            etag
+        )
+
     def get_queryset(self):
         """支持按名称搜索和按是否启用筛选"""
         queryset = Service.objects.all()
@@ -64,10 +106,114 @@ class ServiceViewSet(viewsets.ModelViewSet):
     def prices(self, request, pk=None):
         """获取服务的所有价格"""
         service = self.get_object()
-        prices = service.prices.all()
+        prices = get_price_matrix().get_prices(service.id)
         serializer = ServicePriceSerializer(prices, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path='quote')
+    def batch_quote(self, request):
+        """
+        批量报价：多只宠物 × 多个服务的价格和时长
+        参数:
+        - pets: 宠物ID，逗号分隔
+        - services: 服务ID，逗号分隔，不提供时为全部启用的服务
+        
+        宠物和服务各查询一次，价格来自价格矩阵，查询次数与数量无关。
+        """
+        try:
+            pet_ids = _parse_ids(request.query_params.get('pets'))
+            service_ids = _parse_ids(request.query_params.get('services'))
+        except ValueError:
+            return Response(
+                {"error": "无效的ID"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not pet_ids:
+            return Response(
+                {"error": "必须提供宠物ID"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(pet_ids) > MAX_QUOTE_PETS or len(service_ids) > MAX_QUOTE_SERVICES:
+            return Response(
+                {"error": f"一次最多查询{MAX_QUOTE_PETS}只宠物和{MAX_QUOTE_SERVICES}个服务"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        pets = Pet.objects.filter(id__in=pet_ids).only('id', 'name', 'weight')
+        if not request.user.is_staff:
+            pets = pets.filter(owner=request.user)
+        pets = {pet.id: pet for pet in pets}
+        if len(pets) != len(pet_ids):
+            return Response(
+                {"error": "宠物不存在"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if service_ids:
+            services = Service.objects.filter(id__in=service_ids)
+        else:
+            services = Service.objects.filter(is_active=True)
+        services = list(services.only('id', 'name', 'duration'))
+        
+        matrix = get_price_matrix()
+        return Response({
+            'services': QuoteServiceSerializer(services, many=True).data,
+            'pets': PetQuoteSerializer([
+                {
+                    'id': pet.id,
+                    'name': pet.name,
+                    'dog_size': pet.size,
+                    'dog_size_display': pet.get_size_display(),
+                    'prices': {
+                        service.id: matrix.get_price(service.id, pet.size)
+                        for service in services
+                    }
+                }
+                for pet in (pets[pet_id] for pet_id in pet_ids)
+            ], many=True).data
+        })
+
+    @action(detail=True, methods=['get'])
+    def quote(self, request, pk=None):
+        """
+        查询服务报价
+        参数（二选一）:
+        - pet: 宠物ID，按宠物体重对应的体型报价
+        - dog_size: 体型 (S/M/L)
+        """
+        service = self.get_object()
+        pet_id = request.query_params.get('pet')
+        dog_size = request.query_params.get('dog_size')
+        
+        pet = None
+        if pet_id:
+            pets = Pet.objects.all()
+            if not request.user.is_staff:
+                pets = pets.filter(owner=request.user)
+            try:
+                pet = pets.get(id=pet_id)
+            except (Pet.DoesNotExist, DjangoValidationError):
+                return Response(
+                    {"error": "宠物不存在"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            dog_size = pet.size
+        elif dog_size not in DogSize.values:
+            return Response(
+                {"error": "必须提供宠物ID或有效的体型"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(QuoteSerializer({
+            'service': service.id,
+            'service_name': service.name,
+            'duration': service.duration,
+            'pet': pet.id if pet else None,
+            'dog_size': dog_size,
+            'dog_size_display': DogSize(dog_size).label,
+            'price': get_price_matrix().get_price(service.id, dog_size)
+        }).data)
+
 class ServicePriceViewSet(viewsets.ModelViewSet):
     """服务价格视图集"""
     queryset = ServicePrice.objects.all()